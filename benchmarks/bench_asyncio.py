@@ -0,0 +1,81 @@
+"""Event loop lag benchmark
+
+A ticker task sleeps 1 ms in a loop and measures how late it wakes up,
+while a producer task logs bursts of records to a file. Compares Logger,
+which writes on the event loop, with AsyncLogger, which only queues
+
+Usage: python benchmarks/bench_asyncio.py [--records N] [--burst N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from uglylogger import AsyncLogger, Logger, LogFormatBlock
+
+TICK = 0.001
+
+
+async def measure(logger: Logger, records: int, burst: int) -> None:
+    lags: list[float] = []
+    done = False
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while not done:
+            start = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append(loop.time() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    start = time.perf_counter()
+    for i in range(0, records, burst):
+        for j in range(i, i + burst):
+            logger.file("request %d handled in %d ms", j, j % 100)
+        await asyncio.sleep(0)
+    seconds = time.perf_counter() - start
+    done = True
+    await task
+    if isinstance(logger, AsyncLogger):
+        await logger.arelease()
+    else:
+        logger.release()
+    lags.sort()
+    print(
+        f"{type(logger).__name__:<11} | {records / seconds:>10,.0f} calls/s "
+        f"| lag p50 {statistics.median(lags) * 1e3:6.2f} ms "
+        f"| p99 {lags[int(len(lags) * 0.99)] * 1e3:6.2f} ms "
+        f"| max {lags[-1] * 1e3:6.2f} ms | dropped {logger.dropped}"
+    )
+
+
+def run(records: int, burst: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        for cls in (Logger, AsyncLogger):
+            file = os.path.join(tmp, f"{cls.__name__}.log")
+            # a queue for every record, nothing is dropped
+            logger = cls(
+                f"bench_asyncio_{cls.__name__}", file, queue_size=records
+            )
+            logger.set_format(
+                [
+                    "[",
+                    LogFormatBlock.LEVEL,
+                    "] [",
+                    LogFormatBlock.DATETIME,
+                    "] ",
+                    LogFormatBlock.MESSAGE,
+                ]
+            )
+            asyncio.run(measure(logger, records, burst))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--burst", type=int, default=100)
+    args = parser.parse_args()
+    run(args.records, args.burst)
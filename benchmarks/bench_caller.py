@@ -0,0 +1,55 @@
+"""Caller resolution benchmark
+
+Compares the inspect.stack() based lookup uglylogger used before
+with the frame walking engine in uglylogger.caller
+
+Usage: python benchmarks/bench_caller.py [--number N]
+"""
+
+import argparse
+import inspect
+import timeit
+from typing import Tuple
+from uglylogger.caller import get_file_line_func
+
+
+def legacy_get_file_line_func() -> Tuple[str | None, str | None, int | None]:
+    # copy of the pre-0.9 Logger._get_file_line_func
+    stack = inspect.stack()
+    this_fil = str(stack[1][1])
+    index = 0
+    while index < len(stack):
+        fil = stack[index][1]
+        lin = stack[index][2]
+        fun = stack[index][3]
+        if fil == this_fil:
+            index += 1
+        else:
+            return (fil, fun, lin)
+    return (None, None, None)
+
+
+def _nested(fn, depth: int):
+    # simulates an application call stack of the given depth
+    if depth == 0:
+        return fn()
+    return _nested(fn, depth - 1)
+
+
+def run(number: int) -> None:
+    for depth in (5, 20):
+        for name, fn in (
+            ("inspect.stack", legacy_get_file_line_func),
+            ("frame walk", get_file_line_func),
+        ):
+            seconds = timeit.timeit(lambda: _nested(fn, depth), number=number)
+            print(
+                f"stack depth {depth:>3} | {name:<14} | "
+                f"{seconds / number * 1e9:>12.0f} ns/call"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    run(parser.parse_args().number)
@@ -0,0 +1,45 @@
+"""File output throughput benchmark
+
+Compares the STREAM file sink (write + flush per record,
+like logging.FileHandler) with the BUFFERED, MMAP and BINARY file sinks
+
+--layout full uses the default layout of the Logger (date/time and call
+site), BINARY always captures the call site but never renders the record
+
+Usage: python benchmarks/bench_file.py [--records N] [--layout message|full]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from uglylogger import Logger, LogFileSink, LogFormatBlock
+
+
+def run(records: int, layout: str) -> None:
+    msg = "a typical log line with a few words in it"
+    with tempfile.TemporaryDirectory() as tmp:
+        for sink in LogFileSink:
+            file = os.path.join(tmp, f"{sink.name.lower()}.log")
+            logger = Logger(f"bench_file_{sink.name}", file, file_sink=sink)
+            if layout == "message":
+                logger.set_format([LogFormatBlock.MESSAGE])
+            start = time.perf_counter()
+            for _ in range(records):
+                logger.file(msg)
+            logger.release()
+            seconds = time.perf_counter() - start
+            print(
+                f"{sink.name:<8} | {records / seconds:>12,.0f} records/s | "
+                f"{seconds / records * 1e9:>8.0f} ns/record"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument(
+        "--layout", choices=("message", "full"), default="message"
+    )
+    args = parser.parse_args()
+    run(args.records, args.layout)
@@ -0,0 +1,96 @@
+"""Record formatting benchmark
+
+Compares the interpreted layout loop uglylogger used before
+with the compiled render functions of uglylogger.formatter,
+for the default layout and for a message only layout
+
+Usage: python benchmarks/bench_format.py [--number N]
+"""
+
+import argparse
+import os
+import timeit
+from datetime import datetime
+from typing import Any
+from uglylogger import Logger, LogFormatBlock, LogLevel
+from uglylogger.caller import get_file_line_func
+
+DEFAULT_LAYOUT = [
+    "[",
+    LogFormatBlock.NAME,
+    "] [",
+    LogFormatBlock.LEVEL,
+    "] [",
+    LogFormatBlock.DATETIME,
+    "] (",
+    LogFormatBlock.FILE,
+    ":",
+    LogFormatBlock.LINE,
+    ":",
+    LogFormatBlock.FUNCTION,
+    ") ",
+    LogFormatBlock.MESSAGE,
+]
+MESSAGE_LAYOUT = [LogFormatBlock.MESSAGE]
+
+
+def legacy_format(logger: Logger, msg: Any, level: LogLevel) -> str:
+    # copy of the pre-0.9 Logger._format, with the new caller lookup
+    formatted = ""
+    fil = None
+    fun = None
+    lin = None
+    for item in logger._format_arr:
+        if type(item) is LogFormatBlock:
+            match item:
+                case LogFormatBlock.NAME:
+                    formatted += logger._name
+                case LogFormatBlock.LEVEL:
+                    formatted += str(level)
+                case LogFormatBlock.DATETIME:
+                    formatted += Logger.DateTimeToStr(datetime.now())
+                case LogFormatBlock.MESSAGE:
+                    formatted += logger._msg_to_str(msg)
+                case LogFormatBlock.FILE:
+                    if fil is None:
+                        fil, fun, lin = get_file_line_func()
+                    if fil is not None:
+                        formatted += os.path.basename(fil)
+                case LogFormatBlock.LINE:
+                    if fil is None:
+                        fil, fun, lin = get_file_line_func()
+                    if lin is not None:
+                        formatted += str(lin)
+                case LogFormatBlock.FUNCTION:
+                    if fil is None:
+                        fil, fun, lin = get_file_line_func()
+                    if fun is not None:
+                        formatted += str(fun)
+        else:
+            formatted += str(item)
+    return formatted
+
+
+def run(number: int) -> None:
+    logger = Logger("bench_format")
+    for layout_name, layout in (
+        ("default", DEFAULT_LAYOUT),
+        ("message only", MESSAGE_LAYOUT),
+    ):
+        logger.set_format(layout)
+        for name, fn in (
+            ("interpreted", lambda: legacy_format(logger, "msg", 10)),
+            ("compiled", lambda: logger._format("msg", LogLevel.DEBUG)),
+        ):
+            seconds = timeit.timeit(fn, number=number)
+            print(
+                f"{layout_name:<12} | {name:<11} | "
+                f"{seconds / number * 1e9:>8.0f} ns/record"
+            )
+    logger.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    run(parser.parse_args().number)
@@ -0,0 +1,90 @@
+"""Multi-process file output benchmark
+
+Worker processes log to the same file, either each with its own file
+handler (shared) or through the collector process (multiprocess=True),
+with the STREAM and the BUFFERED file sinks and in async mode.
+The file is rotated every few MiB, counts the records and the torn lines
+which end up in the generations
+
+Usage: python benchmarks/bench_multiprocess.py [--workers N] [--records N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from uglylogger import Logger, LogFileSink, LogFormatBlock
+
+# long enough that a record spans several pipe/page writes
+PADDING = "x" * 2000
+RECORD = re.compile(r"\d+ \d+ x{2000}")
+
+# mode: Logger options of the workers
+MODES: dict[str, dict] = {
+    "shared stream": {"file_sink": LogFileSink.STREAM},
+    "shared buffered": {"file_sink": LogFileSink.BUFFERED},
+    "collector stream": {"multiprocess": True},
+    "collector buffered": {
+        "multiprocess": True,
+        "file_sink": LogFileSink.BUFFERED,
+    },
+    # records are sent in batches by the writer thread
+    "collector async": {"multiprocess": True, "async_mode": True},
+}
+
+# rotation options of every Logger
+ROTATION = {"max_bytes": 16 * 1024 * 1024, "backup_count": 100}
+
+
+def work(file: str, worker: int, records: int, mode: str) -> None:
+    logger = Logger("bench_multiprocess", file, **MODES[mode], **ROTATION)
+    logger.set_format([LogFormatBlock.MESSAGE])
+    for i in range(records):
+        logger.file("%d %d %s", worker, i, PADDING)
+    logger.release()
+
+
+def run(workers: int, records: int) -> None:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, options in MODES.items():
+            file = os.path.join(tmp, f"{mode.replace(' ', '_')}.log")
+            # the collector is started and owned by this process
+            owner = None
+            if options.get("multiprocess"):
+                owner = Logger(
+                    "bench_multiprocess_owner", file, **options, **ROTATION
+                )
+            processes = [
+                context.Process(target=work, args=(file, w, records, mode))
+                for w in range(workers)
+            ]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            if owner is not None:
+                owner.release()
+            seconds = time.perf_counter() - start
+            lines = []
+            for name in os.listdir(tmp):
+                if name.startswith(os.path.basename(file)):
+                    with open(os.path.join(tmp, name), encoding="utf-8") as f:
+                        lines += f.read().splitlines()
+            torn = sum(1 for line in lines if not RECORD.fullmatch(line))
+            total = workers * records
+            print(
+                f"{mode:<18} | {total / seconds:>10,.0f} records/s | "
+                f"{len(lines) - torn:>8} of {total} intact | {torn} torn"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.workers, args.records)
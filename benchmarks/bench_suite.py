@@ -0,0 +1,262 @@
+"""Benchmark suite of the Logger hot paths
+
+Measures every log method for each LogOutput with the default and
+a message only layout, filtered out levels, console_oneline, LogBase
+forwarding, move() with each LogMoveOption and emission from several
+threads. Every case is timed repeat times, the best run is reported
+as ns/call and records/s
+
+The results can be saved as a JSON baseline and compared with one,
+the exit status is 1 if a case got slower than the threshold
+
+Usage: python benchmarks/bench_suite.py [--number N] [--repeat N]
+           [--filter TEXT] [--save FILE] [--label VERSION]
+           [--compare FILE] [--threshold %]
+
+Baselines: benchmarks/baselines/<version>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from importlib import metadata
+from typing import Callable, Iterator
+from uglylogger import (
+    LogBase,
+    Logger,
+    LogFormatBlock,
+    LogLevel,
+    LogMoveOption,
+    LogOutput,
+)
+
+# name -> function running a case "number" times
+Case = Callable[[int], None]
+
+LAYOUTS = {"default": None, "message": [LogFormatBlock.MESSAGE]}
+OUTPUTS = {
+    "console": LogOutput.CONSOLE,
+    "file": LogOutput.FILE,
+    "all": LogOutput.ALL,
+}
+METHODS = ("debug", "info", "warning", "error", "critical", "log")
+THREADS = 8
+MSG = "request %d handled in %d ms"
+
+
+class Suite:
+    """Loggers of the cases, the console is written to os.devnull"""
+
+    def __init__(self, tmp: str) -> None:
+        self._tmp = tmp
+        self._devnull = open(os.devnull, "w")
+        self._loggers: list[Logger] = []
+
+    def logger(self, name: str, layout: list | None = None) -> Logger:
+        logger = Logger(
+            f"bench_suite_{name}", os.path.join(self._tmp, f"{name}.log")
+        )
+        if layout is not None:
+            logger.set_format(layout)
+        handler = logger._console_handler
+        if handler is not None:
+            handler.setStream(self._devnull)
+        self._loggers.append(logger)
+        return logger
+
+    def close(self) -> None:
+        for logger in self._loggers:
+            logger.release()
+        self._devnull.close()
+
+    def cases(self) -> Iterator[tuple[str, Case]]:
+        for layout_name, layout in LAYOUTS.items():
+            for output_name, output in OUTPUTS.items():
+                for method in METHODS:
+                    name = f"{method}/{output_name}/{layout_name}"
+                    logger = self.logger(name.replace("/", "_"), layout)
+                    yield name, _method_case(logger, method, output)
+        logger = self.logger("filtered")
+        logger.set_log_level(LogLevel.ERROR)
+        yield "filtered/debug", _method_case(logger, "debug", LogOutput.ALL)
+        yield "filtered/info", _method_case(logger, "info", LogOutput.ALL)
+        yield "console_oneline", self._oneline_case()
+        logbase = LogBase(self.logger("logbase", LAYOUTS["message"]))
+        yield "logbase/debug", _logbase_case(logbase)
+        for option in LogMoveOption:
+            logger = self.logger(f"move_{option.name}", LAYOUTS["message"])
+            yield f"move/{option.name}", self._move_case(logger, option)
+        logger = self.logger("threads", LAYOUTS["message"])
+        yield f"threads/{THREADS}/file", _threads_case(logger)
+
+    def _oneline_case(self) -> Case:
+        logger = self.logger("oneline")
+
+        def case(number: int) -> None:
+            stdout = sys.stdout
+            sys.stdout = self._devnull
+            try:
+                for i in range(number):
+                    logger.console_oneline(i)
+            finally:
+                sys.stdout = stdout
+
+        return case
+
+    def _move_case(self, logger: Logger, option: LogMoveOption) -> Case:
+        # every move goes to a new file, with a record in the old one
+        directory = os.path.join(self._tmp, option.name)
+        os.mkdir(directory)
+        moves = [0]
+
+        def case(number: int) -> None:
+            for _ in range(number):
+                moves[0] += 1
+                logger.file(MSG, moves[0], 0)
+                logger.move(os.path.join(directory, f"{moves[0]}.log"), option)
+
+        return case
+
+
+def _method_case(logger: Logger, method: str, output: LogOutput) -> Case:
+    func = getattr(logger, method)
+
+    def case(number: int) -> None:
+        for i in range(number):
+            func(MSG, i, 42, output=output)
+
+    return case
+
+
+def _logbase_case(logbase: LogBase) -> Case:
+    def case(number: int) -> None:
+        for i in range(number):
+            logbase.debug(MSG, i, 42, output=LogOutput.FILE)
+
+    return case
+
+
+def _threads_case(logger: Logger) -> Case:
+    def work(records: int) -> None:
+        for i in range(records):
+            logger.file(MSG, i, 42)
+
+    def case(number: int) -> None:
+        threads = [
+            threading.Thread(target=work, args=(number // THREADS,))
+            for _ in range(THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return case
+
+
+def measure(case: Case, number: int, repeat: int) -> float:
+    """Returns the best ns/call of repeat runs"""
+    case(max(1, number // 10))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        case(number)
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def run(args: argparse.Namespace) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        suite = Suite(tmp)
+        try:
+            for name, case in suite.cases():
+                if args.filter and args.filter not in name:
+                    continue
+                number = args.number
+                if name.startswith("move/"):
+                    number = max(1, number // 100)
+                ns = measure(case, number, args.repeat)
+                results[name] = {
+                    "ns_per_call": round(ns, 1),
+                    "records_per_s": round(1e9 / ns),
+                }
+                print(
+                    f"{name:<28} | {ns:>10,.0f} ns/call | "
+                    f"{1e9 / ns:>12,.0f} records/s"
+                )
+        finally:
+            suite.close()
+    version = args.label
+    if not version:
+        try:
+            version = metadata.version("uglylogger")
+        except metadata.PackageNotFoundError:
+            version = "unknown"
+    return {
+        "uglylogger": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "number": args.number,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    """Prints the change of every case, True if none regressed"""
+    print(
+        f"\ncompared with uglylogger {baseline.get('uglylogger')} "
+        f"on python {baseline.get('python')}"
+    )
+    ok = True
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<28} | new")
+            continue
+        change = (result["ns_per_call"] / base["ns_per_call"] - 1) * 100
+        mark = ""
+        if change > threshold:
+            mark = " REGRESSION"
+            ok = False
+        print(
+            f"{name:<28} | {base['ns_per_call']:>10,.0f} -> "
+            f"{result['ns_per_call']:>10,.0f} ns/call | "
+            f"{change:>+7.1f}%{mark}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--save", help="writes the results as JSON")
+    parser.add_argument(
+        "--label", help="version of the results, the installed one if empty"
+    )
+    parser.add_argument("--compare", help="JSON baseline to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="slowdown in percent which counts as a regression",
+    )
+    args = parser.parse_args()
+    report = run(args)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            sys.exit(1)
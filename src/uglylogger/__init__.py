@@ -6,5 +6,15 @@ from .logger import (
     LogFormatBlock,
     Logger,
     LogMoveOption,
+    LogOverflowPolicy,
+    LogFileSink,
+    LogClock,
+    LogRotateOption,
+    LogCompression,
+    LogFileFormat,
 )
 from .logbase import LogBase
+from .aio import AsyncLogger, AsyncLogBase
+from .profile import LogProfileSort
+from .progress import LogProgress
+from .sampling import LogSampling, LogSamplingPolicy, LogSamplingKey
@@ -0,0 +1,40 @@
+import sys
+from typing import Callable
+from . import binary, index, mmapfile, reader
+
+# the command line tools, "python -m uglylogger <tool>". Not
+#   "python -m uglylogger.<module>", the package imports the modules
+#   before one would be executed as __main__
+TOOLS: dict[str, tuple[Callable[[list[str]], int], str]] = {
+    "binary": (binary.main, "renders binary log files to text"),
+    "index": (index.main, "queries and indexes log files"),
+    "mmap": (mmapfile.main, "prints the records of mmap log files"),
+    "read": (reader.main, "prints the records of text log files"),
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs a command line tool
+
+    Args:
+        argv (list[str] | None, optional): The tool and its arguments.
+            Defaults to None (sys.argv).
+
+    Returns:
+        int: Exit code
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in TOOLS:
+        lines = ["usage: python -m uglylogger <tool> ...", "", "tools:"]
+        for name, (_, help_text) in TOOLS.items():
+            lines.append(f"  {name:<10}{help_text}")
+        output = sys.stdout if argv[:1] in (["-h"], ["--help"]) else sys.stderr
+        output.write("\n".join(lines) + "\n")
+        return 0 if output is sys.stdout else 2
+    tool, _ = TOOLS[argv[0]]
+    return tool(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())  # pragma: no cover
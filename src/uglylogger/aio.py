@@ -0,0 +1,190 @@
+import asyncio
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from .caller import register_internal
+from .logbase import LogBase
+from .logger import (
+    Logger,
+    LogColor,
+    LogCompression,
+    LogLevel,
+    LogMoveOption,
+    LogOverflowPolicy,
+)
+
+
+class AsyncLogger(Logger):
+    """Logger for asyncio applications
+
+    The log methods never block the event loop, they only queue the
+        record for the writer thread of the async mode. The operations
+        which wait for the file have awaitable counterparts, aflush(),
+        amove(), arotate() and arelease(), they run on a worker thread.
+        console_oneline() prints on the worker thread as well
+
+    The overflow policy defaults to DROP_OLDEST, BLOCK would block
+        the event loop while the queue is full
+    """
+
+    _executor: ThreadPoolExecutor | None = None
+
+    def __init__(
+        self,
+        name: str,
+        file: str | None = None,
+        overflow: LogOverflowPolicy = LogOverflowPolicy.DROP_OLDEST,
+        **kwargs: Any,
+    ) -> None:
+        """Creates the logger, it is always in async mode
+
+        Args:
+            name (str): Name of the logger
+            file (str | None, optional): Path to the log file.
+                Defaults to None.
+            overflow (LogOverflowPolicy, optional): What to do when the
+                queue is full. Defaults to LogOverflowPolicy.DROP_OLDEST.
+            **kwargs (Any): Other arguments of Logger
+        """
+        super().__init__(
+            name, file, async_mode=True, overflow=overflow, **kwargs
+        )
+
+    def _worker(self) -> ThreadPoolExecutor:
+        # a single thread, the operations run in the order of the calls
+        executor = self._executor
+        if executor is None:
+            executor = self._executor = ThreadPoolExecutor(
+                1, thread_name_prefix=f"uglylogger-aio-{self._name}"
+            )
+        return executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._worker(), functools.partial(func, *args)
+        )
+
+    def console_oneline(
+        self,
+        msg: Any,
+        color: LogColor | None = None,
+        console_width: int = 100,
+        level: LogLevel = Logger.DEFAULT_CONSOLE_LOG_LEVEL,
+    ) -> None:
+        self._worker().submit(
+            super().console_oneline, msg, color, console_width, level
+        )
+
+    def _console_end_line(self) -> None:
+        self._worker().submit(super()._console_end_line)
+
+    async def aflush(self, timeout: float | None = None) -> bool:
+        """Waits until every queued record is written
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most.
+                Defaults to None (wait forever).
+
+        Returns:
+            bool: True if nothing is pending anymore
+        """
+        return await self._run(self.flush, timeout)
+
+    async def amove(
+        self,
+        new_file: str,
+        option: LogMoveOption = LogMoveOption.MOVE_AND_APPEND,
+        compression: LogCompression | None = None,
+    ) -> None:
+        """Moves the log file to a new destination, see Logger.move
+
+        Args:
+            new_file (str): New Log File
+            option (LogMoveOption): how to behave, Defaults to MOVE_AND_APPEND
+            compression (LogCompression | None, optional): Compresses the
+                old file in the background if the option keeps it.
+                Defaults to None (compression of the constructor).
+        """
+        await self._run(self.move, new_file, option, compression)
+
+    async def arotate(self) -> None:
+        """Starts a new generation of the log file, see Logger.rotate"""
+        await self._run(self.rotate)
+
+    async def arelease(self) -> None:
+        """Writes the queued records and releases the resources"""
+        await self._run(super().release)
+        self._stop_worker()
+
+    def release(self) -> None:
+        super().release()
+        self._stop_worker()
+
+    def _stop_worker(self) -> None:
+        executor = self._executor
+        if executor is not None:
+            self._executor = None
+            executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncLogger":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.arelease()
+
+
+class AsyncLogBase(LogBase):
+    """LogBase for asyncio applications, see AsyncLogger
+
+    The log methods of LogBase never block with an AsyncLogger,
+        the methods which wait for the file are awaitable here.
+        With a plain Logger, they run in a thread of the event loop
+    """
+
+    def init_logger(self, name: str, file: str | None = None) -> None:
+        self._logger = AsyncLogger(name, file)
+
+    async def aflush_logger(self, timeout: float | None = None) -> bool:
+        logger = self._logger
+        if logger is None:
+            return True
+        if isinstance(logger, AsyncLogger):
+            return await logger.aflush(timeout)
+        return await asyncio.to_thread(logger.flush, timeout)
+
+    async def amove_logger(
+        self,
+        new_file: str,
+        option: LogMoveOption = LogMoveOption.MOVE_AND_APPEND,
+        compression: LogCompression | None = None,
+    ) -> None:
+        logger = self._logger
+        if logger is None:
+            return
+        if isinstance(logger, AsyncLogger):
+            await logger.amove(new_file, option, compression)
+        else:
+            await asyncio.to_thread(logger.move, new_file, option, compression)
+
+    async def arotate_logger(self) -> None:
+        logger = self._logger
+        if logger is None:
+            return
+        if isinstance(logger, AsyncLogger):
+            await logger.arotate()
+        else:
+            await asyncio.to_thread(logger.rotate)
+
+    async def arelease_logger(self) -> None:
+        logger = self._logger
+        if logger is None:
+            return
+        if isinstance(logger, AsyncLogger):
+            await logger.arelease()
+        else:
+            await asyncio.to_thread(logger.release)
+
+
+register_internal(sys.modules[__name__])
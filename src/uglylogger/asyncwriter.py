@@ -0,0 +1,179 @@
+import atexit
+import threading
+import weakref
+from collections import deque
+from typing import Callable
+from .enums import LogOverflowPolicy
+from .handlers import _report_error
+from .record import LogEntry
+
+# writers which are still running, drained at interpreter exit
+_live_writers: "weakref.WeakSet[AsyncWriter]" = weakref.WeakSet()
+
+
+class AsyncWriter:
+    """Bounded queue drained by a background writer thread
+
+    Producers only append a LogEntry, the writer thread takes
+        the entries in batches and hands them to the dispatch function.
+        A batch whose dispatch raises is reported on stderr and counted
+        in failed, the writer keeps running
+    """
+
+    DEFAULT_QUEUE_SIZE: int = 10000
+    DEFAULT_BATCH_SIZE: int = 512
+
+    def __init__(
+        self,
+        dispatch: Callable[[list[LogEntry]], None],
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: LogOverflowPolicy = LogOverflowPolicy.BLOCK,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        name: str = "uglylogger-writer",
+    ) -> None:
+        """Creates and starts the writer
+
+        Args:
+            dispatch (Callable[[list[LogEntry]], None]): Called on the
+                writer thread with every batch
+            queue_size (int, optional): Maximum number of queued entries.
+                Defaults to DEFAULT_QUEUE_SIZE.
+            overflow (LogOverflowPolicy, optional): What to do when the
+                queue is full. Defaults to LogOverflowPolicy.BLOCK.
+            batch_size (int, optional): Maximum number of entries
+                per dispatch. Defaults to DEFAULT_BATCH_SIZE.
+            name (str, optional): Name of the writer thread.
+        """
+        if queue_size <= 0:
+            raise ValueError("queue_size must be positive")
+        self._dispatch = dispatch
+        self._queue_size = queue_size
+        self._overflow = overflow
+        self._batch_size = max(1, batch_size)
+        self._queue: deque[LogEntry] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._busy = False
+        self._closed = False
+        self._dropped = 0
+        self._failed = 0
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+        _live_writers.add(self)
+
+    @property
+    def dropped(self) -> int:
+        """Number of entries dropped by the overflow policy"""
+        return self._dropped
+
+    @property
+    def failed(self) -> int:
+        """Number of entries lost because their dispatch raised"""
+        return self._failed
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, entry: LogEntry) -> bool:
+        """Queues an entry
+
+        Args:
+            entry (LogEntry): Entry to write
+
+        Returns:
+            bool: False if the entry is dropped
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            if len(self._queue) >= self._queue_size:
+                match self._overflow:
+                    case LogOverflowPolicy.DROP_NEW:
+                        self._dropped += 1
+                        return False
+                    case LogOverflowPolicy.DROP_OLDEST:
+                        self._queue.popleft()
+                        self._dropped += 1
+                    case _:
+                        if threading.current_thread() is self._thread:
+                            # logging from the writer itself can't wait
+                            self._dropped += 1  # pragma: no cover
+                            return False  # pragma: no cover
+                        self._not_full.wait_for(self._has_room)
+                        if self._closed:
+                            return False  # pragma: no cover
+            self._queue.append(entry)
+            self._not_empty.notify()
+        return True
+
+    def _has_room(self) -> bool:
+        return self._closed or len(self._queue) < self._queue_size
+
+    def _take(self) -> list[LogEntry] | None:
+        with self._lock:
+            while not self._queue and not self._closed:
+                self._not_empty.wait()
+            if not self._queue:
+                return None
+            queue = self._queue
+            count = min(len(queue), self._batch_size)
+            batch = [queue.popleft() for _ in range(count)]
+            self._busy = True
+            self._not_full.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                self._dispatch(batch)
+            except Exception:
+                _report_error()
+                with self._lock:
+                    self._failed += len(batch)
+            finally:
+                with self._lock:
+                    self._busy = False
+                    if not self._queue:
+                        self._drained.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits until every queued entry is written
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most.
+                Defaults to None (wait forever).
+
+        Returns:
+            bool: True if the queue is drained
+        """
+        if threading.current_thread() is self._thread:
+            return False  # pragma: no cover
+        with self._lock:
+            return self._drained.wait_for(
+                lambda: not self._queue and not self._busy, timeout
+            )
+
+    def close(self) -> None:
+        """Drains the queue and stops the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        _live_writers.discard(self)
+
+
+@atexit.register
+def _close_live_writers() -> None:
+    for writer in list(_live_writers):
+        writer.close()
@@ -0,0 +1,370 @@
+import argparse
+import struct
+import sys
+from types import CodeType
+from typing import BinaryIO, Iterator
+from .caller import describe_code
+from .enums import _LEVEL_NAMES
+from .formatter import compile_format, text_to_layout
+from .record import LogEntry
+from .timestamp import TimestampRenderer
+
+# layout of the files of LogFileSink.BINARY
+#   the file starts with MAGIC, followed by tagged blocks
+#   definitions: tag, id, payload length, payload
+#       NAME    payload is the logger name
+#       SITE    payload is "<file>\0<function>"
+#       LAYOUT  payload is "<layout text>\0<datetime format>"
+#   records: RECORD header followed by the raw utf-8 message
+# definitions are written once per file, before the first record
+#   which refers to them, every file can be decoded on its own
+MAGIC = b"UGLYBIN\x01"
+TAG_NAME = 1
+TAG_SITE = 2
+TAG_LAYOUT = 3
+TAG_RECORD = 4
+DEFINITION = struct.Struct("<BII")
+# tag, level, reserved, name id, site id, line, created (us), message size
+RECORD = struct.Struct("<BBHIIIqI")
+
+
+def _define(tag: int, ident: int, payload: str) -> bytes:
+    data = payload.encode("utf-8")
+    return DEFINITION.pack(tag, ident, len(data)) + data
+
+
+class BinaryEncoder:
+    """Packs LogEntry objects into binary blocks
+
+    Logger names, call sites and layouts are interned, a record only
+        carries their ids. The ids are valid for one file, a new
+        encoder is used for every file
+    """
+
+    __slots__ = ("_names", "_sites", "_layout", "definitions")
+
+    def __init__(self) -> None:
+        self._names: dict[str, int] = {}
+        # id(code) -> (site id, code), the code object is kept alive
+        #   so that its id is not reused
+        self._sites: dict[int, tuple[int, CodeType]] = {}
+        self._layout: tuple[str, str] | None = None
+        # the definition blocks are collected here as well if it is
+        #   a list, see uglylogger.index
+        self.definitions: list[bytes] | None = None
+
+    def encode(
+        self,
+        entries: list[LogEntry],
+        name: str,
+        layout: str,
+        datetime_format: str,
+    ) -> bytes:
+        """Packs the entries
+
+        Args:
+            entries (list[LogEntry]): Entries to pack
+            name (str): Name of the logger
+            layout (str): Layout text, see formatter.layout_to_text
+            datetime_format (str): strftime format of DATETIME
+
+        Returns:
+            bytes: Blocks to append to the file
+        """
+        parts: list[bytes] = []
+        definitions = self.definitions
+        if self._layout != (layout, datetime_format):
+            self._layout = (layout, datetime_format)
+            parts.append(
+                _define(TAG_LAYOUT, 0, f"{layout}\0{datetime_format}")
+            )
+            if definitions is not None:
+                definitions.append(parts[-1])
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = len(self._names) + 1
+            self._names[name] = name_id
+            parts.append(_define(TAG_NAME, name_id, name))
+            if definitions is not None:
+                definitions.append(parts[-1])
+        sites = self._sites
+        pack = RECORD.pack
+        for entry in entries:
+            code = entry.code
+            site_id = 0
+            if code is not None:
+                site = sites.get(id(code))
+                if site is None:
+                    site_id = len(sites) + 1
+                    sites[id(code)] = (site_id, code)
+                    file, function = describe_code(code)
+                    parts.append(
+                        _define(TAG_SITE, site_id, f"{file}\0{function}")
+                    )
+                    if definitions is not None:
+                        definitions.append(parts[-1])
+                else:
+                    site_id = site[0]
+            msg = entry.msg.encode("utf-8")
+            parts.append(
+                pack(
+                    TAG_RECORD,
+                    entry.level,
+                    0,
+                    name_id,
+                    site_id,
+                    entry.line,
+                    round(entry.created * 1e6),
+                    len(msg),
+                )
+            )
+            parts.append(msg)
+        return b"".join(parts)
+
+
+class BinaryRecord:
+    """A decoded record of a binary log file"""
+
+    __slots__ = (
+        "name",
+        "level",
+        "created",
+        "file",
+        "line",
+        "function",
+        "msg",
+        "layout",
+        "datetime_format",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        level: int,
+        created: float,
+        file: str,
+        line: int,
+        function: str,
+        msg: str,
+        layout: str,
+        datetime_format: str,
+    ) -> None:
+        self.name = name
+        self.level = level
+        self.created = created
+        self.file = file
+        self.line = line
+        self.function = function
+        self.msg = msg
+        # layout of the Logger when the record was written
+        self.layout = layout
+        self.datetime_format = datetime_format
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes | None:
+    data = stream.read(size)
+    return data if len(data) == size else None
+
+
+class BinaryDecoder:
+    """Decoding state of a binary log file, the definitions read so far"""
+
+    def __init__(self) -> None:
+        self._names: dict[int, str] = {}
+        self._sites: dict[int, tuple[str, str]] = {0: ("", "")}
+        self._layout = ""
+        self._datetime_format = ""
+
+    def define(self, data: bytes) -> None:
+        """Applies a definition block
+
+        Args:
+            data (bytes): The whole block, header and payload
+
+        Raises:
+            ValueError: If it is not a definition block
+        """
+        tag, ident, size = DEFINITION.unpack_from(data)
+        payload = data[-size:].decode("utf-8", "replace") if size else ""
+        if tag == TAG_NAME:
+            self._names[ident] = payload
+        elif tag == TAG_SITE:
+            file, _, function = payload.partition("\0")
+            self._sites[ident] = (file, function)
+        elif tag == TAG_LAYOUT:
+            layout, _, datetime_format = payload.partition("\0")
+            self._layout = layout
+            self._datetime_format = datetime_format
+        else:
+            raise ValueError(f"unknown block {tag}")
+
+    def read(
+        self, stream: BinaryIO, end: int | None = None
+    ) -> Iterator[tuple[int, int, BinaryRecord | bytes]]:
+        """Decodes the blocks from the position of the stream
+
+        A truncated block at the end, e.g. after a crash, is ignored.
+            The definitions are applied before they are yielded
+
+        Args:
+            stream (BinaryIO): File positioned at the start of a block
+            end (int | None, optional): Offset to stop at.
+                Defaults to None (the end of the file).
+
+        Yields:
+            tuple[int, int, BinaryRecord | bytes]: Offset and size of
+                the block, the record or the definition block
+        """
+        offset = stream.tell()
+        while end is None or offset < end:
+            tag = stream.read(1)
+            if not tag:
+                return
+            if tag[0] == TAG_RECORD:
+                rest = _read_exact(stream, RECORD.size - 1)
+                if rest is None:
+                    return
+                _, level, _, name_id, site_id, line, created, size = (
+                    RECORD.unpack(tag + rest)
+                )
+                msg = _read_exact(stream, size)
+                if msg is None:
+                    return
+                file, function = self._sites.get(site_id, ("", ""))
+                record = BinaryRecord(
+                    self._names.get(name_id, ""),
+                    level,
+                    created / 1e6,
+                    file,
+                    line if site_id else 0,
+                    function,
+                    msg.decode("utf-8", "replace"),
+                    self._layout,
+                    self._datetime_format,
+                )
+                yield offset, RECORD.size + size, record
+                offset += RECORD.size + size
+                continue
+            rest = _read_exact(stream, DEFINITION.size - 1)
+            if rest is None:
+                return
+            _, _, size = DEFINITION.unpack(tag + rest)
+            payload = _read_exact(stream, size)
+            if payload is None:
+                return
+            data = tag + rest + payload
+            self.define(data)
+            yield offset, len(data), data
+            offset += len(data)
+
+
+def read_records(path: str) -> Iterator[BinaryRecord]:
+    """Decodes a binary log file
+
+    A truncated block at the end, e.g. after a crash, is ignored
+
+    Args:
+        path (str): Path to the file
+
+    Raises:
+        ValueError: If it is not a binary log file
+
+    Yields:
+        BinaryRecord: The records in the order of the file
+    """
+    with open(path, "rb") as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not an uglylogger binary file")
+        for _, _, item in BinaryDecoder().read(stream):
+            if isinstance(item, BinaryRecord):
+                yield item
+
+
+class RecordRenderer:
+    """Renders decoded records to text"""
+
+    def __init__(
+        self, layout: list | None = None, datetime_format: str | None = None
+    ) -> None:
+        """Creates the renderer
+
+        Args:
+            layout (list | None, optional): set_format() layout. Defaults
+                to None (the layout of the Logger when the record was
+                written).
+            datetime_format (str | None, optional): strftime format.
+                Defaults to None (the format of the Logger).
+        """
+        self._fixed = None if layout is None else compile_format(layout)
+        self._compiled = self._fixed
+        self._datetime_format = datetime_format
+        self._renderers: dict[str, TimestampRenderer] = {}
+
+    def render(self, record: BinaryRecord) -> str:
+        """Renders a record, without new line"""
+        current = self._fixed
+        if current is None:
+            current = self._compiled
+            if current is None or current.text != record.layout:
+                current = compile_format(text_to_layout(record.layout))
+                self._compiled = current
+        fmt = self._datetime_format or record.datetime_format
+        renderer = self._renderers.get(fmt)
+        if renderer is None:
+            renderer = self._renderers[fmt] = TimestampRenderer(fmt)
+        return current.render(
+            record.name,
+            _LEVEL_NAMES.get(record.level, str(record.level)),
+            renderer.render(record.created) if current.uses_datetime else "",
+            record.msg,
+            record.file,
+            record.line if record.file else "",
+            record.function,
+        )
+
+
+def render_records(
+    path: str,
+    layout: list | None = None,
+    datetime_format: str | None = None,
+) -> Iterator[str]:
+    """Renders a binary log file to text
+
+    Args:
+        path (str): Path to the file
+        layout (list | None, optional): set_format() layout. Defaults to
+            None (the layout of the Logger when the record was written).
+        datetime_format (str | None, optional): strftime format.
+            Defaults to None (the format of the Logger).
+
+    Yields:
+        str: The rendered records, without new line
+    """
+    renderer = RecordRenderer(layout, datetime_format)
+    for record in read_records(path):
+        yield renderer.render(record)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m uglylogger binary",
+        description="Renders uglylogger binary log files to text",
+    )
+    parser.add_argument("files", nargs="+")
+    parser.add_argument(
+        "--format",
+        help='layout, e.g. "[{LEVEL}] {MESSAGE}", '
+        "defaults to the layout of the Logger",
+    )
+    parser.add_argument(
+        "--datetime-format",
+        help="strftime format, defaults to the format of the Logger",
+    )
+    args = parser.parse_args(argv)
+    layout = None if args.format is None else text_to_layout(args.format)
+    output = sys.stdout
+    for path in args.files:
+        for line in render_records(path, layout, args.datetime_format):
+            output.write(line + "\n")
+    output.flush()
+    return 0
@@ -0,0 +1,141 @@
+import os
+import sys
+from types import CodeType, FrameType, FunctionType, ModuleType
+from typing import Any, Tuple
+
+# ids of the code objects which belong to uglylogger itself
+# the code objects are kept alive in _internal_code_refs,
+#   so an id can never be reused by a foreign code object
+_internal_codes: set[int] = set()
+_internal_code_refs: list[CodeType] = []
+
+# id(code) -> (code, basename, function name)
+# holding the code object keeps its id unique for the process lifetime
+_site_cache: dict[int, Tuple[CodeType, str, str]] = {}
+
+
+def _register_code(code: CodeType) -> None:
+    if id(code) in _internal_codes:
+        return
+    _internal_codes.add(id(code))
+    _internal_code_refs.append(code)
+    # nested functions, lambdas and comprehensions
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _register_code(const)
+
+
+def register_internal(*objs: Any) -> None:
+    """Registers objects whose frames are skipped while resolving the caller
+
+    Args:
+        *objs (Any): functions, methods, classes or modules.
+            Classes and modules are registered recursively,
+            modules only with the objects defined in themselves
+    """
+    for obj in objs:
+        if isinstance(obj, CodeType):
+            _register_code(obj)
+        elif isinstance(obj, (staticmethod, classmethod)):
+            register_internal(obj.__func__)
+        elif isinstance(obj, property):
+            register_internal(
+                *[f for f in (obj.fget, obj.fset, obj.fdel) if f is not None]
+            )
+        elif isinstance(obj, FunctionType):
+            _register_code(obj.__code__)
+        elif isinstance(obj, type):
+            for value in vars(obj).values():
+                if isinstance(
+                    value, (FunctionType, staticmethod, classmethod, property)
+                ):
+                    register_internal(value)
+                elif isinstance(value, type):
+                    if value.__module__ == obj.__module__:
+                        register_internal(value)
+        elif isinstance(obj, ModuleType):
+            for value in vars(obj).values():
+                if not isinstance(value, (FunctionType, type)):
+                    continue
+                if value.__module__ == obj.__name__:
+                    register_internal(value)
+
+
+def is_internal(code: CodeType) -> bool:
+    """Checks if the code object belongs to a registered internal object
+
+    Args:
+        code (CodeType): Code object of a frame
+
+    Returns:
+        bool: True if frames of the code are skipped
+    """
+    return id(code) in _internal_codes
+
+
+def find_call_site(depth: int = 0) -> Tuple[CodeType | None, int]:
+    """Finds the first frame outside of uglylogger
+
+    Walks the frames via f_back, no FrameInfo is built
+        and no source file is read
+
+    Args:
+        depth (int, optional): Number of frames to skip unconditionally,
+            0 starts from the caller of this function. Defaults to 0.
+
+    Returns:
+        Tuple[CodeType | None, int]: Code object and the line number
+            of the call site, (None, 0) if there is none
+    """
+    internal = _internal_codes
+    try:
+        frame: FrameType | None = sys._getframe(depth + 1)
+    except ValueError:  # pragma: no cover
+        return (None, 0)
+    while frame is not None:
+        code = frame.f_code
+        if id(code) not in internal:
+            return (code, frame.f_lineno)
+        frame = frame.f_back
+    return (None, 0)  # pragma: no cover
+
+
+def describe_code(code: CodeType) -> Tuple[str, str]:
+    """Returns the file basename and the function name of a code object
+
+    The result is cached per code object
+
+    Args:
+        code (CodeType): Code object of the call site
+
+    Returns:
+        Tuple[str, str]: (basename of the file, function name)
+    """
+    cached = _site_cache.get(id(code))
+    if cached is None:
+        cached = (code, os.path.basename(code.co_filename), code.co_name)
+        _site_cache[id(code)] = cached
+    return (cached[1], cached[2])
+
+
+def get_file_line_func(
+    depth: int = 0,
+) -> Tuple[str | None, str | None, int | None]:
+    """Resolves the call site as (file, function, line)
+
+    Args:
+        depth (int, optional): Number of frames to skip unconditionally.
+            Defaults to 0.
+
+    Returns:
+        Tuple[str | None, str | None, int | None]: basename of the file,
+            function name and the line number, all None if not found
+    """
+    code, line = find_call_site(depth + 1)
+    if code is None:
+        return (None, None, None)  # pragma: no cover
+    fil, fun = describe_code(code)
+    return (fil, fun, line)
+
+
+register_internal(sys.modules[__name__])
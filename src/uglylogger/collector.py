@@ -0,0 +1,648 @@
+import hashlib
+import json
+import logging
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (
+    Client,
+    Connection,
+    Listener,
+    answer_challenge,
+    deliver_challenge,
+)
+from typing import Any
+from .enums import (
+    LogCompression,
+    LogFileFormat,
+    LogFileSink,
+    LogLevel,
+    LogMoveOption,
+    LogRotateOption,
+)
+from .handlers import (
+    KEEPING_MOVE_OPTIONS,
+    FileHandler,
+    _report_error,
+    archive_file,
+    create_file_handler,
+    move_file,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+# multiprocess mode: every process sends its rendered records through its
+#   own connection to a single collector process which owns the file,
+#   its rotation and move(). The collector of a file is found by an
+#   address derived from the path, the first process which does not find
+#   one starts it in a new interpreter, see _COMMAND. The socket, its
+#   lock and the authentication key of the connections are kept in a
+#   directory only the user can access, see runtime_directory
+# messages are tuples, the first item is the command, see _encode
+WRITE = 1  # (WRITE, text, level), no reply
+FLUSH = 2  # (FLUSH,), replies the path of the file
+ROTATE = 3  # (ROTATE,), replies the path of the file
+MOVE = 4  # (MOVE, new file, option, compression), replies the new path
+STOP = 5  # (STOP,), replies the path of the file, the collector exits
+
+# bytes of the random authentication key of a collector
+_KEY_SIZE = 32
+
+# not "-m uglylogger.collector", the package imports this module
+#   before it would be executed as __main__
+_COMMAND = (
+    "import sys; from uglylogger.collector import main; sys.exit(main())"
+)
+
+# first line of the collector on stdout
+_READY = b"ready\n"
+_BUSY = b"busy\n"
+
+# enum types of the file options, they are sent to the collector as JSON
+_OPTION_TYPES: dict = {
+    "file_sink": LogFileSink,
+    "file_format": LogFileFormat,
+    "flush_level": LogLevel,
+    "rotate_option": LogRotateOption,
+    "compression": LogCompression,
+}
+
+
+def _uid() -> int:
+    return getattr(os, "getuid", lambda: 0)()
+
+
+def runtime_directory() -> str:
+    """Returns the private directory of the collectors of the user
+
+    "$XDG_RUNTIME_DIR/uglylogger" if the variable is set, else
+        "uglylogger-<uid>" in the temp directory. It is created with
+        mode 0700 if it does not exist
+
+    Raises:
+        PermissionError: If the directory is not a directory of the
+            user which only the user can access
+
+    Returns:
+        str: Path to the directory
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isabs(base):
+        path = os.path.join(base, "uglylogger")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"uglylogger-{_uid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    if sys.platform == "win32":  # pragma: no cover
+        return path
+    # lstat, a symbolic link to a directory of the user is refused too
+    info = os.lstat(path)
+    private = stat.S_ISDIR(info.st_mode) and not info.st_mode & 0o077
+    if not private or info.st_uid != _uid():
+        raise PermissionError(f"{path} is not a private directory")
+    return path
+
+
+def collector_address(path: str) -> str:
+    """Returns the address of the collector of a log file
+
+    Every process of the same user derives the same address
+        for the same file
+
+    Args:
+        path (str): Path to the log file
+
+    Returns:
+        str: Unix socket path in runtime_directory(), or named pipe
+            on Windows
+    """
+    key = f"{_uid()}:{os.path.abspath(path)}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    if sys.platform == "win32":  # pragma: no cover
+        return rf"\\.\pipe\uglylogger-{digest}"
+    return os.path.join(runtime_directory(), f"{digest}.sock")
+
+
+def _key_path(address: str) -> str:
+    # next to the socket, a named pipe has no directory
+    name = os.path.basename(address)
+    return os.path.join(runtime_directory(), f"{name}.key")
+
+
+def _read_key(address: str) -> bytes:
+    with open(_key_path(address), "rb") as f:
+        return f.read()
+
+
+def _write_key(address: str) -> bytes:
+    # a new key per collector, replaced at once for the clients
+    key = os.urandom(_KEY_SIZE)
+    path = _key_path(address)
+    temp = f"{path}.{os.getpid()}"
+    # left over by a crashed collector with the same pid
+    if os.path.exists(temp):
+        os.remove(temp)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_NOFOLLOW", 0)
+    fd = os.open(temp, flags, 0o600)
+    try:
+        os.write(fd, key)
+    finally:
+        os.close(fd)
+    os.replace(temp, path)
+    return key
+
+
+def _encode(message: tuple) -> bytes:
+    # command byte, the enum arguments as bytes and the utf-8 text:
+    #   WRITE: command, level, text
+    #   MOVE: command, option, compression, new file
+    command = message[0]
+    if command == WRITE:
+        return bytes((WRITE, message[2])) + message[1].encode("utf-8")
+    if command == MOVE:
+        head = bytes((MOVE, message[2], message[3]))
+        return head + message[1].encode("utf-8")
+    return bytes((command,))
+
+
+def _decode(data: bytes) -> tuple:
+    command = data[0]
+    if command == WRITE:
+        return (WRITE, str(memoryview(data)[2:], "utf-8"), data[1])
+    if command == MOVE:
+        return (
+            MOVE,
+            str(memoryview(data)[3:], "utf-8"),
+            LogMoveOption(data[1]),
+            LogCompression(data[2]),
+        )
+    return (command,)
+
+
+def _stop(process: subprocess.Popen) -> None:
+    # the collector exits when its stdin is closed
+    if process.stdin is not None:
+        process.stdin.close()
+    process.wait()
+
+
+class CollectorHandler(logging.Handler):
+    """File output of the multiprocess mode
+
+    Sends the rendered records to the collector process of the file,
+        which writes them with the file handler of the sink. A write is
+        a single message, records of different processes never tear
+
+    Every process uses its own connection, a forked child reconnects.
+        The collector runs until the process which started it closes
+        its handler. If the collector goes away, the next write starts
+        a new one
+    """
+
+    # seconds to wait until a collector accepts connections
+    CONNECT_TIMEOUT: float = 10.0
+
+    def __init__(self, filename: str, mode: str, options: dict) -> None:
+        """Connects to the collector of the file, starts it if needed
+
+        Args:
+            filename (str): Path to the log file
+            mode (str): "a" to append, "w" to truncate, only used
+                if the collector is started by this handler
+            options (dict): File options of the Logger, used by the
+                collector if it is started by this handler
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.address = collector_address(self.baseFilename)
+        self._mode = mode
+        self._options = options
+        self._pid = os.getpid()
+        self._process: subprocess.Popen | None = None
+        self._conn: Connection | None = None
+        self._closed = False
+        self._conn = self._connect()
+
+    @property
+    def owner(self) -> bool:
+        """True if this handler started the collector"""
+        return self._process is not None and self._pid == os.getpid()
+
+    def _start(self) -> subprocess.Popen | None:
+        env = dict(os.environ)
+        # the collector imports this package, wherever it was found
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        paths = [root] + [p for p in [env.get("PYTHONPATH")] if p]
+        env["PYTHONPATH"] = os.pathsep.join(paths)
+        process = subprocess.Popen(
+            [sys.executable, "-c", _COMMAND],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+        )
+        stdin, stdout = process.stdin, process.stdout
+        state = b""
+        if stdin is not None and stdout is not None:
+            settings = [self.address, self.baseFilename, self._mode]
+            stdin.write(_encode_settings(settings + [self._options]))
+            stdin.flush()
+            state = stdout.readline()
+            stdout.close()
+        if state == _READY:
+            return process
+        _stop(process)
+        if state != _BUSY:
+            raise OSError(f"collector of {self.baseFilename} did not start")
+        # another process is starting a collector for the same file
+        return None
+
+    def _client(self) -> Connection:
+        # the key is read again, a new collector has a new one
+        try:
+            key = _read_key(self.address)
+        except FileNotFoundError:
+            raise ConnectionRefusedError(self.address) from None
+        try:
+            return Client(self.address, authkey=key)
+        except AuthenticationError:
+            raise ConnectionRefusedError(self.address) from None
+
+    def _connect(self) -> Connection:
+        try:
+            return self._client()
+        except OSError:
+            pass
+        if not self.owner:
+            self._process = self._start()
+        deadline = time.monotonic() + self.CONNECT_TIMEOUT
+        while True:
+            try:
+                return self._client()
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def _connection(self) -> Connection:
+        # caller holds the handler lock
+        if self._pid != os.getpid():
+            # forked, the connection of the parent is not shared
+            self._pid = os.getpid()
+            self._conn = None
+            self._process = None
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def _send(self, message: tuple) -> Connection:
+        # caller holds the handler lock, reconnects once
+        #   if the collector went away
+        try:
+            conn = self._connection()
+            conn.send_bytes(_encode(message))
+        except (OSError, EOFError):
+            self._conn = None
+            conn = self._connection()
+            conn.send_bytes(_encode(message))
+        return conn
+
+    def _request(self, message: tuple) -> Any:
+        self.acquire()
+        try:
+            if self._closed:
+                return None
+            path = str(self._send(message).recv_bytes(), "utf-8")
+            self.baseFilename = path
+            return path
+        except Exception:  # pragma: no cover
+            _report_error()
+            return None
+        finally:
+            self.release()
+
+    def write(self, text: str, level: int = 0, span: Any = None) -> None:
+        """Sends rendered records to the collector
+
+        Args:
+            text (str): Rendered records, separated by new lines
+            level (int, optional): Highest level of the records.
+                Defaults to 0.
+            span (Any, optional): Ignored, the collector keeps no
+                index. Defaults to None.
+        """
+        self.acquire()
+        try:
+            if not self._closed:
+                self._send((WRITE, text, level))
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        """Waits until the collector has written the sent records"""
+        self._request((FLUSH,))
+
+    def rotate(self) -> None:
+        """Starts a new generation of the log file now"""
+        self._request((ROTATE,))
+
+    def move(
+        self, new_file: str, option: LogMoveOption, compression: LogCompression
+    ) -> str:
+        """Moves the log file of every process to a new destination
+
+        Args:
+            new_file (str): New log file
+            option (LogMoveOption): How to behave
+            compression (LogCompression): Compresses the old file
+                in the background if the option keeps it
+
+        Returns:
+            str: Absolute path of the log file
+        """
+        path = self._request(
+            (MOVE, os.path.abspath(new_file), option, compression)
+        )
+        return self.baseFilename if path is None else path
+
+    def close(self) -> None:
+        """Disconnects, stops the collector if this handler started it"""
+        self.acquire()
+        try:
+            conn = self._conn
+            if self._closed or conn is None or self._pid != os.getpid():
+                return
+            self._closed = True
+            self._conn = None
+            process = self._process
+            self._process = None
+            try:
+                if process is not None:
+                    conn.send_bytes(_encode((STOP,)))
+                    conn.recv_bytes()
+            except (OSError, EOFError):  # pragma: no cover
+                pass
+            conn.close()
+            if process is not None:
+                _stop(process)
+        finally:
+            self.release()
+            super().close()
+
+
+class _Collector:
+    """File output of the collector process, shared by the clients"""
+
+    # seconds between the checks of a waiting client thread for a stop
+    POLL_INTERVAL: float = 0.1
+    # seconds the records sent before a stop are still written
+    DRAIN_TIMEOUT: float = 5.0
+
+    def __init__(
+        self, path: str, mode: str, options: dict, key: bytes
+    ) -> None:
+        self.path = path
+        self.options = options
+        self.key = key
+        self.handler: FileHandler = create_file_handler(path, mode, options)
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stopped = threading.Event()
+        self.clients: list[threading.Thread] = []
+        self.deadline = 0.0
+        self.lost = 0
+
+    def serve(self, conn: Connection) -> None:
+        # one thread per client, the records of a client stay in order
+        with conn:
+            try:
+                deliver_challenge(conn, self.key)
+                answer_challenge(conn, self.key)
+            except (AuthenticationError, OSError, EOFError):
+                return
+            while self._wait(conn):
+                try:
+                    message = _decode(conn.recv_bytes())
+                except (OSError, EOFError):
+                    return
+                reply = self.handle(message)
+                if message[0] == WRITE:
+                    continue
+                try:
+                    conn.send_bytes(reply.encode("utf-8"))
+                except OSError:  # pragma: no cover
+                    return
+                if message[0] == STOP:
+                    self.stop()
+                    return
+
+    def _wait(self, conn: Connection) -> bool:
+        # True if a message is ready, after a stop only the messages
+        #   which were already sent are read
+        while not self.stopped.is_set():
+            if conn.poll(self.POLL_INTERVAL):
+                return True
+        return time.monotonic() < self.deadline and conn.poll(0)
+
+    def stop(self) -> None:
+        """Stops the clients, they write what they have already received"""
+        if not self.stopped.is_set():
+            self.deadline = time.monotonic() + self.DRAIN_TIMEOUT
+            self.stopped.set()
+
+    def handle(self, message: tuple) -> str:
+        command = message[0]
+        with self.lock:
+            if self.closed:
+                if command == WRITE:
+                    self.lost += 1
+                return self.path
+            handler = self.handler
+            if command == WRITE:
+                handler.write(message[1], message[2])
+            elif command == FLUSH:
+                handler.flush()
+            elif command == ROTATE:
+                handler.rotate()
+            elif command == MOVE:
+                self._move(message[1], message[2], message[3])
+            return self.path
+
+    def _move(
+        self, new_file: str, option: LogMoveOption, compression: LogCompression
+    ) -> None:
+        # caller holds the lock
+        old_file = self.path
+        self.handler.close()
+        try:
+            append = move_file(old_file, new_file, option)
+        except Exception:  # pragma: no cover
+            _report_error()
+            self.handler = create_file_handler(old_file, "a", self.options)
+            return
+        self.handler = create_file_handler(
+            new_file, "a" if append else "w", self.options
+        )
+        self.path = new_file
+        if option not in KEEPING_MOVE_OPTIONS or new_file == old_file:
+            return
+        if os.path.exists(old_file):
+            archive_file(old_file, compression)
+
+    def close(self) -> None:
+        # the clients write the records they have received until then
+        for client in list(self.clients):
+            client.join(self.DRAIN_TIMEOUT)
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.handler.close()
+        if self.lost:  # pragma: no cover
+            sys.stderr.write(
+                f"uglylogger: {self.lost} writes sent to the stopped "
+                f"collector of {self.path} were dropped\n"
+            )
+
+
+def _encode_settings(settings: list) -> bytes:
+    # a JSON line, the enums of the options are sent as their values
+    return json.dumps(settings).encode("utf-8") + b"\n"
+
+
+def _decode_settings(line: bytes) -> list:
+    settings = json.loads(line)
+    options = settings[-1]
+    for key, kind in _OPTION_TYPES.items():
+        if options.get(key) is not None:
+            options[key] = kind(options[key])
+    return settings
+
+
+def _lock(address: str) -> int | None:
+    # held while the collector runs, a single collector per address
+    path = address + ".lock"
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0)
+    while True:
+        fd = os.open(path, flags, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        # the previous collector removes the file before it unlocks it,
+        #   a lock on a removed file does not count
+        try:
+            if os.path.samestat(os.fstat(fd), os.stat(path)):
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def _unlock(address: str, fd: int) -> None:
+    os.remove(address + ".lock")
+    os.close(fd)
+
+
+def _listen(address: str) -> Listener | None:
+    if fcntl is None:  # pragma: no cover
+        try:
+            return Listener(address)
+        except OSError:
+            return None
+    # the lock is held, an existing socket in the private directory
+    #   is left over by a crash
+    if os.path.exists(address):
+        os.remove(address)
+    # the socket is only accessible by the user
+    umask = os.umask(0o077)
+    try:
+        return Listener(address)
+    finally:
+        os.umask(umask)
+
+
+def _accept(listener: Listener, collector: _Collector) -> None:
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:  # pragma: no cover
+            return
+        # the connection is authenticated by its own thread
+        client = threading.Thread(
+            target=collector.serve,
+            args=(conn,),
+            name="uglylogger-collector-client",
+            daemon=True,
+        )
+        client.start()
+        clients = [t for t in collector.clients if t.is_alive()]
+        collector.clients = clients + [client]
+
+
+def _wait_for_eof(fd: int, collector: _Collector) -> None:
+    # every process which started the collector holds the other end,
+    #   read from the fd, a buffered stream would still be locked by
+    #   this thread at interpreter shutdown
+    while os.read(fd, 4096):
+        pass
+    collector.stop()
+
+
+def main() -> int:
+    """Runs the collector, see CollectorHandler
+
+    Reads [address, path, mode, options] as a JSON line from stdin,
+        writes "ready" or "busy" to stdout and runs until stdin is
+        closed or the process which started it sends STOP. The records
+        the other clients sent until then are still written
+
+    Returns:
+        int: Exit code
+    """
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    address, path, mode, options = _decode_settings(stdin.readline())
+    lock = None if fcntl is None else _lock(address)
+    listener = None
+    if fcntl is None or lock is not None:
+        listener = _listen(address)
+    if listener is None:
+        stdout.write(_BUSY)
+        stdout.flush()
+        return 0
+    key = _write_key(address)
+    collector = _Collector(path, mode, options, key)
+    threading.Thread(
+        target=_accept,
+        args=(listener, collector),
+        name="uglylogger-collector-accept",
+        daemon=True,
+    ).start()
+    threading.Thread(
+        target=_wait_for_eof,
+        args=(stdin.fileno(), collector),
+        name="uglylogger-collector-owner",
+        daemon=True,
+    ).start()
+    stdout.write(_READY)
+    stdout.flush()
+    collector.stopped.wait()
+    # removes the socket as well, new clients wait for the next one
+    listener.close()
+    collector.close()
+    os.remove(_key_path(address))
+    if lock is not None:
+        _unlock(address, lock)
+    return 0
@@ -0,0 +1,98 @@
+import gzip
+import os
+import shutil
+from typing import BinaryIO
+from .enums import LogCompression
+
+try:
+    import zstandard  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment, unused-ignore]
+
+# suffixes of the compressed archives, see strip_suffix
+ARCHIVE_SUFFIXES: tuple[str, ...] = (".gz", ".zst")
+
+_COPY_CHUNK: int = 1024 * 1024
+
+
+def resolve(compression: LogCompression) -> LogCompression:
+    """Returns the compression which is actually available
+
+    Args:
+        compression (LogCompression): Requested compression
+
+    Returns:
+        LogCompression: GZIP instead of ZSTD without zstandard
+    """
+    if compression == LogCompression.ZSTD and zstandard is None:
+        return LogCompression.GZIP  # pragma: no cover
+    return compression
+
+
+def strip_suffix(path: str) -> str:
+    """Returns the path without the archive suffix"""
+    for suffix in ARCHIVE_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def compress_file(path: str, compression: LogCompression) -> str:
+    """Compresses a closed file next to it and deletes the original
+
+    The archive is written to a temporary file first and renamed,
+        a half written archive never has the final name
+
+    Args:
+        path (str): File to compress
+        compression (LogCompression): Compression to use
+
+    Returns:
+        str: Path of the archive, path itself for LogCompression.NONE
+    """
+    compression = resolve(compression)
+    if compression == LogCompression.NONE:
+        return path
+    if compression == LogCompression.ZSTD:
+        target = path + ".zst"
+    else:
+        target = path + ".gz"
+    temp = target + ".tmp"
+    try:
+        with open(path, "rb") as source:
+            if compression == LogCompression.ZSTD:
+                with open(temp, "wb") as destination:
+                    zstandard.ZstdCompressor().copy_stream(source, destination)
+            else:
+                with gzip.open(temp, "wb", compresslevel=6) as destination:
+                    shutil.copyfileobj(source, destination, _COPY_CHUNK)
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.remove(path)
+    return target
+
+
+def open_archive(path: str) -> BinaryIO:
+    """Opens a log file or an archive of it for reading
+
+    Args:
+        path (str): Path to the file, ".gz" and ".zst" are decompressed
+
+    Raises:
+        ValueError: A ".zst" archive without the zstandard package
+
+    Returns:
+        BinaryIO: The decompressed bytes
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if path.endswith(".zst"):
+        if zstandard is None:  # pragma: no cover
+            raise ValueError("reading .zst archives needs zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), closefd=True
+        )
+    return open(path, "rb")
@@ -0,0 +1,181 @@
+import threading
+import time
+import weakref
+from typing import Any
+from .enums import _CONSOLE, _FILE
+from .handlers import _report_error
+from .record import LogEntry
+
+
+class _Run:
+    """Repeats of the last record of an output"""
+
+    __slots__ = ("level", "msg", "since", "count", "last")
+
+    def __init__(self, entry: LogEntry) -> None:
+        self.level = entry.level
+        self.msg = entry.msg
+        self.since = entry.created
+        self.count = 0
+        self.last = entry
+
+
+class LogDedup:
+    """Collapses repeats of the same record per output
+
+    A record with the level and the message of the previous record of
+        an output is not written to that output, it is counted.
+        A "last message repeated N times" record is written when
+        another record ends the run, when the window of the run is over
+        or when the logger is released. Only the last record of every
+        output is kept
+
+    The runs whose window is over are ended by a background thread
+        every EXPIRE_TICK seconds, see register_expiry
+    """
+
+    EXPIRE_TICK: float = 0.1
+
+    def __init__(self, window: float) -> None:
+        """Creates the stage
+
+        Args:
+            window (float): Seconds after the first record of a run,
+                a repeat after it writes the count and starts a new run
+
+        Raises:
+            ValueError: window is not positive
+        """
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self._window = window
+        self._runs: dict[int, _Run] = {}
+
+    def apply(
+        self, entries: list[LogEntry], file_level: int, console_level: int
+    ) -> list[LogEntry]:
+        """Filters a batch of entries, called under the io lock
+
+        Args:
+            entries (list[LogEntry]): Entries in the order of the calls
+            file_level (int): Level gate of the file output
+            console_level (int): Level gate of the console output
+
+        Returns:
+            list[LogEntry]: Entries to write, repeats have the outputs
+                they are counted on cleared, the counts are inserted
+                before the entry which ended their run
+        """
+        result: list[LogEntry] = []
+        runs = self._runs
+        window = self._window
+        gates = ((_FILE, file_level), (_CONSOLE, console_level))
+        for entry in entries:
+            level = entry.level
+            for output, gate in gates:
+                if not entry.outputs & output or level < gate:
+                    continue
+                run = runs.get(output)
+                if run is not None:
+                    if _repeats(run, entry, window):
+                        run.count += 1
+                        run.last = entry
+                        entry.outputs &= ~output
+                        continue
+                    if run.count:
+                        result.append(_repeated(run, output))
+                runs[output] = _Run(entry)
+            if entry.outputs:
+                result.append(entry)
+        return result
+
+    def expire(self, now: float) -> list[LogEntry]:
+        """Ends the runs whose window is over, called under the io lock
+
+        Args:
+            now (float): Current time of the clock of the records
+
+        Returns:
+            list[LogEntry]: The counts of the ended runs with repeats
+        """
+        runs = self._runs
+        if not runs:
+            return []
+        window = self._window
+        result: list[LogEntry] = []
+        for output, run in list(runs.items()):
+            if now - run.since >= window:
+                del runs[output]
+                if run.count:
+                    result.append(_repeated(run, output))
+        return result
+
+    def drain(self) -> list[LogEntry]:
+        """Ends every run
+
+        Returns:
+            list[LogEntry]: The counts of the runs with repeats
+        """
+        result = [
+            _repeated(run, output)
+            for output, run in self._runs.items()
+            if run.count
+        ]
+        self._runs.clear()
+        return result
+
+
+def _repeats(run: _Run, entry: LogEntry, window: float) -> bool:
+    if run.msg != entry.msg or run.level != entry.level:
+        return False
+    return entry.created - run.since < window
+
+
+def _repeated(run: _Run, output: int) -> LogEntry:
+    last = run.last
+    return LogEntry(
+        run.level,
+        f"last message repeated {run.count} times",
+        last.created,
+        last.color,
+        output,
+        last.code,
+        last.line,
+        compiled=last.compiled,
+    )
+
+
+# loggers whose runs are ended when the window is over, they have an
+#   _expire_repeats() method
+_expiring: "weakref.WeakSet[Any]" = weakref.WeakSet()
+_expiry_lock = threading.Lock()
+_expiry_thread: threading.Thread | None = None
+
+
+def _expire_loop() -> None:
+    while True:
+        time.sleep(LogDedup.EXPIRE_TICK)
+        for owner in list(_expiring):
+            try:
+                owner._expire_repeats()
+            except Exception:  # pragma: no cover
+                _report_error()
+
+
+def register_expiry(owner: Any) -> None:
+    """Calls owner._expire_repeats() every LogDedup.EXPIRE_TICK seconds
+
+    The owner is only referenced weakly
+    """
+    global _expiry_thread
+    _expiring.add(owner)
+    with _expiry_lock:
+        if _expiry_thread is None:
+            _expiry_thread = threading.Thread(
+                target=_expire_loop, name="uglylogger-dedup", daemon=True
+            )
+            _expiry_thread.start()
+
+
+def unregister_expiry(owner: Any) -> None:
+    _expiring.discard(owner)
@@ -0,0 +1,298 @@
+from enum import IntEnum, Flag, auto
+
+
+class LogColorMode(IntEnum):
+    """Enumerate LogColorMode"""
+
+    """Colored output if possible"""
+    COLORED = (1,)
+
+    """Non-colored output"""
+    MONO = 2
+
+
+class LogColor(IntEnum):
+    """LogColor"""
+
+    BLACK = (0,)
+    RED = (1,)
+    GREEN = (2,)
+    YELLOW = (3,)
+    BLUE = (4,)
+    MAGENTA = (5,)
+    CYAN = (6,)
+    WHITE = 7
+
+
+class LogOutput(Flag):
+    """Log Output Target"""
+
+    """No output will be generated"""
+    NONE = 0
+
+    """Log will be displayed in terminal"""
+    CONSOLE = auto()
+
+    """Log will be written into the file"""
+    FILE = auto()
+
+    """Log will be displayed in terminal and
+        also will be written into the file"""
+    ALL = CONSOLE | FILE
+
+
+# plain int values of the LogOutput flags, for cheap bit tests
+_CONSOLE: int = LogOutput.CONSOLE.value
+_FILE: int = LogOutput.FILE.value
+# internal bit of the records of the flight recorder, they are written
+#   to the file whatever its level is
+_REPLAY: int = 4
+
+
+class LogLevel(IntEnum):
+    """LogLevel"""
+
+    CRITICAL = (50,)
+    ERROR = (40,)
+    WARNING = (30,)
+    INFO = (20,)
+    DEBUG = 10
+
+    def __str__(self) -> str:
+        """String representation of the LogLevel
+
+        Returns:
+            str: String representation of the LogLevel
+        """
+        match self.value:
+            case LogLevel.CRITICAL:
+                return "CRITICAL"
+            case LogLevel.ERROR:
+                return "ERROR"
+            case LogLevel.WARNING:
+                return "WARNING"
+            case LogLevel.INFO:
+                return "INFO"
+            case LogLevel.DEBUG:
+                return "DEBUG"
+        return ""  # pragma: no cover
+
+
+# plain int thresholds of the LogLevel values, used by the level gates
+_DEBUG: int = int(LogLevel.DEBUG)
+_INFO: int = int(LogLevel.INFO)
+_WARNING: int = int(LogLevel.WARNING)
+_ERROR: int = int(LogLevel.ERROR)
+_CRITICAL: int = int(LogLevel.CRITICAL)
+# threshold of an output which does not exist, filters every level
+_DISABLED: int = _CRITICAL + 1
+# level names by the plain int value
+_LEVEL_NAMES: dict[int, str] = {
+    _DEBUG: "DEBUG",
+    _INFO: "INFO",
+    _WARNING: "WARNING",
+    _ERROR: "ERROR",
+    _CRITICAL: "CRITICAL",
+}
+
+
+class LogFormatBlock(Flag):
+    """Element of the log format"""
+
+    """Prints Logger name"""
+    NAME = auto()
+
+    """Prints LogLevel"""
+    LEVEL = auto()
+
+    """Prints DateTime"""
+    DATETIME = auto()
+
+    """Prints the messae"""
+    MESSAGE = auto()
+
+    """Prints the sender file name"""
+    FILE = auto()
+
+    """Prints the line number of the log call"""
+    LINE = auto()
+
+    """Prints the sender function nam"""
+    FUNCTION = auto()
+
+
+class LogMoveOption(IntEnum):
+    """LogMoveOption"""
+
+    """Moves the log file to the destination
+       Deletes if there's already a file in the destination
+       Appends to the moved file
+       Old file is obviously deleted
+    """
+    MOVE_AND_APPEND = (1,)
+
+    """Copies the log file to the destination
+       Deletes if there's already a file in the destination
+       Appends to the moved file
+       Old file is obviously remains
+    """
+    COPY_AND_APPEND = (2,)
+
+    """Keeps the old log file
+       Appends if there's already a file in the destination
+       Creates a new file if not
+    """
+    KEEP_AND_APPEND = (3,)
+
+    """Keeps the old log file
+       Creates a new file in the destination
+    """
+    KEEP_AND_INIT = (4,)
+
+    """Deletes the old log file
+       Creates a new file in the destination
+    """
+    DELETE_AND_INIT = (5,)
+
+
+class LogOverflowPolicy(IntEnum):
+    """LogOverflowPolicy"""
+
+    """Waits until the writer makes room in the queue"""
+    BLOCK = (1,)
+
+    """Drops the oldest queued record to make room for the new one"""
+    DROP_OLDEST = (2,)
+
+    """Drops the new record, the queue stays untouched"""
+    DROP_NEW = 3
+
+
+class LogFileSink(IntEnum):
+    """LogFileSink"""
+
+    """Writes and flushes every record, like logging.FileHandler"""
+    STREAM = (1,)
+
+    """Collects the records in a memory buffer and writes them
+       in batches, see BufferedFileHandler
+    """
+    BUFFERED = (2,)
+
+    """Copies the records into a preallocated memory mapped file,
+       see MmapFileHandler and uglylogger.mmapfile
+    """
+    MMAP = (3,)
+
+    """Writes packed binary records instead of text, buffered like
+       BUFFERED, see uglylogger.binary for the decoder
+    """
+    BINARY = 4
+
+
+class LogClock(IntEnum):
+    """LogClock"""
+
+    """System wall clock, time.time()"""
+    WALL = (1,)
+
+    """Wall clock time derived from the monotonic clock,
+       never goes backwards if the system clock is adjusted
+    """
+    MONOTONIC = (2,)
+
+    """Coarse system clock (CLOCK_REALTIME_COARSE) where available,
+       cheaper but with a resolution of a few milliseconds
+    """
+    COARSE = 3
+
+
+class LogRotateOption(IntEnum):
+    """LogRotateOption"""
+
+    """Renames the log file to "<file>.1", older generations are
+       shifted to "<file>.2" ... "<file>.<backup_count>"
+       The generation beyond backup_count is deleted
+    """
+    NUMBERED = (1,)
+
+    """Renames the log file to "<file>.<YYYYmmdd-HHMMSS>"
+       Only the newest backup_count generations are kept
+    """
+    TIMESTAMPED = (2,)
+
+    """Deletes the log file, no generation is kept
+    """
+    TRUNCATE = 3
+
+
+class LogCompression(IntEnum):
+    """LogCompression"""
+
+    """Retired log files are kept as they are"""
+    NONE = (0,)
+
+    """Retired log files are compressed to "<file>.gz" """
+    GZIP = (1,)
+
+    """Retired log files are compressed to "<file>.zst"
+       Falls back to GZIP if the zstandard package is not installed
+    """
+    ZSTD = 2
+
+
+class LogFileFormat(IntEnum):
+    """LogFileFormat"""
+
+    """Records are rendered with the layout of set_format()"""
+    TEXT = (1,)
+
+    """Records are JSON objects, one per line
+       Every LogFormatBlock of the layout is a key, literals are left out
+    """
+    JSONL = 2
+
+
+class LogSamplingPolicy(IntEnum):
+    """LogSamplingPolicy"""
+
+    """Keeps the first record of every n records"""
+    ONE_IN_N = (1,)
+
+    """Keeps up to rate records per second, with bursts of up to burst
+       records
+    """
+    TOKEN_BUCKET = (2,)
+
+    """Keeps the first n records of every period, suppresses the rest
+       until the period is over
+    """
+    FIRST_N = 3
+
+
+class LogSamplingKey(IntEnum):
+    """LogSamplingKey"""
+
+    """Records of the same level are similar"""
+    LEVEL = (1,)
+
+    """Records of the same call site (file:line) are similar"""
+    CALL_SITE = (2,)
+
+    """Records of the same message, before its arguments are applied,
+       are similar
+    """
+    MESSAGE = 3
+
+
+class LogProfileSort(IntEnum):
+    """LogProfileSort"""
+
+    """Call sites with the most records first"""
+    RECORDS = (1,)
+
+    """Call sites with the most bytes written first"""
+    BYTES = (2,)
+
+    """Call sites with the most time spent formatting first"""
+    FORMAT = 3
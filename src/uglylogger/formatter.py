@@ -0,0 +1,143 @@
+import string
+from typing import Callable
+from .enums import LogFormatBlock
+
+# argument names of the generated render functions, by block
+_BLOCK_ARGS: dict = {
+    LogFormatBlock.NAME: "name",
+    LogFormatBlock.LEVEL: "level",
+    LogFormatBlock.DATETIME: "datetime",
+    LogFormatBlock.MESSAGE: "message",
+    LogFormatBlock.FILE: "file",
+    LogFormatBlock.LINE: "line",
+    LogFormatBlock.FUNCTION: "function",
+}
+
+_SITE_BLOCKS = (
+    LogFormatBlock.FILE,
+    LogFormatBlock.LINE,
+    LogFormatBlock.FUNCTION,
+)
+
+RenderFunc = Callable[[str, str, str, str, str, object, str], str]
+
+
+class CompiledFormat:
+    """A set_format() layout compiled into a single render function
+
+    render(name, level, datetime, message, file, line, function)
+        builds the record with one f-string, arguments of the blocks
+        which are not in the layout are never read
+    """
+
+    __slots__ = (
+        "layout",
+        "render",
+        "blocks",
+        "uses_datetime",
+        "uses_site",
+        "text",
+    )
+
+    def __init__(self, layout: list) -> None:
+        self.layout = layout
+        self.blocks: tuple = tuple(
+            item for item in layout if item in _BLOCK_ARGS
+        )
+        self.uses_datetime: bool = LogFormatBlock.DATETIME in self.blocks
+        self.uses_site: bool = any(b in self.blocks for b in _SITE_BLOCKS)
+        self.render: RenderFunc = _build_render(layout)
+        self.text: str = layout_to_text(layout)
+
+
+def _build_render(layout: list) -> RenderFunc:
+    literals: list[str] = []
+    parts: list[str] = []
+    for item in layout:
+        if type(item) is LogFormatBlock:
+            arg = _BLOCK_ARGS.get(item)
+            if arg is not None:
+                parts.append("{" + arg + "}")
+            continue
+        text = str(item)
+        if text == "":
+            continue
+        # literals are passed in as closure cells,
+        #   no escaping of the user text is needed
+        parts.append("{_l%d}" % len(literals))
+        literals.append(text)
+
+    args = ", ".join(_BLOCK_ARGS.values())
+    cells = ", ".join("_l%d" % i for i in range(len(literals)))
+    source = (
+        f"def _factory({cells}):\n"
+        f"    def render({args}):\n"
+        f"        return f\"{''.join(parts)}\"\n"
+        f"    return render\n"
+    )
+    namespace: dict = {}
+    exec(compile(source, "<uglylogger format>", "exec"), namespace)
+    return namespace["_factory"](*literals)
+
+
+def compile_format(layout: list) -> CompiledFormat:
+    """Compiles a set_format() layout
+
+    Args:
+        layout (list): LogFormatBlock items and literals,
+            literals are converted to str once here
+
+    Returns:
+        CompiledFormat: the compiled layout
+    """
+    return CompiledFormat(layout)
+
+
+def layout_to_text(layout: list) -> str:
+    """Serializes a layout, e.g. "[{NAME}] {MESSAGE}"
+
+    Braces of the literals are doubled, like in str.format
+
+    Args:
+        layout (list): LogFormatBlock items and literals
+
+    Returns:
+        str: Text which text_to_layout parses back
+    """
+    parts: list[str] = []
+    for item in layout:
+        if type(item) is LogFormatBlock:
+            if item in _BLOCK_ARGS:
+                parts.append("{" + str(item.name) + "}")
+            continue
+        parts.append(str(item).replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+
+def text_to_layout(text: str) -> list:
+    """Parses the text of layout_to_text
+
+    Args:
+        text (str): e.g. "[{NAME}] {MESSAGE}"
+
+    Raises:
+        ValueError: If a field is not a LogFormatBlock
+
+    Returns:
+        list: LogFormatBlock items and literals
+    """
+    layout: list = []
+    for literal, field, _, _ in string.Formatter().parse(text):
+        if literal:
+            # escaped braces split the literals, they are joined again
+            if layout and type(layout[-1]) is str:
+                layout[-1] += literal
+            else:
+                layout.append(literal)
+        if field is None:
+            continue
+        try:
+            layout.append(LogFormatBlock[field])
+        except KeyError:
+            raise ValueError(f"unknown LogFormatBlock {field!r}") from None
+    return layout
@@ -0,0 +1,1125 @@
+import atexit
+import functools
+import itertools
+import logging
+import mmap
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Any, Callable
+from .compression import ARCHIVE_SUFFIXES, compress_file, strip_suffix
+from .enums import (
+    LogCompression,
+    LogFileSink,
+    LogLevel,
+    LogMoveOption,
+    LogRotateOption,
+    _DEBUG,
+    _ERROR,
+)
+from . import binary, mmapfile
+from .index import (
+    BINARY_FORMAT,
+    IndexFormat,
+    IndexSpan,
+    LogIndexWriter,
+    index_path,
+    move_index,
+)
+from .record import LogEntry
+
+
+def _report_error() -> None:
+    # same policy as logging.Handler.handleError,
+    #   a failing write must never raise into the caller
+    if logging.raiseExceptions and sys.stderr:  # pragma: no cover
+        traceback.print_exc(file=sys.stderr)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Console output of the Logger
+
+    Logger writes the rendered text directly via write(),
+        no logging.LogRecord is created for it
+    """
+
+    def write(self, text: str, level: int = 0) -> None:
+        """Writes rendered records followed by the terminator
+
+        Args:
+            text (str): Rendered records, separated by new lines
+            level (int, optional): Highest level of the records.
+                Defaults to 0.
+        """
+        self.acquire()
+        try:
+            self.stream.write(text + self.terminator)
+            self.stream.flush()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+
+# suffix of the TIMESTAMPED generations, "<file>.20240101-120000[-001]"
+_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+_STAMP_SUFFIX = r"\.\d{8}-\d{6}(-\d{3})?(\.gz|\.zst)?"
+
+# a generation is either plain or one of the compressed archives
+_GENERATION_SUFFIXES: tuple[str, ...] = ("",) + ARCHIVE_SUFFIXES
+
+# numbers the files which wait for the archive worker
+_retired_ids = itertools.count(1)
+
+
+def _existing(paths: list[str]) -> list[str]:
+    return [path for path in paths if os.path.exists(path)]
+
+
+def _replace(source: str, target: str) -> None:
+    # renames a generation, its sidecar index goes along
+    os.replace(source, target)
+    if os.path.exists(index_path(source)):
+        os.replace(index_path(source), index_path(target))
+
+
+def _remove(path: str) -> None:
+    # deletes a generation and its sidecar index
+    os.remove(path)
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+
+
+def _prune(generations: list[str], count: int, max_bytes: int) -> None:
+    """Deletes the generations beyond the retention
+
+    Args:
+        generations (list[str]): Generations, newest first
+        count (int): Number of generations to keep
+        max_bytes (int): Total size of the generations to keep,
+            0 disables. The newest generation is always kept
+    """
+    total = 0
+    for index, generation in enumerate(generations):
+        total += os.path.getsize(generation) if max_bytes > 0 else 0
+        if index >= count or (index > 0 and 0 < max_bytes < total):
+            _remove(generation)
+
+
+def _numbered_generations(path: str, index: int) -> list[str]:
+    return _existing([f"{path}.{index}{s}" for s in _GENERATION_SUFFIXES])
+
+
+def _archive_numbered(
+    path: str,
+    retired: str,
+    backup_count: int,
+    compression: LogCompression,
+    max_bytes: int,
+) -> None:
+    for generation in _numbered_generations(path, backup_count):
+        _remove(generation)
+    for index in range(backup_count - 1, 0, -1):
+        prefix_length = len(f"{path}.{index}")
+        for generation in _numbered_generations(path, index):
+            suffix = generation[prefix_length:]
+            _replace(generation, f"{path}.{index + 1}{suffix}")
+    _replace(retired, f"{path}.1")
+    compress_file(f"{path}.1", compression)
+    generations: list[str] = []
+    for index in range(1, backup_count + 1):
+        generations += _numbered_generations(path, index)
+    _prune(generations, backup_count, max_bytes)
+
+
+def _timestamped_generations(path: str) -> list[str]:
+    """Returns the TIMESTAMPED generations of a log file, oldest first"""
+    directory, name = os.path.split(path)
+    pattern = re.compile(re.escape(name) + _STAMP_SUFFIX)
+    generations = [
+        os.path.join(directory, entry)
+        for entry in os.listdir(directory or ".")
+        if pattern.fullmatch(entry)
+    ]
+    generations.sort(key=strip_suffix)
+    return generations
+
+
+def _rename_timestamped(path: str) -> str:
+    generations = _timestamped_generations(path)
+    target = f"{path}.{time.strftime(_STAMP_FORMAT)}"
+    # the new generation must sort last, even within the same second
+    #   or if the clock went backwards
+    newest = strip_suffix(generations[-1]) if generations else ""
+    target = max(target, newest[: len(target)])
+    candidate = target
+    counter = 0
+    while candidate <= newest:
+        counter += 1
+        candidate = f"{target}-{counter:03d}"
+    _replace(path, candidate)
+    return candidate
+
+
+def _archive_timestamped(
+    path: str,
+    retired: str,
+    backup_count: int,
+    compression: LogCompression,
+    max_bytes: int,
+) -> None:
+    compress_file(retired, compression)
+    generations = _timestamped_generations(path)
+    generations.reverse()
+    _prune(generations, backup_count, max_bytes)
+
+
+def rotate_file(
+    path: str,
+    option: LogRotateOption,
+    backup_count: int,
+    compression: LogCompression = LogCompression.NONE,
+    max_archive_bytes: int = 0,
+) -> None:
+    """Moves a closed log file out of the way
+
+    Generations are renamed with os.replace, which is atomic
+        on the same file system. With compression, the file is only
+        renamed here, compressing and pruning happen on the archive
+        worker, one job after the other. The sidecar index of a
+        generation is renamed and deleted with it
+
+    Args:
+        path (str): Path to the log file
+        option (LogRotateOption): What to do with the old generations
+        backup_count (int): Number of generations to keep
+        compression (LogCompression, optional): Compression of the
+            generations. Defaults to LogCompression.NONE.
+        max_archive_bytes (int, optional): Total size of the generations
+            to keep, 0 disables. Defaults to 0.
+    """
+    if not os.path.exists(path):
+        return
+    background = compression != LogCompression.NONE
+    match option:
+        case LogRotateOption.TRUNCATE:
+            _remove(path)
+            return
+        case LogRotateOption.TIMESTAMPED:
+            archive = _archive_timestamped
+            retired = _rename_timestamped(path)
+        case _:
+            if backup_count <= 0:
+                _remove(path)
+                return
+            archive = _archive_numbered
+            retired = path
+            if background:
+                # the generations are shifted later by the worker
+                retired = f"{path}.retired-{next(_retired_ids)}"
+                _replace(path, retired)
+    job = functools.partial(
+        archive, path, retired, backup_count, compression, max_archive_bytes
+    )
+    if background:
+        submit_archive_job(job)
+    else:
+        job()
+
+
+# jobs of the archive worker, executed one after the other
+_archive_lock = threading.Condition()
+_archive_jobs: "deque[Callable[[], object]]" = deque()
+_archive_busy = False
+_archiver: threading.Thread | None = None
+
+
+def _archive_loop() -> None:
+    global _archive_busy
+    while True:
+        with _archive_lock:
+            while not _archive_jobs:
+                _archive_lock.wait()
+            job = _archive_jobs.popleft()
+            _archive_busy = True
+        try:
+            job()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            with _archive_lock:
+                _archive_busy = False
+                _archive_lock.notify_all()
+
+
+def submit_archive_job(job: Callable[[], object]) -> None:
+    """Runs a job on the archive worker thread
+
+    Compression releases the GIL, the logging threads keep running
+        while a retired file is compressed
+
+    Args:
+        job (Callable[[], object]): Job to run
+    """
+    global _archiver
+    with _archive_lock:
+        if _archiver is None:
+            _archiver = threading.Thread(
+                target=_archive_loop, name="uglylogger-archiver", daemon=True
+            )
+            _archiver.start()
+        _archive_jobs.append(job)
+        _archive_lock.notify_all()
+
+
+def archive_file(path: str, compression: LogCompression) -> None:
+    """Compresses a retired log file in the background
+
+    Args:
+        path (str): Closed log file
+        compression (LogCompression): Compression to use
+    """
+    if compression != LogCompression.NONE:
+        submit_archive_job(functools.partial(compress_file, path, compression))
+
+
+def _archives_idle() -> bool:
+    return not _archive_jobs and not _archive_busy
+
+
+@atexit.register
+def wait_for_archives(timeout: float | None = None) -> bool:
+    """Waits until the archive worker is idle
+
+    Args:
+        timeout (float | None, optional): Seconds to wait at most.
+            Defaults to None (wait forever).
+
+    Returns:
+        bool: True if every job is done
+    """
+    with _archive_lock:
+        return _archive_lock.wait_for(_archives_idle, timeout)
+
+
+class FileHandler(logging.FileHandler):
+    """File output of the Logger
+
+    Logger writes the rendered text directly via write(),
+        no logging.LogRecord is created for it
+
+    Rotation: the file is rotated when the next write would exceed
+        max_bytes, or when rotate_interval seconds have passed since
+        it was opened. The size is tracked by counting the written
+        bytes, the file is only stat'ed once when it is opened
+
+    Index: every write is added to the sidecar index with the offset
+        it is written at. A rotation takes the index along with the
+        generation and starts a new one
+    """
+
+    DEFAULT_BACKUP_COUNT: int = 5
+
+    # sidecar index, see uglylogger.index
+    index: LogIndexWriter | None = None
+    # format of the records of the index, None if the Logger tells it
+    _index_format: IndexFormat | None = None
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        encoding: str = "utf-8",
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        rotate_option: LogRotateOption = LogRotateOption.NUMBERED,
+        compression: LogCompression = LogCompression.NONE,
+        max_archive_bytes: int = 0,
+        index_block_size: int = 0,
+    ) -> None:
+        """Opens the file
+
+        Args:
+            filename (str): Path to the log file
+            mode (str, optional): "a" to append, "w" to truncate.
+                Defaults to "a".
+            encoding (str, optional): Defaults to "utf-8".
+            max_bytes (int, optional): Rotates the file before it grows
+                beyond this size, 0 disables. Defaults to 0.
+            rotate_interval (float, optional): Rotates the file after
+                this many seconds, 0 disables. Defaults to 0.
+            backup_count (int, optional): Number of generations to keep.
+                Defaults to DEFAULT_BACKUP_COUNT.
+            rotate_option (LogRotateOption, optional): What to do with
+                the old generations. Defaults to LogRotateOption.NUMBERED.
+            compression (LogCompression, optional): Compresses the old
+                generations in the background.
+                Defaults to LogCompression.NONE.
+            max_archive_bytes (int, optional): Total size of the old
+                generations to keep, 0 disables. Defaults to 0.
+            index_block_size (int, optional): Maintains a sidecar index
+                with blocks of this many bytes, 0 disables.
+                Defaults to 0.
+        """
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.rotate_option = rotate_option
+        self.compression = compression
+        self.max_archive_bytes = max_archive_bytes
+        self._rotating = max_bytes > 0 or rotate_interval > 0
+        super().__init__(filename, mode, encoding)
+        self._reset_rotation()
+        # offset of the next write, -1 until it is needed
+        self._offset = -1
+        self._index_block_size = index_block_size
+        if index_block_size > 0:
+            self.index = LogIndexWriter(
+                self.baseFilename,
+                index_block_size,
+                mode.startswith("w"),
+                self._index_format,
+            )
+
+    def _current_size(self) -> int:
+        return os.path.getsize(self.baseFilename)
+
+    def _reset_rotation(self) -> None:
+        self._bytes_written = self._current_size() if self._rotating else 0
+        self._rotate_at = (
+            time.time() + self.rotate_interval
+            if self.rotate_interval > 0
+            else float("inf")
+        )
+
+    def _due(self, size: int) -> bool:
+        # caller holds the handler lock, counts the bytes to be written
+        written = self._bytes_written
+        self._bytes_written = written + size
+        if time.time() >= self._rotate_at:
+            return True
+        # a single record larger than max_bytes still gets its own file
+        return 0 < self.max_bytes < written + size and written > 0
+
+    def _close_stream(self) -> None:
+        stream = self.stream
+        if stream is not None:
+            self.stream = None  # type: ignore[assignment]
+            stream.flush()
+            stream.close()
+
+    def _rotate(self, size: int = 0) -> None:
+        # caller holds the handler lock
+        self._close_stream()
+        index = self.index
+        if index is not None:
+            # complete, rotate_file renames it with the file
+            index.close()
+        rotate_file(
+            self.baseFilename,
+            self.rotate_option,
+            self.backup_count,
+            self.compression,
+            self.max_archive_bytes,
+        )
+        self.stream = self._open()
+        self._reset_rotation()
+        self._bytes_written = size
+        self._offset = -1
+        if index is not None:
+            self.index = LogIndexWriter(
+                self.baseFilename,
+                self._index_block_size,
+                True,
+                self._index_format,
+            )
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes waiting in the buffer"""
+        return 0
+
+    def _index_write(self, size: int, span: IndexSpan | None) -> None:
+        # caller holds the handler lock, before the write
+        index = self.index
+        if index is None:
+            return
+        offset = self._offset
+        if offset < 0:
+            offset = os.path.getsize(self.baseFilename) + self.pending
+        index.add(offset, size, span)
+        self._offset = offset + size
+
+    def rotate(self) -> None:
+        """Starts a new generation of the log file now"""
+        self.acquire()
+        try:
+            self._rotate()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def write(
+        self, text: str, level: int = 0, span: IndexSpan | None = None
+    ) -> None:
+        """Writes rendered records followed by the terminator
+
+        Args:
+            text (str): Rendered records, separated by new lines
+            level (int, optional): Highest level of the records.
+                Defaults to 0.
+            span (IndexSpan | None, optional): The records for the
+                index. Defaults to None.
+        """
+        text += self.terminator
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self._rotating or self.index is not None:
+                size = (
+                    len(text)
+                    if text.isascii()
+                    else len(text.encode(self.encoding or "utf-8"))
+                )
+                if self._rotating and self._due(size):
+                    self._rotate(size)
+                self._index_write(size, span)
+            self.stream.write(text)
+            self.stream.flush()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        super().close()
+        if self.index is not None:
+            self.index.close()
+
+
+# buffered handlers which are flushed by the time threshold
+_timed_handlers: "weakref.WeakSet[BufferedFileHandler]" = weakref.WeakSet()
+_flusher_lock = threading.Lock()
+_flusher: threading.Thread | None = None
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(BufferedFileHandler.FLUSH_TICK)
+        for handler in list(_timed_handlers):
+            handler.flush_if_due()
+
+
+def _register_timed(handler: "BufferedFileHandler") -> None:
+    global _flusher
+    _timed_handlers.add(handler)
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop, name="uglylogger-flusher", daemon=True
+            )
+            _flusher.start()
+
+
+class BufferedFileHandler(FileHandler):
+    """File output which collects the records in memory
+
+    Encoded records are copied into a preallocated buffer,
+        which is written with a single write() call when
+        - it is full (size threshold)
+        - the oldest buffered record is older than flush_interval
+        - a record of flush_level or above arrives
+        - flush()/close() is called (release, move, interpreter exit)
+
+    Durability: records still in the buffer are lost
+        if the process is killed or crashes
+    """
+
+    DEFAULT_BUFFER_SIZE: int = 64 * 1024
+    DEFAULT_FLUSH_INTERVAL: float = 1.0
+    DEFAULT_FLUSH_LEVEL: int = _ERROR
+
+    # resolution of the time threshold
+    FLUSH_TICK: float = 0.1
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        encoding: str = "utf-8",
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_level: int = DEFAULT_FLUSH_LEVEL,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = FileHandler.DEFAULT_BACKUP_COUNT,
+        rotate_option: LogRotateOption = LogRotateOption.NUMBERED,
+        compression: LogCompression = LogCompression.NONE,
+        max_archive_bytes: int = 0,
+        index_block_size: int = 0,
+    ) -> None:
+        """Opens the file
+
+        Args:
+            filename (str): Path to the log file
+            mode (str, optional): "a" to append, "w" to truncate.
+                Defaults to "a".
+            encoding (str, optional): Defaults to "utf-8".
+            buffer_size (int, optional): Size of the buffer in bytes.
+                Defaults to DEFAULT_BUFFER_SIZE.
+            flush_interval (float, optional): Seconds a record may stay
+                in the buffer, 0 disables. Defaults to 1.0.
+            flush_level (int, optional): Records of this level or above
+                are written immediately. Defaults to ERROR.
+            max_bytes, rotate_interval, backup_count, rotate_option,
+                compression, max_archive_bytes: Rotation, see FileHandler
+            index_block_size (int, optional): Sidecar index, see
+                FileHandler. Defaults to 0.
+        """
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be positive")
+        self._buffer = bytearray(buffer_size)
+        self._used = 0
+        self._first_at = 0.0
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        super().__init__(
+            filename,
+            mode,
+            encoding,
+            max_bytes,
+            rotate_interval,
+            backup_count,
+            rotate_option,
+            compression,
+            max_archive_bytes,
+            index_block_size,
+        )
+        self._terminator = self.terminator.encode(self.encoding or "utf-8")
+        if flush_interval > 0:
+            _register_timed(self)
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        # raw file, the handler is the only buffer
+        return open(self.baseFilename, self.mode + "b", buffering=0)
+
+    def write(
+        self, text: str, level: int = 0, span: IndexSpan | None = None
+    ) -> None:
+        data = text.encode(self.encoding or "utf-8") + self._terminator
+        size = len(data)
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self._rotating and self._due(size):
+                # the buffered records still belong to the old file
+                self._rotate(size)
+            if self.index is not None:
+                self._index_write(size, span)
+            self._buffer_data(data, level)
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def _buffer_data(self, data: bytes, level: int) -> None:
+        # caller holds the handler lock
+        size = len(data)
+        used = self._used
+        if used + size > len(self._buffer):
+            self._write_buffer()
+            used = 0
+        if size > len(self._buffer):
+            # larger than the whole buffer, bypass it
+            self._write_raw(data)
+        else:
+            if used == 0:
+                self._first_at = time.monotonic()
+            end = used + size
+            self._buffer[used:end] = data
+            self._used = end
+        if level >= self.flush_level:
+            self._write_buffer()
+
+    def _write_raw(self, data: bytes | memoryview) -> None:
+        # raw binary file, see _open, a write may be partial
+        stream: Any = self.stream
+        size = len(data)
+        written = stream.write(data)
+        while written < size:
+            written += stream.write(data[written:])  # pragma: no cover
+
+    def _write_buffer(self) -> None:
+        # caller holds the handler lock
+        if self._used == 0 or self.stream is None:
+            return
+        with memoryview(self._buffer) as view:
+            self._write_raw(view[: self._used])
+        self._used = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes waiting in the buffer"""
+        return self._used
+
+    def _close_stream(self) -> None:
+        self._write_buffer()
+        super()._close_stream()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._write_buffer()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def flush_if_due(self) -> None:
+        """Flushes the buffer if the time threshold is exceeded"""
+        if self._used == 0 or self.flush_interval <= 0:
+            return
+        if time.monotonic() - self._first_at >= self.flush_interval:
+            self.flush()
+
+    def close(self) -> None:
+        _timed_handlers.discard(self)
+        super().close()
+
+
+class BinaryFileHandler(BufferedFileHandler):
+    """File output which writes packed records instead of text
+
+    Logger hands over the captured entries via write_entries(), they are
+        not rendered. The format, a decoder and a CLI which renders the
+        files back to text are in uglylogger.binary
+    """
+
+    _index_format = BINARY_FORMAT
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        buffer_size: int = BufferedFileHandler.DEFAULT_BUFFER_SIZE,
+        flush_interval: float = BufferedFileHandler.DEFAULT_FLUSH_INTERVAL,
+        flush_level: int = BufferedFileHandler.DEFAULT_FLUSH_LEVEL,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = FileHandler.DEFAULT_BACKUP_COUNT,
+        rotate_option: LogRotateOption = LogRotateOption.NUMBERED,
+        compression: LogCompression = LogCompression.NONE,
+        max_archive_bytes: int = 0,
+        index_block_size: int = 0,
+    ) -> None:
+        """Opens the file
+
+        Args:
+            filename (str): Path to the log file
+            mode (str, optional): "a" to append, "w" to truncate.
+                Defaults to "a".
+            buffer_size, flush_interval, flush_level: Buffering,
+                see BufferedFileHandler
+            max_bytes, rotate_interval, backup_count, rotate_option,
+                compression, max_archive_bytes: Rotation, see FileHandler
+            index_block_size (int, optional): Sidecar index, see
+                FileHandler. Defaults to 0.
+
+        Raises:
+            ValueError: If an existing file is not a binary log file
+        """
+        self._encoder = binary.BinaryEncoder()
+        super().__init__(
+            filename,
+            mode,
+            "utf-8",
+            buffer_size,
+            flush_interval,
+            flush_level,
+            max_bytes,
+            rotate_interval,
+            backup_count,
+            rotate_option,
+            compression,
+            max_archive_bytes,
+            index_block_size,
+        )
+        if self.index is not None:
+            self._encoder.definitions = []
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        path = self.baseFilename
+        if self.mode.startswith("a") and os.path.exists(path):
+            with open(path, "rb") as f:
+                magic = f.read(len(binary.MAGIC))
+            if magic and magic != binary.MAGIC:
+                raise ValueError("not an uglylogger binary file")
+        stream = super()._open()
+        if stream.seek(0, os.SEEK_END) == 0:
+            stream.write(binary.MAGIC)
+        # every file defines its own ids
+        self._encoder = binary.BinaryEncoder()
+        if self.index is not None:
+            # the index keeps them to decode a block on its own
+            self._encoder.definitions = []
+        return stream
+
+    def write_entries(
+        self,
+        entries: list[LogEntry],
+        name: str,
+        layout: str,
+        datetime_format: str,
+        level: int = 0,
+        span: IndexSpan | None = None,
+    ) -> int:
+        """Writes captured entries
+
+        Args:
+            entries (list[LogEntry]): Entries to write
+            name (str): Name of the Logger
+            layout (str): Layout text of the Logger
+            datetime_format (str): strftime format of the Logger
+            level (int, optional): Highest level of the entries.
+                Defaults to 0.
+            span (IndexSpan | None, optional): The entries for the
+                index. Defaults to None.
+
+        Returns:
+            int: Number of the bytes written
+        """
+        data = b""
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            data = self._encoder.encode(entries, name, layout, datetime_format)
+            if self._rotating and self._due(len(data)):
+                self._rotate()
+                # the ids are defined again in the new file
+                data = self._encoder.encode(
+                    entries, name, layout, datetime_format
+                )
+                self._bytes_written = len(data)
+            definitions = self._encoder.definitions
+            if self.index is not None and definitions is not None:
+                self.index.define(definitions)
+                definitions.clear()
+                self._index_write(len(data), span)
+            self._buffer_data(data, level)
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+        return len(data)
+
+    def write(
+        self, text: str, level: int = 0, span: IndexSpan | None = None
+    ) -> None:
+        """Writes text as a record without name and call site"""
+        created = time.time()
+        entry = LogEntry(LogLevel(level or _DEBUG), text, created, None, 0)
+        if span is None and self.index is not None:
+            span = IndexSpan(BINARY_FORMAT)
+            span.add(created, level or _DEBUG)
+        self.write_entries([entry], "", "{MESSAGE}", "", level, span)
+
+
+class MmapFileHandler(FileHandler):
+    """File output which copies the records into a memory mapped file
+
+    The file is preallocated in segments of segment_size bytes and grown
+        by another segment when it is full. A write is a copy into the
+        mapping and an update of the length in the header, the kernel
+        writes the pages back. flush() forces the write back (msync)
+
+    close() seals the file: the preallocated space after the records
+        is truncated and the sealed flag is set. The header layout and
+        a reader for unsealed files are in uglylogger.mmapfile
+    """
+
+    DEFAULT_SEGMENT_SIZE: int = 16 * 1024 * 1024
+
+    def __init__(
+        self,
+        filename: str,
+        mode: str = "a",
+        encoding: str = "utf-8",
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = FileHandler.DEFAULT_BACKUP_COUNT,
+        rotate_option: LogRotateOption = LogRotateOption.NUMBERED,
+        compression: LogCompression = LogCompression.NONE,
+        max_archive_bytes: int = 0,
+    ) -> None:
+        """Opens and maps the file
+
+        Args:
+            filename (str): Path to the log file
+            mode (str, optional): "a" to append, "w" to truncate.
+                Defaults to "a".
+            encoding (str, optional): Defaults to "utf-8".
+            segment_size (int, optional): Bytes the file is preallocated
+                and grown by. Defaults to DEFAULT_SEGMENT_SIZE.
+            max_bytes, rotate_interval, backup_count, rotate_option,
+                compression, max_archive_bytes: Rotation, see FileHandler
+
+        Raises:
+            ValueError: If an existing file is not an mmap log file
+        """
+        if segment_size <= 0:
+            raise ValueError("segment_size must be positive")
+        self.segment_size = segment_size
+        self._map: mmap.mmap | None = None
+        # absolute offset of the end of the records
+        self._end = mmapfile.HEADER.size
+        super().__init__(
+            filename,
+            mode,
+            encoding,
+            max_bytes,
+            rotate_interval,
+            backup_count,
+            rotate_option,
+            compression,
+            max_archive_bytes,
+        )
+        self._terminator = self.terminator.encode(self.encoding or "utf-8")
+
+    def _open(self):  # type: ignore[no-untyped-def]
+        # the file object only owns the descriptor,
+        #   the records are written to the mapping
+        path = self.baseFilename
+        append = self.mode.startswith("a") and os.path.exists(path)
+        stream = open(path, "r+b" if append else "w+b", buffering=0)
+        try:
+            self._map_file(stream.fileno(), append)
+        except BaseException:
+            stream.close()
+            raise
+        return stream
+
+    def _map_file(self, fd: int, append: bool) -> None:
+        header_size = mmapfile.HEADER.size
+        length = 0
+        size = os.fstat(fd).st_size
+        if append and size > 0:
+            with open(fd, "rb", closefd=False) as f:
+                _, length = mmapfile.read_header(f.read(header_size))
+        else:
+            size = 0
+        self._end = header_size + length
+        if size < self._end + 1:
+            size = self._end + self.segment_size
+            os.ftruncate(fd, size)
+        self._map = mmap.mmap(fd, size)
+        # reopened files are not sealed anymore
+        mmapfile.HEADER.pack_into(
+            self._map, 0, mmapfile.MAGIC, mmapfile.VERSION, 0, length, 0
+        )
+
+    def _grow(self, end: int) -> None:
+        # caller holds the handler lock
+        current = self._map
+        if current is None or self.stream is None:
+            return  # pragma: no cover
+        size = max(end, len(current) + self.segment_size)
+        current.close()
+        fd = self.stream.fileno()
+        os.ftruncate(fd, size)
+        self._map = mmap.mmap(fd, size)
+
+    def _current_size(self) -> int:
+        return self._end - mmapfile.HEADER.size
+
+    def write(
+        self, text: str, level: int = 0, span: IndexSpan | None = None
+    ) -> None:
+        # the mapped file is not indexed, span is ignored
+        data = text.encode(self.encoding or "utf-8") + self._terminator
+        size = len(data)
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self._rotating and self._due(size):
+                self._rotate(size)
+            start = self._end
+            end = start + size
+            if self._map is None or end > len(self._map):
+                self._grow(end)
+            view = self._map
+            if view is None:
+                return  # pragma: no cover
+            view[start:end] = data
+            # the length is updated after the copy,
+            #   a reader never sees a partial record
+            mmapfile.LENGTH.pack_into(
+                view, mmapfile.LENGTH_OFFSET, end - mmapfile.HEADER.size
+            )
+            self._end = end
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._map is not None:
+                self._map.flush()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+
+    def _seal(self) -> None:
+        # caller holds the handler lock
+        view = self._map
+        if view is None or self.stream is None:
+            return
+        self._map = None
+        view.flush()
+        view.close()
+        stream: Any = self.stream
+        stream.truncate(self._end)
+        stream.seek(mmapfile.FLAGS_OFFSET)
+        stream.write(mmapfile.FLAGS.pack(mmapfile.FLAG_SEALED))
+
+    def _close_stream(self) -> None:
+        self._seal()
+        super()._close_stream()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self._close_stream()
+        except Exception:  # pragma: no cover
+            _report_error()
+        finally:
+            self.release()
+        super().close()
+
+
+def create_file_handler(file: str, mode: str, options: dict) -> FileHandler:
+    """Creates the file handler of a sink
+
+    Args:
+        file (str): Path to the log file
+        mode (str): "a" to append, "w" to truncate
+        options (dict): File options of the Logger, keyword arguments
+            of the constructor, unrelated keys are ignored
+
+    Returns:
+        FileHandler: The handler
+    """
+    rotation: dict[str, Any] = {
+        "max_bytes": options["max_bytes"],
+        "rotate_interval": options["rotate_interval"],
+        "backup_count": options["backup_count"],
+        "rotate_option": options["rotate_option"],
+        "compression": options["compression"],
+        "max_archive_bytes": options["max_archive_bytes"],
+    }
+    index_block_size = options["index_block_size"]
+    match options["file_sink"]:
+        case LogFileSink.BUFFERED:
+            return BufferedFileHandler(
+                file,
+                mode,
+                "utf-8",
+                options["buffer_size"],
+                options["flush_interval"],
+                int(options["flush_level"]),
+                **rotation,
+                index_block_size=index_block_size,
+            )
+        case LogFileSink.BINARY:
+            return BinaryFileHandler(
+                file,
+                mode,
+                options["buffer_size"],
+                options["flush_interval"],
+                int(options["flush_level"]),
+                **rotation,
+                index_block_size=index_block_size,
+            )
+        case LogFileSink.MMAP:
+            return MmapFileHandler(
+                file, mode, "utf-8", options["segment_size"], **rotation
+            )
+    return FileHandler(
+        file, mode, "utf-8", **rotation, index_block_size=index_block_size
+    )
+
+
+# options of move() which keep the old file
+KEEPING_MOVE_OPTIONS = (
+    LogMoveOption.COPY_AND_APPEND,
+    LogMoveOption.KEEP_AND_APPEND,
+    LogMoveOption.KEEP_AND_INIT,
+)
+
+
+def move_file(old_file: str, new_file: str, option: LogMoveOption) -> bool:
+    """Moves a closed log file to a new destination
+
+    Args:
+        old_file (str): Current log file
+        new_file (str): Absolute path of the new log file
+        option (LogMoveOption): How to behave
+
+    Returns:
+        bool: True if the new file is appended to
+    """
+    append: bool = False
+    match option:
+        case LogMoveOption.MOVE_AND_APPEND:
+            # delete if there's a file in the destionation
+            if os.path.exists(new_file):
+                os.remove(new_file)
+            # move the file to the destination
+            shutil.move(old_file, new_file)
+            # append to the new file
+            append = True
+        case LogMoveOption.COPY_AND_APPEND:
+            # delete if there's a file in the destionation
+            if os.path.exists(new_file):
+                os.remove(new_file)
+            # copy the file to the destination
+            shutil.copy(old_file, new_file)
+            # append to the new file
+            append = True
+        case LogMoveOption.KEEP_AND_APPEND:
+            # don't delete the old file
+            # don't delete if there's a file in the destionation
+            # append to the new/existing file
+            append = True
+        case LogMoveOption.DELETE_AND_INIT:
+            # delete the old file
+            os.remove(old_file)
+            # delete if there's a file in the destionation
+            if os.path.exists(new_file):
+                os.remove(new_file)
+            # don't append to the new file
+            append = False
+        case LogMoveOption.KEEP_AND_INIT:
+            # don't delete the old file
+            # delete if there's a file in the destionation
+            if os.path.exists(new_file):
+                os.remove(new_file)
+            # don't append to the new file
+            append = False
+    move_index(old_file, new_file, option)
+    return append
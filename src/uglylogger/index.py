@@ -0,0 +1,679 @@
+import argparse
+import io
+import json
+import math
+import os
+import shutil
+import struct
+import sys
+from datetime import datetime
+from typing import Any, BinaryIO, Iterable, Iterator
+from . import binary
+from .compression import open_archive, strip_suffix
+from .enums import LogLevel, LogMoveOption, _LEVEL_NAMES
+from .reader import DATETIME_FORMAT, LogParser, parse_datetime
+
+# layout of the sidecar index "<log file>.idx"
+#   the file starts with MAGIC, followed by entries:
+#       tag, payload length, payload
+#   FORMAT  payload is "<kind>\0<layout text>\0<datetime format>", kind
+#           is text, jsonl or binary, the records of the blocks which
+#           follow are parsed with it
+#   DEFINE  payload is a definition block of a binary log file, copied
+#           here so that a block of the log file can be decoded alone
+#   BLOCK   payload is BLOCK: offset and size of a range of whole
+#           records, created of the first and the last record
+#           (-inf and inf if unknown) and the bits of their levels
+# the index is append only, a block is written once it is full
+MAGIC = b"UGLYIDX\x01"
+SUFFIX = ".idx"
+TAG_FORMAT = 1
+TAG_DEFINE = 2
+TAG_BLOCK = 3
+ENTRY = struct.Struct("<BI")
+BLOCK = struct.Struct("<QQddB")
+
+LEVEL_BITS: dict[int, int] = {
+    level: 1 << bit for bit, level in enumerate(_LEVEL_NAMES)
+}
+# levels of records which could not be parsed
+ALL_LEVELS = 0xFF
+_LEVELS_BY_NAME = {name: level for level, name in _LEVEL_NAMES.items()}
+
+# (kind, layout text, datetime format) of the records
+IndexFormat = tuple[str, str, str]
+BINARY_FORMAT: IndexFormat = ("binary", "", "")
+
+
+def index_path(path: str) -> str:
+    """Returns the path of the sidecar index of a log file
+
+    An archive of a log file keeps the index of the file, its offsets
+        are the ones of the decompressed records
+    """
+    return strip_suffix(path) + SUFFIX
+
+
+class IndexSpan:
+    """Created range and levels of the records of a single write"""
+
+    __slots__ = ("format", "first", "last", "levels")
+
+    def __init__(self, fmt: IndexFormat) -> None:
+        self.format = fmt
+        self.first = math.inf
+        self.last = -math.inf
+        self.levels = 0
+
+    def add(self, created: float, level: int) -> None:
+        if created < self.first:
+            self.first = created
+        if created > self.last:
+            self.last = created
+        self.levels |= LEVEL_BITS.get(level, ALL_LEVELS)
+
+
+class LogIndexWriter:
+    """Maintains the sidecar index of a log file
+
+    Writes are merged into blocks of at least block_size bytes, a block
+        is appended to the index once it is full or when the writer is
+        closed. The records of a block always have the same format.
+        When it is opened, the records which the index misses, e.g. the
+        ones of a crashed process, are indexed from the log file
+    """
+
+    DEFAULT_BLOCK_SIZE: int = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        truncate: bool = False,
+        fmt: IndexFormat | None = None,
+    ) -> None:
+        """Opens the index of a log file
+
+        Args:
+            path (str): Path to the log file
+            block_size (int, optional): Minimum size of a block in bytes.
+                Defaults to DEFAULT_BLOCK_SIZE.
+            truncate (bool, optional): The log file was truncated.
+                Defaults to False.
+            fmt (IndexFormat | None, optional): Format of the records
+                of the log file. Defaults to None (the last format of
+                the index).
+
+        Raises:
+            ValueError: block_size is not positive
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self._log_path = path
+        self._path = index_path(path)
+        self._block_size = block_size
+        self._format: IndexFormat | None = None
+        # the open block: offset, size, first, last, levels
+        self._block: list | None = None
+        self._stream: BinaryIO | None = None
+        self._recover(truncate, fmt)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _recover(self, truncate: bool, fmt: IndexFormat | None) -> None:
+        size = _size(self._log_path)
+        end = 0
+        keep = 0
+        if not truncate and size > 0:
+            try:
+                entries = list(_read_entries(self._path))
+            except (OSError, ValueError):
+                entries = []
+            keep = len(MAGIC) if entries else 0
+            fixed = fmt is not None
+            valid = True
+            for position, tag, payload in entries:
+                if tag == TAG_FORMAT and not fixed:
+                    # the last one is the format of the missing records
+                    fmt = _decode_format(payload)
+                elif tag == TAG_BLOCK and valid:
+                    offset, length = BLOCK.unpack(payload)[:2]
+                    if offset + length > size:
+                        # the records were still in a buffer of a process
+                        #   which crashed, they are indexed again
+                        valid = False
+                        continue
+                    end = offset + length
+                    keep = position
+        if keep:
+            stream: BinaryIO = open(self._path, "r+b")
+            stream.truncate(keep)
+            stream.seek(keep)
+        else:
+            stream = open(self._path, "wb")
+            stream.write(MAGIC)
+        self._stream = stream
+        if end < size:
+            self._index_range(end, size, fmt)
+        self._flush_block()
+
+    def _index_range(
+        self, start: int, end: int, fmt: IndexFormat | None
+    ) -> None:
+        # the records which are in the log file but not in the index
+        with open(self._log_path, "rb") as log:
+            for offset, size, created, level, item in scan(
+                log, start, end, fmt
+            ):
+                if fmt == BINARY_FORMAT and isinstance(item, bytes):
+                    self.define([item])
+                elif fmt is None:
+                    # unknown format, a single block of unknown records
+                    self._write_format(("text", "", ""))
+                    self._add(offset, size, -math.inf, math.inf, ALL_LEVELS)
+                else:
+                    self._write_format(fmt)
+                    first = -math.inf if created is None else created
+                    last = math.inf if created is None else created
+                    levels = ALL_LEVELS
+                    if level is not None:
+                        levels = LEVEL_BITS.get(level, ALL_LEVELS)
+                    self._add(offset, size, first, last, levels)
+
+    def _write_entry(self, tag: int, payload: bytes) -> None:
+        stream = self._stream
+        if stream is not None:
+            stream.write(ENTRY.pack(tag, len(payload)) + payload)
+
+    def _write_format(self, fmt: IndexFormat) -> None:
+        if fmt == self._format:
+            return
+        self._flush_block()
+        self._format = fmt
+        self._write_entry(TAG_FORMAT, "\0".join(fmt).encode("utf-8"))
+
+    def _flush_block(self) -> None:
+        block = self._block
+        if block is not None:
+            self._block = None
+            self._write_entry(TAG_BLOCK, BLOCK.pack(*block))
+        if self._stream is not None:
+            self._stream.flush()
+
+    def _add(
+        self, offset: int, size: int, first: float, last: float, levels: int
+    ) -> None:
+        block = self._block
+        if block is not None and block[0] + block[1] != offset:
+            # not contiguous, e.g. the log file was written without it
+            self._flush_block()
+            block = None
+        if block is None:
+            self._block = [offset, size, first, last, levels]
+        else:
+            block[1] += size
+            if first < block[2]:
+                block[2] = first
+            if last > block[3]:
+                block[3] = last
+            block[4] |= levels
+        if self._block is not None and self._block[1] >= self._block_size:
+            self._flush_block()
+
+    def add(self, offset: int, size: int, span: IndexSpan | None) -> None:
+        """Indexes the records of a write
+
+        Args:
+            offset (int): Offset of the write in the log file
+            size (int): Bytes written
+            span (IndexSpan | None): The records, None if they are unknown
+        """
+        if span is None:
+            self._add(offset, size, -math.inf, math.inf, ALL_LEVELS)
+            return
+        self._write_format(span.format)
+        self._add(offset, size, span.first, span.last, span.levels)
+
+    def define(self, definitions: list[bytes]) -> None:
+        """Copies definition blocks of a binary log file"""
+        self._write_format(BINARY_FORMAT)
+        for data in definitions:
+            self._write_entry(TAG_DEFINE, data)
+
+    def close(self) -> None:
+        """Writes the open block and closes the index"""
+        stream = self._stream
+        if stream is None:
+            return
+        self._flush_block()
+        self._stream = None
+        stream.close()
+
+
+class _ArchiveReader:
+    """Reads an archive of a log file like the log file
+
+    Archives can't seek backwards, the blocks are read in order and
+        the records before them are skipped by reading
+    """
+
+    def __init__(self, stream: Any) -> None:
+        # decompressing readers do not all have a readline()
+        self._stream = io.BufferedReader(stream)
+        self._position = 0
+
+    def seek(self, offset: int) -> int:
+        while self._position < offset:
+            data = self._stream.read(min(offset - self._position, 1 << 20))
+            if not data:
+                break
+            self._position += len(data)
+        if self._position > offset:
+            raise ValueError("the blocks of the index are not in order")
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._position += len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self._stream.readline(size)
+        self._position += len(data)
+        return data
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _decode_format(payload: bytes) -> IndexFormat:
+    kind, layout, datetime_format = (
+        payload.decode("utf-8", "replace").split("\0") + ["", ""]
+    )[:3]
+    return (kind, layout, datetime_format)
+
+
+def _read_entries(path: str) -> Iterator[tuple[int, int, bytes]]:
+    """Reads the entries of a sidecar index
+
+    A truncated entry at the end is ignored
+
+    Yields:
+        tuple[int, int, bytes]: Offset after the entry, tag and payload
+    """
+    with open(path, "rb") as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not an uglylogger index")
+        position = len(MAGIC)
+        while True:
+            header = stream.read(ENTRY.size)
+            if len(header) < ENTRY.size:
+                return
+            tag, size = ENTRY.unpack(header)
+            payload = stream.read(size)
+            if len(payload) < size:
+                return
+            position += ENTRY.size + size
+            yield position, tag, payload
+
+
+class _LineParser:
+    """Finds the level and the created time of a text or JSONL record
+
+    A line which does not start a record continues the previous one
+    """
+
+    def __init__(self, fmt: IndexFormat) -> None:
+        kind, layout_text, self._datetime_format = fmt
+        self._json = kind == "jsonl"
+        self._parser: LogParser | None = None
+        if not self._json and layout_text:
+            self._parser = LogParser(layout_text, self._datetime_format)
+
+    def parse(self, line: str) -> tuple[float | None, int | None] | None:
+        """Returns (created, level) of a record, None for a continuation
+
+        Fields which are not in the layout are None
+        """
+        if self._json:
+            if not line.startswith("{"):
+                return None
+            try:
+                fields = json.loads(line)
+            except ValueError:
+                return None
+            if not isinstance(fields, dict):
+                return None
+            created = fields.get("datetime")
+            return (
+                parse_datetime(
+                    created if isinstance(created, str) else None,
+                    self._datetime_format,
+                ),
+                _LEVELS_BY_NAME.get(str(fields.get("level"))),
+            )
+        if self._parser is None:
+            return (None, None)
+        return self._parser.start_fields(line)
+
+
+# offset, size, created, level and the record
+_Scanned = tuple[
+    int, int, float | None, int | None, binary.BinaryRecord | bytes
+]
+
+
+def scan(
+    stream: BinaryIO, start: int, end: int, fmt: IndexFormat | None
+) -> Iterator[_Scanned]:
+    """Reads the records of a range of a log file
+
+    Args:
+        stream (BinaryIO): The log file
+        start (int): Offset of a record
+        end (int): Offset to stop at
+        fmt (IndexFormat | None): Format of the records, None if unknown
+
+    Yields:
+        tuple: offset, size, created, level of every record and the
+            record, its raw bytes for text, or a definition block of a
+            binary file
+    """
+    if fmt == BINARY_FORMAT:
+        yield from _scan_binary(stream, start, end, binary.BinaryDecoder())
+    else:
+        yield from _scan_lines(stream, start, end, fmt)
+
+
+def _scan_binary(
+    stream: BinaryIO, start: int, end: int, decoder: binary.BinaryDecoder
+) -> Iterator[_Scanned]:
+    stream.seek(max(start, len(binary.MAGIC)))
+    for offset, size, item in decoder.read(stream, end):
+        if isinstance(item, binary.BinaryRecord):
+            yield offset, size, item.created, item.level, item
+        else:
+            yield offset, size, None, None, item
+
+
+def _scan_lines(
+    stream: BinaryIO, start: int, end: int, fmt: IndexFormat | None
+) -> Iterator[_Scanned]:
+    parser = None if fmt is None else _LineParser(fmt)
+    stream.seek(start)
+    offset = start
+    # the record which is read: offset, parsed fields and its lines
+    record: tuple[int, tuple[float | None, int | None]] | None = None
+    lines: list[bytes] = []
+    while offset < end:
+        line = stream.readline(end - offset)
+        if not line:
+            break
+        fields = None
+        if parser is not None:
+            fields = parser.parse(line.decode("utf-8", "replace").rstrip())
+        if fields is not None or record is None:
+            if record is not None:
+                yield _record(record, offset, lines)
+            record = (offset, fields or (None, None))
+            lines = []
+        lines.append(line)
+        offset += len(line)
+    if record is not None:
+        yield _record(record, offset, lines)
+
+
+def _record(
+    record: tuple[int, tuple[float | None, int | None]],
+    end: int,
+    lines: list[bytes],
+) -> tuple[int, int, float | None, int | None, bytes]:
+    offset, (created, level) = record
+    return offset, end - offset, created, level, b"".join(lines)
+
+
+def rebuild_index(
+    path: str,
+    layout: str | None = None,
+    datetime_format: str | None = None,
+    jsonl: bool = False,
+    block_size: int = LogIndexWriter.DEFAULT_BLOCK_SIZE,
+) -> None:
+    """Indexes a log file from scratch
+
+    Binary log files need no layout. The layout of a text file is taken
+        from the old index if there is one
+
+    Args:
+        path (str): Path to the log file
+        layout (str | None, optional): Layout text of the records, e.g.
+            "{DATETIME} [{LEVEL}] {MESSAGE}". Defaults to None (the
+            layout of the old index).
+        datetime_format (str | None, optional): strftime format of
+            DATETIME. Defaults to None (the format of the old index, or
+            the default of the Logger).
+        jsonl (bool, optional): The records are JSON Lines.
+            Defaults to False.
+        block_size (int, optional): Minimum size of a block in bytes.
+            Defaults to LogIndexWriter.DEFAULT_BLOCK_SIZE.
+
+    Raises:
+        ValueError: The layout of a text file is not known
+    """
+    with open(path, "rb") as log:
+        is_binary = log.read(len(binary.MAGIC)) == binary.MAGIC
+    fmt = BINARY_FORMAT
+    if not is_binary:
+        old = _last_format(path)
+        layout = layout or old[1]
+        if not layout and not jsonl:
+            raise ValueError("the layout of the records is not known")
+        fmt = (
+            "jsonl" if jsonl else "text",
+            layout or "",
+            datetime_format or old[2] or DATETIME_FORMAT,
+        )
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+    # every record is missing from the new index
+    LogIndexWriter(path, block_size, fmt=fmt).close()
+
+
+def _last_format(path: str) -> IndexFormat:
+    fmt = ("", "", "")
+    try:
+        for _, tag, payload in _read_entries(index_path(path)):
+            if tag == TAG_FORMAT:
+                fmt = _decode_format(payload)
+    except (OSError, ValueError):
+        pass
+    return fmt
+
+
+def query(
+    path: str,
+    since: float | None = None,
+    until: float | None = None,
+    levels: Iterable[LogLevel] | None = None,
+) -> Iterator[str]:
+    """Finds the records of a time range and levels with the index
+
+    Only the blocks of the index which can contain such records are
+        read. Records of the log file which are not indexed yet are
+        read as well. The time resolution is the one of the datetime
+        format of the file, fields which are not in the layout do not
+        filter. An archive of a rotated generation is decompressed up
+        to the last matching block
+
+    Args:
+        path (str): Path to the log file, or a ".gz" or ".zst" archive
+        since (float | None, optional): Seconds since the epoch, records
+            created before are skipped. Defaults to None.
+        until (float | None, optional): Seconds since the epoch, records
+            created at or after it are skipped. Defaults to None.
+        levels (Iterable[LogLevel] | None, optional): Levels to find.
+            Defaults to None (every level).
+
+    Raises:
+        FileNotFoundError: The log file is not indexed
+        ValueError: The index is not an uglylogger index
+
+    Yields:
+        str: The records, without new line
+    """
+    low = -math.inf if since is None else since
+    high = math.inf if until is None else until
+    wanted = ALL_LEVELS
+    if levels is not None:
+        wanted = 0
+        for level in levels:
+            wanted |= LEVEL_BITS[int(level)]
+    archived = strip_suffix(path) != path
+    # an archive is complete, its index has every record
+    size = sys.maxsize if archived else _size(path)
+    decoder = binary.BinaryDecoder()
+    renderer = binary.RecordRenderer()
+    fmt: IndexFormat | None = None
+    end = 0
+
+    def matches(created: float | None, level: int | None) -> bool:
+        if created is not None and not low <= created < high:
+            return False
+        return level is None or bool(LEVEL_BITS.get(level, 0) & wanted)
+
+    def read(start: int, stop: int) -> Iterator[str]:
+        if fmt == BINARY_FORMAT:
+            records = _scan_binary(log, start, stop, decoder)
+        else:
+            records = _scan_lines(log, start, stop, fmt)
+        for _, _, created, level, item in records:
+            if not matches(created, level):
+                continue
+            if isinstance(item, binary.BinaryRecord):
+                yield renderer.render(item)
+            elif fmt != BINARY_FORMAT:
+                yield item.decode("utf-8", "replace").rstrip("\n")
+
+    log: Any = _ArchiveReader(open_archive(path)) if archived else None
+    if log is None:
+        log = open(path, "rb")
+    try:
+        for _, tag, payload in _read_entries(index_path(path)):
+            if tag == TAG_FORMAT:
+                fmt = _decode_format(payload)
+            elif tag == TAG_DEFINE:
+                decoder.define(payload)
+            elif tag == TAG_BLOCK:
+                offset, length, first, last, bits = BLOCK.unpack(payload)
+                end = max(end, offset + length)
+                if not bits & wanted or last < low or first >= high:
+                    continue
+                yield from read(offset, min(offset + length, size))
+        if end < size and not archived:
+            yield from read(end, size)
+    finally:
+        log.close()
+
+
+def move_index(old_file: str, new_file: str, option: LogMoveOption) -> None:
+    """Moves the index of a closed log file along with it
+
+    Args:
+        old_file (str): Log file before the move
+        new_file (str): Log file after the move
+        option (LogMoveOption): How the log file was moved
+    """
+    old = index_path(old_file)
+    new = index_path(new_file)
+    match option:
+        case LogMoveOption.MOVE_AND_APPEND:
+            if os.path.exists(old):
+                os.replace(old, new)
+            elif os.path.exists(new):
+                os.remove(new)
+        case LogMoveOption.COPY_AND_APPEND:
+            if os.path.exists(old):
+                shutil.copy(old, new)
+            elif os.path.exists(new):
+                os.remove(new)
+        case LogMoveOption.KEEP_AND_APPEND:
+            # the index of the new file is checked when it is opened
+            pass
+        case _:
+            if option == LogMoveOption.DELETE_AND_INIT:
+                if os.path.exists(old):
+                    os.remove(old)
+            if os.path.exists(new):
+                os.remove(new)
+
+
+def _parse_time(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m uglylogger index",
+        description="Queries uglylogger log files with their index",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    find = commands.add_parser("query", help="prints the matching records")
+    find.add_argument("file")
+    find.add_argument(
+        "--since", help='local time, e.g. "2024-05-01 14:02", or epoch'
+    )
+    find.add_argument("--until", help="same as --since, exclusive")
+    find.add_argument(
+        "--level",
+        action="append",
+        choices=list(_LEVEL_NAMES.values()),
+        help="level to print, can be repeated, defaults to every level",
+    )
+    rebuild = commands.add_parser("rebuild", help="indexes a log file")
+    rebuild.add_argument("file")
+    rebuild.add_argument(
+        "--format", help='layout of a text file, e.g. "[{LEVEL}] {MESSAGE}"'
+    )
+    rebuild.add_argument("--datetime-format", help="strftime format")
+    rebuild.add_argument("--jsonl", action="store_true")
+    rebuild.add_argument(
+        "--block-size", type=int, default=LogIndexWriter.DEFAULT_BLOCK_SIZE
+    )
+    args = parser.parse_args(argv)
+    if args.command == "rebuild":
+        rebuild_index(
+            args.file,
+            args.format,
+            args.datetime_format,
+            args.jsonl,
+            args.block_size,
+        )
+        return 0
+    levels = None
+    if args.level:
+        levels = [LogLevel[name] for name in args.level]
+    output = sys.stdout
+    for record in query(
+        args.file,
+        None if args.since is None else _parse_time(args.since),
+        None if args.until is None else _parse_time(args.until),
+        levels,
+    ):
+        output.write(record + "\n")
+    output.flush()
+    return 0
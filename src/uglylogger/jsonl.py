@@ -0,0 +1,140 @@
+import json
+from json.encoder import encode_basestring
+from typing import Any, Callable
+from .enums import LogFormatBlock
+
+try:
+    import orjson  # type: ignore[import-not-found, unused-ignore]
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment, unused-ignore]
+
+# keys of the blocks, in the order of the arguments of the render function
+_BLOCK_KEYS: dict = {
+    LogFormatBlock.NAME: "name",
+    LogFormatBlock.LEVEL: "level",
+    LogFormatBlock.DATETIME: "datetime",
+    LogFormatBlock.MESSAGE: "message",
+    LogFormatBlock.FILE: "file",
+    LogFormatBlock.LINE: "line",
+    LogFormatBlock.FUNCTION: "function",
+}
+
+JsonRenderFunc = Callable[[str, str, str, str, str, object, str], str]
+
+
+def dumps(value: Any) -> str:
+    """Serializes extra fields, with orjson if it is installed
+
+    Values which are not JSON types are converted with str(), so are
+        keys which are not str, int, float, bool or None
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                value, default=str, option=orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            pass
+    try:
+        return _dumps(value)
+    except TypeError:
+        return _dumps(_str_keys(value))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(
+        value, default=str, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def _str_keys(value: Any) -> Any:
+    # the keys json can't serialize are converted with str()
+    if isinstance(value, dict):
+        return {
+            (
+                k if k is None or isinstance(k, (str, int, float)) else str(k)
+            ): _str_keys(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_str_keys(v) for v in value]
+    return value
+
+
+def _line(line: object) -> str:
+    return str(line) if type(line) is int else "null"
+
+
+class CompiledJsonFormat:
+    """A set_format() layout compiled into a JSON object serializer
+
+    Every LogFormatBlock of the layout becomes a key, the literals of
+        the layout are left out. The key fragments are precomputed,
+        only the values are escaped per record
+    """
+
+    __slots__ = ("layout", "render", "keys", "uses_datetime", "uses_site")
+
+    def __init__(self, layout: list) -> None:
+        self.layout = layout
+        keys: list[str] = []
+        for item in layout:
+            if type(item) is not LogFormatBlock:
+                continue
+            key = _BLOCK_KEYS.get(item)
+            if key is not None and key not in keys:
+                keys.append(key)
+        self.keys: frozenset[str] = frozenset(keys)
+        self.uses_datetime: bool = "datetime" in self.keys
+        self.uses_site: bool = not self.keys.isdisjoint(
+            ("file", "line", "function")
+        )
+        self.render: JsonRenderFunc = _build_render(keys)
+
+    def render_extra(self, record: str, extra: dict) -> str:
+        """Adds extra fields to a rendered record
+
+        Keys of the layout take precedence over the extra fields
+
+        Args:
+            record (str): Output of render
+            extra (dict): Extra fields
+
+        Returns:
+            str: The record with the extra fields
+        """
+        if not self.keys.isdisjoint(extra):
+            extra = {k: v for k, v in extra.items() if k not in self.keys}
+        if not extra:
+            return record
+        fields = dumps(extra)
+        if record == "{}":
+            return fields
+        return f"{record[:-1]},{fields[1:]}"
+
+
+def _build_render(keys: list[str]) -> JsonRenderFunc:
+    # the fixed parts of the object are literals of the generated f-string
+    fields: list[str] = []
+    for key in keys:
+        value = "_line(line)" if key == "line" else f"_quote({key})"
+        fields.append(f'"{key}":{{{value}}}')
+    args = ", ".join(_BLOCK_KEYS.values())
+    # "{{" and "}}" are the braces of the object in the generated f-string
+    body = "{{" + ",".join(fields) + "}}"
+    source = f"def render({args}):\n    return f'{body}'\n"
+    namespace: dict = {"_quote": encode_basestring, "_line": _line}
+    exec(compile(source, "<uglylogger json format>", "exec"), namespace)
+    return namespace["render"]
+
+
+def compile_json_format(layout: list) -> CompiledJsonFormat:
+    """Compiles a set_format() layout for the JSONL file format
+
+    Args:
+        layout (list): LogFormatBlock items and literals
+
+    Returns:
+        CompiledJsonFormat: the compiled layout
+    """
+    return CompiledJsonFormat(layout)
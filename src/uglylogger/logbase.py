@@ -5,8 +5,11 @@ from .logger import (
     LogOutput,
     LogMoveOption,
     LogColorMode,
+    LogCompression,
 )
 from typing import Any
+import sys
+from .caller import register_internal
 
 
 class LogBase:
@@ -37,89 +40,123 @@ class LogBase:
     def console(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         level: LogLevel = Logger.DEFAULT_CONSOLE_LOG_LEVEL,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.console(msg, color, level)
+        self._logger.console(msg, *args, color=color, level=level)
 
     def file(
-        self, msg: Any, level: LogLevel = Logger.DEFAULT_FILE_LOG_LEVEL
+        self,
+        msg: Any,
+        *args: Any,
+        level: LogLevel = Logger.DEFAULT_FILE_LOG_LEVEL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.file(msg, level)
+        self._logger.file(msg, *args, level=level, extra=extra)
 
     def log(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         level: LogLevel = Logger.DEFAULT_LOG_LOG_LEVEL,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.log(msg, color, level, output)
+        self._logger.log(
+            msg, *args, color=color, level=level, output=output, extra=extra
+        )
 
     def debug(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.debug(msg, color, output)
+        self._logger.debug(msg, *args, color=color, output=output, extra=extra)
 
     def info(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.info(msg, color, output)
+        self._logger.info(msg, *args, color=color, output=output, extra=extra)
 
     def warning(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.warning(msg, color, output)
+        self._logger.warning(
+            msg, *args, color=color, output=output, extra=extra
+        )
 
     def error(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.error(msg, color, output)
+        self._logger.error(msg, *args, color=color, output=output, extra=extra)
 
     def critical(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.critical(msg, color, output)
+        self._logger.critical(
+            msg, *args, color=color, output=output, extra=extra
+        )
 
     def move_logger(
         self,
         new_file: str,
         option: LogMoveOption = LogMoveOption.MOVE_AND_APPEND,
+        compression: LogCompression | None = None,
     ) -> None:
         if self._logger is None:
             return
-        self._logger.move(new_file, option)
+        self._logger.move(new_file, option, compression)
+
+    def rotate_logger(self) -> None:
+        if self._logger is None:
+            return
+        self._logger.rotate()
+
+    def dump_logger(self) -> None:
+        if self._logger is None:
+            return
+        self._logger.dump()
 
     def set_format(self, fmt: list = []) -> None:
         if self._logger is None:
@@ -140,3 +177,6 @@ class LogBase:
         if self._logger is None:
             return
         self._logger.release()
+
+
+register_internal(sys.modules[__name__])
@@ -1,144 +1,175 @@
 import logging
-from logging import LogRecord
-from enum import IntEnum, Flag, auto
 import locale
-from datetime import datetime
-import inspect
 import os
-import shutil
-from typing import Tuple, Callable, Any
-
-
-class LogColorMode(IntEnum):
-    """Enumerate LogColorMode"""
-
-    """Colored output if possible"""
-    COLORED = (1,)
-
-    """Non-colored output"""
-    MONO = 2
-
-
-class LogColor(IntEnum):
-    """LogColor"""
-
-    BLACK = (0,)
-    RED = (1,)
-    GREEN = (2,)
-    YELLOW = (3,)
-    BLUE = (4,)
-    MAGENTA = (5,)
-    CYAN = (6,)
-    WHITE = 7
-
-
-class LogOutput(Flag):
-    """Log Output Target"""
-
-    """No output will be generated"""
-    NONE = 0
-
-    """Log will be displayed in terminal"""
-    CONSOLE = auto()
-
-    """Log will be written into the file"""
-    FILE = auto()
-
-    """Log will be displayed in terminal and
-        also will be written into the file"""
-    ALL = CONSOLE | FILE
-
-
-class LogLevel(IntEnum):
-    """LogLevel"""
-
-    CRITICAL = (50,)
-    ERROR = (40,)
-    WARNING = (30,)
-    INFO = (20,)
-    DEBUG = 10
-
-    def __str__(self) -> str:
-        """String representation of the LogLevel
-
-        Returns:
-            str: String representation of the LogLevel
-        """
-        match self.value:
-            case LogLevel.CRITICAL:
-                return "CRITICAL"
-            case LogLevel.ERROR:
-                return "ERROR"
-            case LogLevel.WARNING:
-                return "WARNING"
-            case LogLevel.INFO:
-                return "INFO"
-            case LogLevel.DEBUG:
-                return "DEBUG"
-        return ""  # pragma: no cover
-
-
-class LogFormatBlock(Flag):
-    """Element of the log format"""
-
-    """Prints Logger name"""
-    NAME = auto()
-
-    """Prints LogLevel"""
-    LEVEL = auto()
-
-    """Prints DateTime"""
-    DATETIME = auto()
-
-    """Prints the messae"""
-    MESSAGE = auto()
-
-    """Prints the sender file name"""
-    FILE = auto()
-
-    """Prints the line number of the log call"""
-    LINE = auto()
-
-    """Prints the sender function nam"""
-    FUNCTION = auto()
-
-
-class LogMoveOption(IntEnum):
-    """LogMoveOption"""
-
-    """Moves the log file to the destination
-       Deletes if there's already a file in the destination
-       Appends to the moved file
-       Old file is obviously deleted
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Mapping
+from types import FunctionType
+from typing import Any, Callable, Iterable
+
+# before .asyncwriter, exit handlers run in reverse order and the
+#   archive worker must be waited for after the writers are drained
+from .handlers import (
+    BinaryFileHandler,
+    BufferedFileHandler,
+    ConsoleHandler,
+    FileHandler,
+    MmapFileHandler,
+    KEEPING_MOVE_OPTIONS,
+    _report_error,
+    archive_file,
+    create_file_handler,
+    move_file,
+)
+from .asyncwriter import AsyncWriter
+from .collector import CollectorHandler
+from .dedup import LogDedup, register_expiry, unregister_expiry
+from .caller import describe_code, find_call_site, register_internal
+from .enums import (
+    LogColorMode,
+    LogColor,
+    LogOutput,
+    LogLevel,
+    LogFormatBlock,
+    LogMoveOption,
+    LogOverflowPolicy,
+    LogFileSink,
+    LogClock,
+    LogRotateOption,
+    LogCompression,
+    LogFileFormat,
+    _DEBUG,
+    _INFO,
+    _WARNING,
+    _ERROR,
+    _CRITICAL,
+    _DISABLED,
+    _LEVEL_NAMES,
+    _CONSOLE,
+    _FILE,
+    _REPLAY,
+)
+from .formatter import CompiledFormat, compile_format
+from .index import BINARY_FORMAT, IndexSpan, query as query_index
+from .jsonl import CompiledJsonFormat, compile_json_format
+from .metrics import (
+    SINK_NAMES,
+    LogMetrics,
+    register_export,
+    to_prometheus,
+    unregister_export,
+    write_atomic,
+)
+from .profile import (
+    LogProfiler,
+    LogProfileSort,
+    register_exit_report,
+    unregister_exit_report,
+)
+from .progress import LogProgress
+from .record import LogEntry
+from .recorder import FlightRecorder
+from .sampling import LogSampler, LogSampling
+from .timestamp import TimestampRenderer, make_clock
+
+
+def _interpolate(text: str, args: tuple) -> str:
+    """Applies deferred message arguments
+
+    %-style if the message contains a "%", {}-style otherwise,
+        the arguments are appended if the message does not fit them
     """
-    MOVE_AND_APPEND = (1,)
-
-    """Copies the log file to the destination
-       Deletes if there's already a file in the destination
-       Appends to the moved file
-       Old file is obviously remains
+    if "%" in text:
+        # logging.Logger convention, a single mapping feeds %(key)s
+        values: Any = args
+        if len(args) == 1 and isinstance(args[0], Mapping):
+            values = args[0]
+        try:
+            return text % values
+        except (TypeError, ValueError, KeyError):
+            pass
+    if "{" in text:
+        try:
+            return text.format(*args)
+        except (IndexError, KeyError, ValueError):
+            pass
+    return " ".join([text, *map(str, args)])
+
+
+def _is_deferred(msg: Any) -> bool:
+    """True if a message is a function or lambda without required parameters
+
+    Other callables (builtins, partials, bound methods, classes and
+        callable objects) are logged as they are
     """
-    COPY_AND_APPEND = (2,)
-
-    """Keeps the old log file
-       Appends if there's already a file in the destination
-       Creates a new file if not
+    if type(msg) is not FunctionType:
+        return False
+    code = msg.__code__
+    defaults = len(msg.__defaults__ or ())
+    kwdefaults = len(msg.__kwdefaults__ or {})
+    return (
+        code.co_argcount <= defaults and code.co_kwonlyargcount <= kwdefaults
+    )
+
+
+def _split_legacy_args(
+    msg: Any, args: tuple, kinds: tuple, values: tuple
+) -> tuple[tuple, tuple]:
+    """Splits the positional parameters of the old signatures off *args
+
+    Keeps calls like debug("msg", LogColor.RED, LogOutput.FILE) working.
+        A leading argument is taken as a parameter if it is an instance
+        of the expected type, None only if nothing but parameters
+        follow it and the message has no placeholder
+
+    Args:
+        msg (Any): Message of the call
+        args (tuple): Positional arguments after the message
+        kinds (tuple): Types of the old positional parameters, in order
+        values (tuple): Keyword values of the same parameters
+
+    Returns:
+        tuple[tuple, tuple]: (parameter values, message arguments)
     """
-    KEEP_AND_APPEND = (3,)
-
-    """Keeps the old log file
-       Creates a new file in the destination
-    """
-    KEEP_AND_INIT = (4,)
-
-    """Deletes the old log file
-       Creates a new file in the destination
-    """
-    DELETE_AND_INIT = (5,)
+    result = list(values)
+    index = 0
+    while index < len(args) and index < len(kinds):
+        value = args[index]
+        if not isinstance(value, kinds[index]):
+            if value is not None:
+                break
+            following = index + 1
+            rest = args[following:]
+            if len(rest) > len(kinds) - following:
+                break
+            if not all(map(isinstance, rest, kinds[following:])):
+                break
+            if isinstance(msg, str) and ("%" in msg or "{" in msg):
+                break
+        result[index] = value
+        index += 1
+    return tuple(result), args[index:]
 
 
 class Logger:
-    """The infamous ugly logger class"""
+    """The infamous ugly logger class
+
+    Concurrency model: log calls may come from any thread. The level
+        gates and the capture of a record (message, time, call site,
+        layout) need no lock. Writing is serialized by the io lock:
+        - sync mode: the record is appended to the pending records,
+            the thread which gets the io lock writes the pending records
+            of every thread as one batch, see _write
+        - async mode: the writer thread is the single writer
+        move(), rotate() and release() swap or close the handlers
+        while holding the io lock, so a record is either written to
+        the old file before or to the new file after the swap, never
+        to a closed handler. A record keeps the layout which was set
+        when it was logged, set_format() never applies half a layout
+    """
 
     # static definitions
     DEFAULT_CONSOLE_LOG_LEVEL: LogLevel = LogLevel.DEBUG
@@ -151,12 +182,13 @@ class Logger:
     DEFAULT_ERROR_COLOR: LogColor = LogColor.RED
     DEFAULT_CRITICAL_COLOR: LogColor = LogColor.MAGENTA
 
+    # strftime format of LogFormatBlock.DATETIME, %f prints milliseconds
     DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 
     # variables
     _logger: logging.Logger | None = None
-    _console_handler: logging.StreamHandler | None = None
-    _file_handler: logging.FileHandler | None = None
+    _console_handler: ConsoleHandler | None = None
+    _file_handler: FileHandler | CollectorHandler | None = None
     _format_arr: list = [
         "[",
         LogFormatBlock.NAME,
@@ -173,6 +205,8 @@ class Logger:
         ") ",
         LogFormatBlock.MESSAGE,
     ]
+    _compiled_format: CompiledFormat | None = None
+    _compiled_json: CompiledJsonFormat | None = None
 
     _name: str = ""
     _file: str | None = None
@@ -182,6 +216,42 @@ class Logger:
     DEFAULT_LOG_LEVEL: LogLevel = LogLevel.DEBUG
     _log_level: LogLevel = DEFAULT_LOG_LOG_LEVEL
 
+    # cached effective thresholds per output, see _refresh_thresholds
+    _console_level: int = _DISABLED
+    _file_level: int = _DISABLED
+    _min_level: int = _DISABLED
+    _binary_file: bool = False
+
+    # time source of the records and the DATETIME renderer
+    _clock: Callable[[], float] = time.time
+    _timestamp: TimestampRenderer | None = None
+
+    # background writer of the async mode
+    _writer: AsyncWriter | None = None
+
+    # file output options
+    _file_sink: LogFileSink = LogFileSink.STREAM
+    _file_format: LogFileFormat = LogFileFormat.TEXT
+    _buffer_size: int = BufferedFileHandler.DEFAULT_BUFFER_SIZE
+    _flush_interval: float = BufferedFileHandler.DEFAULT_FLUSH_INTERVAL
+    _flush_level: LogLevel = LogLevel.ERROR
+    _segment_size: int = MmapFileHandler.DEFAULT_SEGMENT_SIZE
+    _max_bytes: int = 0
+    _rotate_interval: float = 0
+    _backup_count: int = FileHandler.DEFAULT_BACKUP_COUNT
+    _rotate_option: LogRotateOption = LogRotateOption.NUMBERED
+    _compression: LogCompression = LogCompression.NONE
+    _max_archive_bytes: int = 0
+    _index_block_size: int = 0
+    _multiprocess: bool = False
+    # ring of the calls below the level of the file, see dump()
+    _recorder: FlightRecorder | None = None
+    # counters and histograms, see set_metrics()
+    _metrics: LogMetrics | None = None
+    # records, bytes and time per call site, see set_profiling()
+    _profiler: LogProfiler | None = None
+    _profile_file: str | None = None
+
     def __init__(
         self,
         name: str,
@@ -189,6 +259,25 @@ class Logger:
         permanent: bool = False,
         append: bool = True,
         color_mode: LogColorMode = LogColorMode.COLORED,
+        async_mode: bool = False,
+        queue_size: int = AsyncWriter.DEFAULT_QUEUE_SIZE,
+        overflow: LogOverflowPolicy = LogOverflowPolicy.BLOCK,
+        multiprocess: bool = False,
+        file_sink: LogFileSink = LogFileSink.STREAM,
+        file_format: LogFileFormat = LogFileFormat.TEXT,
+        buffer_size: int = BufferedFileHandler.DEFAULT_BUFFER_SIZE,
+        flush_interval: float = BufferedFileHandler.DEFAULT_FLUSH_INTERVAL,
+        flush_level: LogLevel = LogLevel.ERROR,
+        segment_size: int = MmapFileHandler.DEFAULT_SEGMENT_SIZE,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = FileHandler.DEFAULT_BACKUP_COUNT,
+        rotate_option: LogRotateOption = LogRotateOption.NUMBERED,
+        compression: LogCompression = LogCompression.NONE,
+        max_archive_bytes: int = 0,
+        index_block_size: int = 0,
+        dedup_window: float = 0,
+        flight_recorder: int = 0,
     ) -> None:
         """The Ugly Logger Constructor
 
@@ -202,15 +291,100 @@ class Logger:
                 but append to the files. Defaults to True.
             color_mode (LogColorMode, optional): Color mode to use
                 for console output. Defaults to LogColorMode.COLORED.
+            async_mode (bool, optional): Log calls only queue the record,
+                a background thread writes it. Defaults to False.
+            queue_size (int, optional): Maximum number of queued records
+                in async mode. Defaults to 10000.
+            overflow (LogOverflowPolicy, optional): What to do when the
+                queue is full in async mode.
+                Defaults to LogOverflowPolicy.BLOCK.
+            multiprocess (bool, optional): Processes which log to the
+                same file send the records to a single collector process,
+                which owns the file, its rotation and move().
+                Defaults to False.
+            file_sink (LogFileSink, optional): How the file is written.
+                Defaults to LogFileSink.STREAM.
+            file_format (LogFileFormat, optional): How the records of the
+                file are rendered, the BINARY sink ignores it.
+                Defaults to LogFileFormat.TEXT.
+            buffer_size (int, optional): Buffer size in bytes of the
+                BUFFERED sink. Defaults to 64 KiB.
+            flush_interval (float, optional): Seconds a record may wait
+                in the buffer of the BUFFERED sink, 0 disables.
+                Defaults to 1.0.
+            flush_level (LogLevel, optional): Records of this level or
+                above flush the buffer of the BUFFERED sink immediately
+                and dump the flight recorder. Defaults to LogLevel.ERROR.
+            segment_size (int, optional): Bytes the file of the MMAP sink
+                is preallocated and grown by. Defaults to 16 MiB.
+            max_bytes (int, optional): Rotates the log file before it
+                grows beyond this size, 0 disables. Defaults to 0.
+            rotate_interval (float, optional): Rotates the log file
+                every this many seconds, 0 disables. Defaults to 0.
+            backup_count (int, optional): Number of rotated generations
+                to keep. Defaults to 5.
+            rotate_option (LogRotateOption, optional): How the rotated
+                generations are kept. Defaults to LogRotateOption.NUMBERED.
+            compression (LogCompression, optional): Compresses rotated
+                generations and files kept by move() in the background.
+                Defaults to LogCompression.NONE.
+            max_archive_bytes (int, optional): Total size of the rotated
+                generations to keep, 0 disables. Defaults to 0.
+            index_block_size (int, optional): Maintains a sidecar index
+                of the log file with blocks of this many bytes, see
+                query(), 0 disables. Defaults to 0.
+            dedup_window (float, optional): Repeats of the previous
+                record of an output are counted instead of written, for
+                up to this many seconds, 0 disables. Defaults to 0.
+            flight_recorder (int, optional): Number of the calls below
+                the level of the file which are kept unformatted in a
+                ring, see dump(), 0 disables. Defaults to 0.
+
+        Raises:
+            ValueError: If multiprocess is used with LogFileSink.BINARY,
+                or index_block_size with multiprocess or LogFileSink.MMAP
         """
 
         if locale.getpreferredencoding().upper() != "UTF-8":
             locale.setlocale(locale.LC_ALL, "un_US.UTF-8")
-        Logger.DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+        if multiprocess and file_sink == LogFileSink.BINARY:
+            raise ValueError("the BINARY file sink can not be multiprocess")
+        if index_block_size > 0 and (
+            multiprocess or file_sink == LogFileSink.MMAP
+        ):
+            raise ValueError("the index needs a single process file sink")
 
         self._name = name
         self._log_level = Logger.DEFAULT_LOG_LOG_LEVEL
+        # held by the writer while dispatching and by move()
+        #   while the handlers are swapped
+        self._io_lock = threading.RLock()
+        # entries of the sync mode which wait for the io lock
+        self._pending: deque[LogEntry] = deque()
+        self._sampler: LogSampler | None = None
+        self._dedup = LogDedup(dedup_window) if dedup_window > 0 else None
+        if self._dedup is not None:
+            register_expiry(self)
+        if flight_recorder > 0:
+            self._recorder = FlightRecorder(flight_recorder)
+        self._file_sink = file_sink
+        self._file_format = file_format
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+        self._flush_level = flush_level
+        self._segment_size = segment_size
+        self._max_bytes = max_bytes
+        self._rotate_interval = rotate_interval
+        self._backup_count = backup_count
+        self._rotate_option = rotate_option
+        self._compression = compression
+        self._max_archive_bytes = max_archive_bytes
+        self._index_block_size = index_block_size
+        self._multiprocess = multiprocess
         self._init(file, permanent, append, color_mode)
+        if async_mode:
+            self._start_writer(queue_size, overflow)
 
     def __del__(self) -> None:
         """Destructor
@@ -219,6 +393,8 @@ class Logger:
         """
         if not self._permanent:
             self.release()
+        else:
+            self._stop_writer()
 
     def _init(
         self,
@@ -234,15 +410,15 @@ class Logger:
             self._file = self._logger._file  # type: ignore[attr-defined]
             self._permanent = self._logger._permanent  # type: ignore[attr-defined] # noqa: E501
             self.set_color_mode(self._logger._color_mode)  # type: ignore[attr-defined] # noqa: E501
+            self._load_file_options(self._logger._file_options)  # type: ignore[attr-defined] # noqa: E501
 
             for handler in self._logger.handlers:
-                if type(handler) is logging.StreamHandler:
-                    self._console_handler = handler
-                elif type(handler) is logging.FileHandler:
+                if isinstance(handler, (FileHandler, CollectorHandler)):
                     self._file_handler = handler
-                handler.setLevel(
-                    Logger.LogLevelToLoggingLevel(self._log_level)
-                )
+                elif isinstance(handler, ConsoleHandler):
+                    self._console_handler = handler
+            self._logger._instances.add(self)  # type: ignore[attr-defined]
+            self.set_log_level(self._log_level)
             return
 
         self._file = file
@@ -254,10 +430,14 @@ class Logger:
         self._logger._color_mode = color_mode  # type: ignore[attr-defined]
         self.set_color_mode(color_mode)
 
+        self._logger._file_options = self._save_file_options()  # type: ignore[attr-defined] # noqa: E501
+
+        # every Logger of the name, they share the handlers and their level
+        self._logger._instances = weakref.WeakSet([self])  # type: ignore[attr-defined] # noqa: E501
+
         self._logger.setLevel(Logger.LogLevelToLoggingLevel(self._log_level))
 
-        self._console_handler = logging.StreamHandler()
-        self._console_handler.addFilter(self._build_handler_filter("console"))
+        self._console_handler = ConsoleHandler()
         self._console_handler.setLevel(
             Logger.LogLevelToLoggingLevel(self._log_level)
         )
@@ -265,15 +445,149 @@ class Logger:
 
         if not (file is None or file == ""):
             file_mode: str = "a" if append else "w"
-            self._file_handler = logging.FileHandler(file, file_mode, "utf-8")
-            self._file_handler.addFilter(self._build_handler_filter("file"))
+            self._file_handler = self._create_file_handler(file, file_mode)
             self._file_handler.setLevel(
                 Logger.LogLevelToLoggingLevel(self._log_level)
             )
             self._logger.addHandler(self._file_handler)
 
+        self._refresh_thresholds()
+
+    def _save_file_options(self) -> dict:
+        return {
+            "file_sink": self._file_sink,
+            "file_format": self._file_format,
+            "buffer_size": self._buffer_size,
+            "flush_interval": self._flush_interval,
+            "flush_level": self._flush_level,
+            "segment_size": self._segment_size,
+            "max_bytes": self._max_bytes,
+            "rotate_interval": self._rotate_interval,
+            "backup_count": self._backup_count,
+            "rotate_option": self._rotate_option,
+            "compression": self._compression,
+            "max_archive_bytes": self._max_archive_bytes,
+            "index_block_size": self._index_block_size,
+            "multiprocess": self._multiprocess,
+        }
+
+    def _load_file_options(self, options: dict) -> None:
+        for key, value in options.items():
+            setattr(self, "_" + key, value)
+
+    def _create_file_handler(
+        self, file: str, mode: str
+    ) -> FileHandler | CollectorHandler:
+        if self._multiprocess:
+            return CollectorHandler(file, mode, self._save_file_options())
+        return create_file_handler(file, mode, self._save_file_options())
+
+    def _refresh_thresholds(self) -> None:
+        """Recalculates the cached level gates of the outputs
+
+        A record below the threshold of an output is dropped
+            before any formatting happens
+        """
+        level = int(self._log_level)
+        self._console_level = (
+            level if self._console_handler is not None else _DISABLED
+        )
+        self._file_level = (
+            level if self._file_handler is not None else _DISABLED
+        )
+        self._min_level = min(self._console_level, self._file_level)
+        if self._recorder is not None and self._file_handler is not None:
+            # every call is recorded
+            self._min_level = _DEBUG
+        # the BINARY sink needs the call site whatever the layout is
+        self._binary_file = isinstance(self._file_handler, BinaryFileHandler)
+
+    def _start_writer(
+        self, queue_size: int, overflow: LogOverflowPolicy
+    ) -> None:
+        # the writer thread must not keep the logger alive,
+        #   otherwise __del__ would never release it
+        dispatch_ref = weakref.WeakMethod(self._dispatch_locked)
+
+        def dispatch(entries: list[LogEntry]) -> None:
+            method = dispatch_ref()
+            if method is not None:
+                method(entries)
+
+        self._writer = AsyncWriter(
+            dispatch, queue_size, overflow, name=f"uglylogger-{self._name}"
+        )
+
+    def _stop_writer(self) -> None:
+        writer = self._writer
+        if writer is not None:
+            self._writer = None
+            writer.close()
+
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped by the overflow policy in async mode"""
+        writer = self._writer
+        return 0 if writer is None else writer.dropped
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Writes every pending record
+
+        In async mode, waits until the queue is drained
+
+        Args:
+            timeout (float | None, optional): Seconds to wait at most
+                in async mode. Defaults to None (wait forever).
+
+        Returns:
+            bool: True if nothing is pending anymore
+        """
+        drained = True
+        writer = self._writer
+        if writer is not None:
+            drained = writer.flush(timeout)
+        self._expire_repeats()
+        with self._io_lock:
+            for handler in (self._console_handler, self._file_handler):
+                if handler is not None:
+                    handler.flush()
+        return drained
+
     def release(self) -> None:
-        """Releases the resources of the logger, like handlers etc."""
+        """Releases the resources of the logger, like handlers etc.
+
+        In async mode, the pending records are written first,
+            the counts of the suppressed records before them.
+            The report of the profile is written last
+        """
+        sampler = self._sampler
+        if sampler is not None:
+            self._log_summaries(sampler.take_summaries(force=True))
+        if self._metrics is not None:
+            unregister_export(self._metrics)
+        self._stop_writer()
+        unregister_expiry(self)
+        with self._io_lock:
+            if self._dedup is not None:
+                self._dispatch(self._dedup.drain(), dedup=False)
+            self._release_handlers()
+        if unregister_exit_report(self):
+            self.dump_profile()
+
+    def _expire_repeats(self) -> None:
+        """Writes the counts of the repeats whose window is over"""
+        dedup = self._dedup
+        if dedup is None:
+            return
+        with self._io_lock:
+            expired = dedup.expire(self._clock())
+            if expired:
+                self._dispatch(expired, dedup=False)
+
+    def _release_handlers(self, refresh: bool = True) -> None:
+        # refresh=False keeps the level gates of the released handlers,
+        #   records logged while move() swaps the handlers wait for the
+        #   io lock and go to the new file
         if self._console_handler is not None:
             self._console_handler.close()
             if self._logger is not None:
@@ -286,8 +600,12 @@ class Logger:
                 self._logger.removeHandler(self._file_handler)
             # del self._file_handler
             self._file_handler = None
+        if self._logger is not None:
+            self._logger._instances.discard(self)  # type: ignore[attr-defined] # noqa: E501
         del self._logger
         self._logger = None
+        if refresh:
+            self._refresh_thresholds()
 
         self._file = None
         self._color_mode = LogColorMode.COLORED
@@ -301,6 +619,211 @@ class Logger:
         if self._logger is not None:
             for handler in self._logger.handlers:
                 handler.setLevel(Logger.LogLevelToLoggingLevel(level))
+            # the handlers are shared, so are the level gates
+            for logger in list(self._logger._instances):  # type: ignore[attr-defined] # noqa: E501
+                if logger is not self:
+                    logger._log_level = level
+                    logger._refresh_thresholds()
+        self._refresh_thresholds()
+
+    def set_sampling(
+        self, *rules: LogSampling, summary_interval: float = 10.0
+    ) -> None:
+        """Sets the sampling rules, no rule disables the sampling
+
+        Records are checked before they are captured, a suppressed
+            record is never formatted. Every summary_interval seconds,
+            a "suppressed K similar messages" record is logged per key,
+            at the next log call or at release()
+
+        Args:
+            *rules (LogSampling): The first rule of a level wins
+            summary_interval (float, optional): Seconds between two
+                summaries. Defaults to 10.0.
+        """
+        sampler = self._sampler
+        if sampler is not None:
+            self._log_summaries(sampler.take_summaries(force=True))
+        self._sampler = LogSampler(rules, summary_interval) if rules else None
+
+    def set_metrics(
+        self,
+        enabled: bool = True,
+        file: str | None = None,
+        interval: float = 15.0,
+    ) -> None:
+        """Turns the metrics on or off, see stats()
+
+        While they are off, the log calls do not touch them at all.
+            Turning them on again starts from zero. The counters see
+            every record, the histograms one of every
+            LogMetrics.TIME_EVERY records
+
+        Args:
+            enabled (bool, optional): Defaults to True.
+            file (str | None, optional): Exports the metrics in the
+                Prometheus text format to the file every interval
+                seconds. Defaults to None.
+            interval (float, optional): Seconds between two exports.
+                Defaults to 15.0.
+
+        Raises:
+            ValueError: interval is not positive
+        """
+        if self._metrics is not None:
+            unregister_export(self._metrics)
+        self._metrics = LogMetrics(self) if enabled else None
+        if self._metrics is not None and file is not None:
+            register_export(self._metrics, file, interval)
+
+    def stats(self) -> dict:
+        """Snapshot of the metrics
+
+        Returns:
+            dict: records per level and output, records filtered by the
+                level, records dropped by the queue, bytes per sink and
+                the histograms of the time spent formatting, looking up
+                the call site and writing. Empty if the metrics are off
+        """
+        metrics = self._metrics
+        if metrics is None:
+            return {}
+        return metrics.snapshot(self.dropped)
+
+    def export_metrics(self, file: str | None = None) -> None:
+        """Writes the metrics in the Prometheus text format
+
+        The file is replaced atomically
+
+        Args:
+            file (str | None, optional): Defaults to None (the file
+                of set_metrics()).
+        """
+        metrics = self._metrics
+        if metrics is None:
+            return
+        file = file or metrics.export_file
+        if file is not None:
+            write_atomic(file, to_prometheus(self._name, self.stats()))
+
+    def set_profiling(
+        self, enabled: bool = True, file: str | None = None
+    ) -> None:
+        """Turns the profile of the call sites on or off, see profile()
+
+        The records, the bytes written and the time spent formatting
+            are counted per call site. Every record looks up its call
+            site while the profile is on. The report is written by
+            release() or at exit
+
+        Args:
+            enabled (bool, optional): Defaults to True.
+            file (str | None, optional): File of the report.
+                Defaults to None (stderr).
+        """
+        self._profiler = LogProfiler() if enabled else None
+        self._profile_file = file
+        if enabled:
+            register_exit_report(self)
+        else:
+            unregister_exit_report(self)
+
+    def profile(
+        self,
+        sort: LogProfileSort = LogProfileSort.BYTES,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Call sites of the profile, the biggest first
+
+        Args:
+            sort (LogProfileSort, optional): Defaults to
+                LogProfileSort.BYTES.
+            limit (int | None, optional): Number of the call sites.
+                Defaults to None (every call site).
+
+        Returns:
+            list[dict]: site ("file:line function"), records, bytes and
+                format_seconds per call site. Empty if the profile is off
+        """
+        profiler = self._profiler
+        if profiler is None:
+            return []
+        return profiler.top(sort, limit)
+
+    def dump_profile(
+        self,
+        file: str | None = None,
+        sort: LogProfileSort = LogProfileSort.BYTES,
+        limit: int | None = 20,
+    ) -> None:
+        """Writes the report of the profile
+
+        Args:
+            file (str | None, optional): Defaults to None (the file
+                of set_profiling(), or stderr).
+            sort (LogProfileSort, optional): Defaults to
+                LogProfileSort.BYTES.
+            limit (int | None, optional): Number of the call sites.
+                Defaults to 20.
+        """
+        profiler = self._profiler
+        if profiler is None:
+            return
+        report = profiler.report(self._name, sort, limit)
+        file = file or self._profile_file
+        if file is None:
+            sys.stderr.write(report)
+        else:
+            write_atomic(file, report)
+
+    def query(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        levels: Iterable[LogLevel] | None = None,
+    ) -> list[str]:
+        """Finds records of the log file with its sidecar index
+
+        Only the blocks of the file which can contain a matching record
+            are read, see uglylogger.index
+
+        Args:
+            since (float | None, optional): Seconds since the epoch, older
+                records are skipped. Defaults to None.
+            until (float | None, optional): Seconds since the epoch,
+                records created at or after it are skipped.
+                Defaults to None.
+            levels (Iterable[LogLevel] | None, optional): Levels to find.
+                Defaults to None (every level).
+
+        Raises:
+            ValueError: The logger has no indexed file
+
+        Returns:
+            list[str]: The records, oldest first
+        """
+        file = self._file_handler
+        if not isinstance(file, FileHandler) or file.index is None:
+            raise ValueError("the log file is not indexed")
+        self.flush()
+        return list(query_index(file.baseFilename, since, until, levels))
+
+    def is_enabled_for(
+        self, level: LogLevel, output: LogOutput = LogOutput.ALL
+    ) -> bool:
+        """Checks if a record of the level would be emitted
+
+        Args:
+            level (LogLevel): Level of the record
+            output (LogOutput, optional): Outputs to check.
+                Defaults to LogOutput.ALL.
+
+        Returns:
+            bool: True if at least one of the outputs accepts the level
+        """
+        if LogOutput.CONSOLE in output and level >= self._console_level:
+            return True
+        return LogOutput.FILE in output and level >= self._file_level
 
     @staticmethod
     def LogLevelToColor(level: LogLevel) -> LogColor:
@@ -342,6 +865,14 @@ class Logger:
         """
         return dt.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
 
+    def set_clock(self, clock: LogClock) -> None:
+        """Sets the time source of the records
+
+        Args:
+            clock (LogClock): Clock to use
+        """
+        self._clock = make_clock(clock)
+
     def set_color_mode(self, mode: LogColorMode) -> None:
         """Sets the color mode
 
@@ -350,82 +881,167 @@ class Logger:
         """
         self._colored = mode == LogColorMode.COLORED
 
-    def _build_handler_filter(
-        self, handler: str
-    ) -> Callable[[LogRecord], bool]:
-        def handler_filter(record: LogRecord) -> bool:
-            if hasattr(record, "block"):
-                if record.block == handler:
-                    return False
-            return True
-
-        return handler_filter
-
     def _color_str(self, color: LogColor) -> str:
         color_seq = "\033[1;%dm"
         return color_seq % (30 + int(color))
 
-    def _msg_to_str(self, msg: Any) -> str:
-        return str(msg, "utf-8") if type(msg) is bytes else str(msg)
-
-    def _get_file_line_func(self) -> Tuple[str | None, str | None, int | None]:
-        stack = inspect.stack()
-        this_fil = str(stack[1][1])
-        fil = None
-        lin = None
-        fun = None
-        index = 0
-        while True:
-            if index < len(stack):
-                fil = stack[index][1]
-                lin = stack[index][2]
-                fun = stack[index][3]
-
-                if fil == this_fil:
-                    index += 1
-                else:
-                    return (fil, fun, lin)
-            else:  # pragma: no cover
-                break  # pragma: no cover
+    def _msg_to_str(self, msg: Any, args: tuple = ()) -> str:
+        """Evaluates a message
 
-        return (None, None, None)  # pragma: no cover
+        Only called for records which are emitted
 
-    def _format(self, msg: Any, level: LogLevel) -> str:
-        formatted = ""
-        fil = None
-        fun = None
-        lin = None
-        for item in self._format_arr:
-            if type(item) is LogFormatBlock:
-                match item:
-                    case LogFormatBlock.NAME:
-                        formatted += self._name
-                    case LogFormatBlock.LEVEL:
-                        formatted += str(level)
-                    case LogFormatBlock.DATETIME:
-                        formatted += Logger.DateTimeToStr(datetime.now())
-                    case LogFormatBlock.MESSAGE:
-                        formatted += self._msg_to_str(msg)
-                    case LogFormatBlock.FILE:
-                        if fil is None:  # Lazy init
-                            fil, fun, lin = self._get_file_line_func()
-                            # formatted += str(fil)
-                            if fil is not None:
-                                formatted += os.path.basename(fil)
-                    case LogFormatBlock.LINE:
-                        if fil is None:  # Lazy init
-                            fil, fun, lin = self._get_file_line_func()
-                        if lin is not None:
-                            formatted += str(lin)
-                    case LogFormatBlock.FUNCTION:
-                        if fil is None:  # Lazy init
-                            fil, fun, lin = self._get_file_line_func()
-                        if fun is not None:
-                            formatted += str(fun)
-            else:
-                formatted += str(item)
+        Args:
+            msg (Any): Message, a function or lambda without required
+                parameters is called first
+            args (tuple, optional): %-style or {}-style arguments.
+                Defaults to ().
+
+        Returns:
+            str: The message
+        """
+        if _is_deferred(msg):
+            msg = msg()
+        text = str(msg, "utf-8") if type(msg) is bytes else str(msg)
+        if args:
+            return _interpolate(text, args)
+        return text
+
+    def _compile_format(self) -> CompiledFormat:
+        compiled = compile_format(self._format_arr)
+        self._compiled_format = compiled
+        return compiled
+
+    def _capture(
+        self,
+        msg: Any,
+        args: tuple,
+        level: LogLevel,
+        color: LogColor | None,
+        outputs: int,
+    ) -> LogEntry:
+        """Captures everything that depends on the moment of the call
+
+        The call site is only resolved if the layout prints it
+        """
+        metrics = self._metrics
+        if self._profiler is not None or (
+            metrics is not None and metrics.timing
+        ):
+            return self._capture_timed(msg, args, level, color, outputs)
+        entry = LogEntry(
+            level, self._msg_to_str(msg, args), self._clock(), color, outputs
+        )
+        compiled = self._compiled_format
+        if compiled is None or compiled.layout is not self._format_arr:
+            compiled = self._compile_format()
+        if compiled.uses_site or (outputs & _FILE and self._binary_file):
+            entry.code, entry.line = find_call_site()
+        entry.compiled = compiled
+        return entry
+
+    def _capture_timed(
+        self,
+        msg: Any,
+        args: tuple,
+        level: LogLevel,
+        color: LogColor | None,
+        outputs: int,
+    ) -> LogEntry:
+        # _capture() with the time of the message and the call site,
+        #   for the metrics and the profile, which needs every call site
+        metrics = self._metrics
+        if metrics is not None and not metrics.timing:
+            metrics = None
+        profiler = self._profiler
+        start = time.perf_counter_ns()
+        text = self._msg_to_str(msg, args)
+        format_ns = time.perf_counter_ns() - start
+        entry = LogEntry(level, text, self._clock(), color, outputs)
+        if metrics is not None:
+            entry.format_ns = format_ns
+        compiled = self._compiled_format
+        if compiled is None or compiled.layout is not self._format_arr:
+            compiled = self._compile_format()
+        needs_site = compiled.uses_site or profiler is not None
+        if needs_site or (outputs & _FILE and self._binary_file):
+            start = time.perf_counter_ns()
+            entry.code, entry.line = find_call_site()
+            if metrics is not None:
+                metrics.caller.observe(time.perf_counter_ns() - start)
+        if profiler is not None:
+            profiler.site(entry.code, entry.line).format_ns += format_ns
+        entry.compiled = compiled
+        return entry
+
+    def _current_format(self, entry: LogEntry) -> CompiledFormat:
+        # the layout of the call, or the current one for entries
+        #   which were not captured by this logger
+        compiled = entry.compiled
+        if compiled is not None:
+            return compiled
+        compiled = self._compiled_format
+        # identity check, so that assigning _format_arr directly
+        #   invalidates the cache as well
+        if compiled is None or compiled.layout is not self._format_arr:
+            compiled = self._compile_format()
+        return compiled
+
+    def _render(self, entry: LogEntry) -> str:
+        compiled = entry.compiled or self._current_format(entry)
+        fil, lin, fun, dt = self._render_fields(
+            entry, compiled.uses_site, compiled.uses_datetime
+        )
+        return compiled.render(
+            self._name,
+            _LEVEL_NAMES[entry.level],
+            dt,
+            entry.msg,
+            fil,
+            lin,
+            fun,
+        )
+
+    def _render_json(self, entry: LogEntry) -> str:
+        layout = self._current_format(entry).layout
+        compiled = self._compiled_json
+        if compiled is None or compiled.layout is not layout:
+            compiled = compile_json_format(layout)
+            self._compiled_json = compiled
+        fil, lin, fun, dt = self._render_fields(
+            entry, compiled.uses_site, compiled.uses_datetime
+        )
+        record = compiled.render(
+            self._name,
+            _LEVEL_NAMES[entry.level],
+            dt,
+            entry.msg,
+            fil,
+            lin,
+            fun,
+        )
+        if entry.extra:
+            return compiled.render_extra(record, entry.extra)
+        return record
+
+    def _render_fields(
+        self, entry: LogEntry, uses_site: bool, uses_datetime: bool
+    ) -> tuple[str, int | str, str, str]:
+        # (file, line, function, datetime) of an entry, empty if unused
+        fil = fun = dt = ""
+        lin: int | str = ""
+        if uses_site and entry.code is not None:
+            fil, fun = describe_code(entry.code)
+            lin = entry.line
+        if uses_datetime:
+            renderer = self._timestamp
+            if renderer is None or renderer.fmt != Logger.DATETIME_FORMAT:
+                renderer = TimestampRenderer(Logger.DATETIME_FORMAT)
+                self._timestamp = renderer
+            dt = renderer.render(entry.created)
+        return fil, lin, fun, dt
 
-        return formatted
+    def _format(self, msg: Any, level: LogLevel) -> str:
+        return self._render(self._capture(msg, (), level, None, 0))
 
     def _colored_format(
         self, msg: Any, color: LogColor, level: LogLevel
@@ -436,8 +1052,344 @@ class Logger:
             )
         return self._format(msg, level)
 
+    def _log(
+        self,
+        level: LogLevel,
+        msg: Any,
+        args: tuple,
+        color: LogColor | None,
+        outputs: int,
+        extra: dict | None = None,
+    ) -> None:
+        """Captures a log call once and dispatches it to the outputs
+
+        Args:
+            level (LogLevel): Level of the record
+            msg (Any): Message to log
+            args (tuple): Arguments of the message
+            color (LogColor | None): Color to overwrite
+            outputs (int): LogOutput value
+            extra (dict | None, optional): Structured fields.
+                Defaults to None.
+        """
+        if outputs & _CONSOLE and level < self._console_level:
+            outputs &= ~_CONSOLE
+        if outputs & _FILE and level < self._file_level:
+            outputs &= ~_FILE
+            if self._recorder is not None and self._file_handler is not None:
+                self._record(level, msg, args, color, extra)
+        if not outputs:
+            if self._metrics is not None:
+                self._metrics.filtered[level] += 1
+            return
+        sampler = self._sampler
+        if sampler is not None:
+            keep = sampler.check(level, msg, outputs)
+            if sampler.summary_due:
+                self._log_summaries(sampler.take_summaries())
+            if not keep:
+                return
+        if self._recorder is not None and outputs & _FILE:
+            if level >= self._flush_level:
+                self.dump()
+        if self._metrics is not None:
+            self._metrics.count(level, outputs)
+        entry = self._capture(msg, args, level, color, outputs)
+        entry.extra = extra
+        writer = self._writer
+        if writer is None:
+            self._write(entry)
+        else:
+            writer.put(entry)
+
+    def _record(
+        self,
+        level: LogLevel,
+        msg: Any,
+        args: tuple,
+        color: LogColor | None,
+        extra: dict | None,
+    ) -> None:
+        # like _capture(), without evaluating the message
+        compiled = self._compiled_format
+        if compiled is None or compiled.layout is not self._format_arr:
+            compiled = self._compile_format()
+        code, line = None, 0
+        if compiled.uses_site or self._binary_file or self._profiler:
+            code, line = find_call_site()
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record(
+                level,
+                msg,
+                args,
+                self._clock(),
+                code,
+                line,
+                color,
+                extra,
+                compiled,
+            )
+
+    def dump(self) -> None:
+        """Writes the calls of the flight recorder to the file
+
+        The messages are evaluated now, the recorded calls are written
+            whatever the level of the file is, oldest first.
+            Called by every record of flush_level or above
+        """
+        recorder = self._recorder
+        if recorder is None or self._file_handler is None:
+            return
+        entries = []
+        for (
+            level,
+            msg,
+            args,
+            created,
+            code,
+            line,
+            color,
+            extra,
+            compiled,
+        ) in recorder.take():
+            entries.append(
+                LogEntry(
+                    level,
+                    self._msg_to_str(msg, args),
+                    created,
+                    color,
+                    _FILE | _REPLAY,
+                    code,
+                    line,
+                    extra,
+                    compiled,
+                )
+            )
+        if not entries:
+            return
+        writer = self._writer
+        if writer is None:
+            # written as one batch by the last one
+            self._pending.extend(entries[:-1])
+            self._write(entries[-1])
+        else:
+            for entry in entries:
+                writer.put(entry)
+
+    def _log_summaries(self, summaries: list[tuple]) -> None:
+        # the summaries are never sampled themselves
+        for level, outputs, text in summaries:
+            entry = self._capture(text, (), level, None, outputs)
+            writer = self._writer
+            if writer is None:
+                self._write(entry)
+            else:
+                writer.put(entry)
+
+    def _write(self, entry: LogEntry) -> None:
+        """Writes an entry before the log call returns
+
+        The entry is appended to the pending entries without a lock,
+            the thread which gets the io lock writes every pending entry
+            as one batch. A thread which waited for the lock may find
+            its entry written already
+        """
+        pending = self._pending
+        pending.append(entry)
+        with self._io_lock:
+            count = len(pending)
+            if count == 1:
+                self._dispatch([pending.popleft()])
+            elif count:
+                popleft = pending.popleft
+                self._dispatch([popleft() for _ in range(count)])
+
+    def _dispatch_locked(self, entries: list[LogEntry]) -> None:
+        with self._io_lock:
+            self._dispatch(entries)
+
+    def _dispatch(self, entries: list[LogEntry], dedup: bool = True) -> None:
+        """Renders every entry once and writes them to their outputs
+
+        The console variant wraps the same body with the color codes,
+            each output gets a single write for the whole batch.
+            The JSONL file format renders its own variant, the BINARY
+            file sink gets the entries, they are not rendered.
+            Repeats are collapsed before anything is rendered
+        """
+        console = self._console_handler
+        file = self._file_handler
+        metrics = self._metrics
+        # the batch is timed if one of its entries is
+        timed = False
+        if dedup and self._dedup is not None:
+            entries = self._dedup.apply(
+                entries,
+                file.level if file is not None else _DISABLED,
+                console.level if console is not None else _DISABLED,
+            )
+        binary = self._binary_file
+        json = not binary and self._file_format == LogFileFormat.JSONL
+        colored = self._colored
+        console_lines: list[str] = []
+        file_lines: list[str] = []
+        file_entries: list[LogEntry] = []
+        file_max_level = 0
+        # (span, first line) of the runs of text lines with one layout
+        spans: list[tuple[IndexSpan, int]] | None = None
+        indexed: FileHandler | None = None
+        if isinstance(file, FileHandler) and file.index is not None:
+            indexed = file
+            spans = []
+        profiler = self._profiler
+        for entry in entries:
+            try:
+                format_ns = entry.format_ns
+                if profiler is not None or format_ns is not None:
+                    begin = time.perf_counter_ns()
+                if profiler is not None:
+                    console_count = len(console_lines)
+                    file_count = len(file_lines)
+                    binary_count = len(file_entries)
+                level = entry.level
+                body: str | None = None
+                if entry.outputs & _FILE:
+                    if file is not None and (
+                        level >= file.level or entry.outputs & _REPLAY
+                    ):
+                        if binary:
+                            file_entries.append(entry)
+                        elif json:
+                            file_lines.append(self._render_json(entry))
+                        else:
+                            body = self._render(entry)
+                            file_lines.append(body)
+                        if spans is not None and not binary:
+                            self._add_to_span(
+                                spans, entry, len(file_lines) - 1, json
+                            )
+                        if level > file_max_level:
+                            file_max_level = level
+                if entry.outputs & _CONSOLE:
+                    if console is not None and level >= console.level:
+                        if body is None:
+                            body = self._render(entry)
+                        if colored:
+                            color = entry.color
+                            if color is None:
+                                color = Logger.LogLevelToColor(level)
+                            console_lines.append(
+                                f"{self._color_str(color)}{body}\033[0m"
+                            )
+                        else:
+                            console_lines.append(body)
+                if profiler is not None:
+                    lines = (
+                        console_lines[console_count:] + file_lines[file_count:]
+                    )
+                    if lines or len(file_entries) > binary_count:
+                        profiler.add_written(
+                            entry.code,
+                            entry.line,
+                            lines,
+                            time.perf_counter_ns() - begin,
+                        )
+                if format_ns is not None and metrics is not None:
+                    # the message and the render of one record
+                    metrics.format.observe(
+                        format_ns + time.perf_counter_ns() - begin
+                    )
+                    timed = True
+            except Exception:
+                # a record which can't be rendered is skipped,
+                #   the rest of the batch is still written
+                _report_error()
+        if timed:
+            rendered = time.perf_counter_ns()
+        if console is not None and console_lines:
+            text = "\n".join(console_lines)
+            console.write(text)
+            if metrics is not None:
+                metrics.add_bytes("console", text)
+        if file is not None and file_lines:
+            if spans is None:
+                texts = ["\n".join(file_lines)]
+                file.write(texts[0], file_max_level)
+            else:
+                # one write per run, a block of the index has one layout
+                ends = [start for _, start in spans[1:]] + [len(file_lines)]
+                texts = []
+                for (span, start), end in zip(spans, ends):
+                    texts.append("\n".join(file_lines[start:end]))
+                    file.write(texts[-1], file_max_level, span)
+            if metrics is not None:
+                for text in texts:
+                    metrics.add_bytes(SINK_NAMES[self._file_sink], text)
+        if file_entries and isinstance(file, BinaryFileHandler):
+            # one write per run of entries with the same layout,
+            #   one write per entry for the bytes of the profile
+            runs: list[tuple[str, list[LogEntry]]] = []
+            for entry in file_entries:
+                text = self._current_format(entry).text
+                if runs and runs[-1][0] == text and profiler is None:
+                    runs[-1][1].append(entry)
+                else:
+                    runs.append((text, [entry]))
+            written = 0
+            for text, run in runs:
+                run_span: IndexSpan | None = None
+                if indexed is not None:
+                    run_span = IndexSpan(BINARY_FORMAT)
+                    for entry in run:
+                        run_span.add(entry.created, entry.level)
+                size = file.write_entries(
+                    run,
+                    self._name,
+                    text,
+                    Logger.DATETIME_FORMAT,
+                    file_max_level,
+                    run_span,
+                )
+                written += size
+                if profiler is not None:
+                    profiler.site(run[0].code, run[0].line).bytes += size
+            if metrics is not None:
+                sink = SINK_NAMES[self._file_sink]
+                metrics.bytes[sink] = metrics.bytes.get(sink, 0) + written
+        if timed and metrics is not None:
+            metrics.io.observe(time.perf_counter_ns() - rendered)
+
+    def _add_to_span(
+        self,
+        spans: list[tuple[IndexSpan, int]],
+        entry: LogEntry,
+        line: int,
+        json: bool,
+    ) -> None:
+        # adds a text or JSONL file entry to the span of its layout
+        layout = "" if json else self._current_format(entry).text
+        if spans:
+            span = spans[-1][0]
+            if span.format[1] == layout:
+                span.add(entry.created, entry.level)
+                return
+        kind = "jsonl" if json else "text"
+        span = IndexSpan((kind, layout, Logger.DATETIME_FORMAT))
+        span.add(entry.created, entry.level)
+        spans.append((span, line))
+
     def set_format(self, fmt: list = []) -> None:
+        """Sets the layout of the records
+
+        The layout is compiled once here, see uglylogger.formatter
+
+        Args:
+            fmt (list, optional): LogFormatBlock items and literals.
+                Defaults to [].
+        """
         self._format_arr = fmt
+        self._compile_format()
 
     def console_oneline(
         self,
@@ -453,12 +1405,10 @@ class Logger:
             print("\r" + " " * console_width, end="\r", flush=True)
             return
 
-        msg_len = len(msg_str)
-        msg_to_print = ""
-        if msg_len > console_width:
+        if len(msg_str) > console_width:
             msg_to_print = msg_str[: console_width - 3] + "..."
         else:
-            msg_to_print = msg_str + " " * (console_width - msg_len)
+            msg_to_print = msg_str.ljust(console_width)
 
         if self._colored == LogColorMode.COLORED:
             c: LogColor = color
@@ -476,280 +1426,344 @@ class Logger:
                 flush=True,
             )
 
+    def _console_end_line(self) -> None:
+        # ends the line of console_oneline()
+        print(flush=True)
+
+    def progress(
+        self,
+        refresh_rate: float = LogProgress.DEFAULT_REFRESH_RATE,
+        console_width: int | None = None,
+        level: LogLevel = DEFAULT_CONSOLE_LOG_LEVEL,
+        line_interval: float | None = LogProgress.DEFAULT_LINE_INTERVAL,
+    ) -> LogProgress:
+        """Creates a throttled progress line, see LogProgress
+
+        Args:
+            refresh_rate (float, optional): Maximum number of renders
+                per second. Defaults to LogProgress.DEFAULT_REFRESH_RATE.
+            console_width (int | None, optional): Width of the line.
+                Defaults to None (width of the terminal).
+            level (LogLevel, optional): Defaults to LogLevel.DEBUG.
+            line_interval (float | None, optional): Seconds between two
+                lines when stdout is not a terminal, None to print
+                nothing. Defaults to LogProgress.DEFAULT_LINE_INTERVAL.
+
+        Returns:
+            LogProgress: The renderer, close it or use it in a with block
+        """
+        return LogProgress(
+            self, refresh_rate, console_width, level, line_interval
+        )
+
     def console(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         level: LogLevel = DEFAULT_CONSOLE_LOG_LEVEL,
     ) -> None:
-        if self._logger is None:
-            return  # pragma: no cover
-        match level:
-            case LogLevel.DEBUG:
-                d_color = (
-                    color if color is not None else Logger.DEFAULT_DEBUG_COLOR
-                )
-                self._logger.debug(
-                    self._colored_format(msg, d_color, LogLevel.DEBUG),
-                    extra={"block": "file"},
-                )
-            case LogLevel.INFO:
-                d_color = (
-                    color if color is not None else Logger.DEFAULT_INFO_COLOR
-                )
-                self._logger.info(
-                    self._colored_format(msg, d_color, LogLevel.INFO),
-                    extra={"block": "file"},
-                )
-            case LogLevel.WARNING:
-                d_color = (
-                    color
-                    if color is not None
-                    else Logger.DEFAULT_WARNING_COLOR
-                )
-                self._logger.warning(
-                    self._colored_format(msg, d_color, LogLevel.WARNING),
-                    extra={"block": "file"},
-                )
-            case LogLevel.ERROR:
-                d_color = (
-                    color if color is not None else Logger.DEFAULT_ERROR_COLOR
-                )
-                self._logger.error(
-                    self._colored_format(msg, d_color, LogLevel.ERROR),
-                    extra={"block": "file"},
-                )
-            case LogLevel.CRITICAL:
-                d_color = (
-                    color
-                    if color is not None
-                    else Logger.DEFAULT_CRITICAL_COLOR
-                )
-                self._logger.critical(
-                    self._colored_format(msg, d_color, LogLevel.CRITICAL),
-                    extra={"block": "file"},
-                )
+        """Logs to console, but does not log to the file
+
+        Args:
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
+            color (LogColor | None, optional): Color to overwrite,
+                otherwise uses color by the LogLevel. Defaults to None.
+            level (LogLevel, optional): Defaults to LogLevel.DEBUG.
+        """
+        if args:
+            (color, level), args = _split_legacy_args(
+                msg, args, (LogColor, LogLevel), (color, level)
+            )
+        if level < self._console_level:
+            return
+        self._log(level, msg, args, color, _CONSOLE)
 
-    def file(self, msg: Any, level: LogLevel = DEFAULT_FILE_LOG_LEVEL) -> None:
+    def file(
+        self,
+        msg: Any,
+        *args: Any,
+        level: LogLevel = DEFAULT_FILE_LOG_LEVEL,
+        extra: dict | None = None,
+    ) -> None:
         """Logs to file, but does not log to the console
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             level (LogLevel, optional): Defaults to LogLevel.DEBUG.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if self._logger is None:
-            return  # pragma: no cover
-        match level:
-            case LogLevel.DEBUG:
-                self._logger.debug(
-                    self._format(msg, LogLevel.DEBUG),
-                    extra={"block": "console"},
-                )
-            case LogLevel.INFO:
-                self._logger.info(
-                    self._format(msg, LogLevel.INFO),
-                    extra={"block": "console"},
-                )
-            case LogLevel.WARNING:
-                self._logger.warning(
-                    self._format(msg, LogLevel.WARNING),
-                    extra={"block": "console"},
-                )
-            case LogLevel.ERROR:
-                self._logger.error(
-                    self._format(msg, LogLevel.ERROR),
-                    extra={"block": "console"},
-                )
-            case LogLevel.CRITICAL:
-                self._logger.critical(
-                    self._format(msg, LogLevel.CRITICAL),
-                    extra={"block": "console"},
-                )
+        if args:
+            (level,), args = _split_legacy_args(
+                msg, args, (LogLevel,), (level,)
+            )
+        # the minimum level, the flight recorder sees the lower calls
+        if level < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[level] += 1
+            return
+        self._log(level, msg, args, None, _FILE, extra)
 
     def log(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         level: LogLevel = DEFAULT_LOG_LOG_LEVEL,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs both to the file and to the console
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor | None, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             level (LogLevel, optional): Defaults to LogLevel.DEBUG.
             output (LogOutput, optional): Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, level)
-        if LogOutput.FILE in output:
-            self.file(msg, level)
+        if args:
+            (color, level, output), args = _split_legacy_args(
+                msg,
+                args,
+                (LogColor, LogLevel, LogOutput),
+                (color, level, output),
+            )
+        if level < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[level] += 1
+            return
+        self._log(level, msg, args, color, output.value, extra)
 
     def debug(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs as debug
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             output (LogOutput, optional): Log to console, file or both.
                 Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, LogLevel.DEBUG)
-        if self._file_handler is not None and LogOutput.FILE in output:
-            self.file(msg, LogLevel.DEBUG)
+        if _DEBUG < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[_DEBUG] += 1
+            return
+        if args:
+            (color, output), args = _split_legacy_args(
+                msg, args, (LogColor, LogOutput), (color, output)
+            )
+        self._log(LogLevel.DEBUG, msg, args, color, output.value, extra)
 
     def info(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs as info
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             output (LogOutput, optional): Log to console, file or both.
                 Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, LogLevel.INFO)
-        if self._file_handler is not None and LogOutput.FILE in output:
-            self.file(msg, LogLevel.INFO)
+        if _INFO < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[_INFO] += 1
+            return
+        if args:
+            (color, output), args = _split_legacy_args(
+                msg, args, (LogColor, LogOutput), (color, output)
+            )
+        self._log(LogLevel.INFO, msg, args, color, output.value, extra)
 
     def warning(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs as warning
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             output (LogOutput, optional): Log to console, file or both.
                 Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, LogLevel.WARNING)
-        if self._file_handler is not None and LogOutput.FILE in output:
-            self.file(msg, LogLevel.WARNING)
+        if _WARNING < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[_WARNING] += 1
+            return
+        if args:
+            (color, output), args = _split_legacy_args(
+                msg, args, (LogColor, LogOutput), (color, output)
+            )
+        self._log(LogLevel.WARNING, msg, args, color, output.value, extra)
 
     def error(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs as error
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             output (LogOutput, optional): Log to console, file or both.
                 Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, LogLevel.ERROR)
-        if self._file_handler is not None and LogOutput.FILE in output:
-            self.file(msg, LogLevel.ERROR)
+        if _ERROR < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[_ERROR] += 1
+            return
+        if args:
+            (color, output), args = _split_legacy_args(
+                msg, args, (LogColor, LogOutput), (color, output)
+            )
+        self._log(LogLevel.ERROR, msg, args, color, output.value, extra)
 
     def critical(
         self,
         msg: Any,
+        *args: Any,
         color: LogColor | None = None,
         output: LogOutput = LogOutput.ALL,
+        extra: dict | None = None,
     ) -> None:
         """Logs as critical
 
         Args:
-            msg (Any): Message to log
+            msg (Any): Message to log, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message
             color (LogColor, optional): Color to overwrite,
                 otherwise uses color by the LogLevel. Defaults to None.
             output (LogOutput, optional): Log to console, file or both.
                 Defaults to LogOutput.ALL.
+            extra (dict | None, optional): Structured fields of the
+                JSONL file format. Defaults to None.
         """
-        if LogOutput.CONSOLE in output:
-            self.console(msg, color, LogLevel.CRITICAL)
-        if self._file_handler is not None and LogOutput.FILE in output:
-            self.file(msg, LogLevel.CRITICAL)
+        if _CRITICAL < self._min_level:
+            if self._metrics is not None:
+                self._metrics.filtered[_CRITICAL] += 1
+            return
+        if args:
+            (color, output), args = _split_legacy_args(
+                msg, args, (LogColor, LogOutput), (color, output)
+            )
+        self._log(LogLevel.CRITICAL, msg, args, color, output.value, extra)
 
     def move(
         self,
         new_file: str,
         option: LogMoveOption = LogMoveOption.MOVE_AND_APPEND,
+        compression: LogCompression | None = None,
     ) -> None:
         """Moves the log file to a new destination
 
+        In multiprocess mode, the file of every process is moved
+
         Args:
             new_file (str): New Log File
             option (LogMoveOption): how to behave, Defaults to MOVE_AND_APPEND
                 otherwise uses color by the LogLevel. Defaults to None.
+            compression (LogCompression | None, optional): Compresses the
+                old file in the background if the option keeps it.
+                Defaults to None (compression of the constructor).
         """
 
         if self._file is None:
             return
+        if compression is None:
+            compression = self._compression
+        old_file = os.path.abspath(self._file)
+
+        # records which are already queued go to the old file
+        self.flush()
+        handler = self._file_handler
+        if isinstance(handler, CollectorHandler):
+            # the collector moves the file of every process
+            with self._io_lock:
+                self._file = handler.move(new_file, option, compression)
+            self._logger._file = self._file  # type: ignore[union-attr]
+            return
+        with self._io_lock:
+            self._move(new_file, option)
+
+        if option not in KEEPING_MOVE_OPTIONS or self._file == old_file:
+            return
+        # the old file is closed, it is compressed in the background
+        if os.path.exists(old_file):
+            archive_file(old_file, compression)
+
+    def rotate(self) -> None:
+        """Starts a new generation of the log file now
+
+        The old file is kept according to the LogRotateOption,
+            the console output is not touched
+        """
+        if self._file_handler is None:
+            return
 
+        # records which are already queued go to the old generation
+        self.flush()
+        with self._io_lock:
+            if self._file_handler is not None:
+                self._file_handler.rotate()
+
+    def _move(self, new_file: str, option: LogMoveOption) -> None:
+        if self._file is None:
+            return  # pragma: no cover
         permanent = self._permanent
         color_mode = self._color_mode
         old_file = self._file
-        self.release()
+        self._release_handlers(refresh=False)
 
         new_file_abs = os.path.abspath(new_file)
         # new_dir = os.path.dirname(new_file_abs)
         # if not os.path.exists(new_dir):
         #     os.makedirs(new_dir)
 
-        append: bool = False
-        match option:
-            case LogMoveOption.MOVE_AND_APPEND:
-                # delete if there's a file in the destionation
-                if os.path.exists(new_file_abs):
-                    os.remove(new_file_abs)
-                # move the file to the destination
-                shutil.move(old_file, new_file_abs)
-                # append to the new file
-                append = True
-            case LogMoveOption.COPY_AND_APPEND:
-                # delete if there's a file in the destionation
-                if os.path.exists(new_file_abs):
-                    os.remove(new_file_abs)
-                # copy the file to the destination
-                shutil.copy(old_file, new_file_abs)
-                # append to the new file
-                append = True
-            case LogMoveOption.KEEP_AND_APPEND:
-                # don't delete the old file
-                # don't delete if there's a file in the destionation
-                # append to the new/existing file
-                append = True
-            case LogMoveOption.DELETE_AND_INIT:
-                # delete the old file
-                os.remove(old_file)
-                # delete if there's a file in the destionation
-                if os.path.exists(new_file_abs):
-                    os.remove(new_file_abs)
-                # don't append to the new file
-                append = False
-            case LogMoveOption.KEEP_AND_INIT:
-                # don't delete the old file
-                # delete if there's a file in the destionation
-                if os.path.exists(new_file_abs):
-                    os.remove(new_file_abs)
-                # don't append to the new file
-                append = False
-
+        append = move_file(old_file, new_file_abs, option)
         self._init(new_file_abs, permanent, append, color_mode)
+
+
+register_internal(sys.modules[__name__])
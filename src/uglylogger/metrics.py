@@ -0,0 +1,260 @@
+import os
+import threading
+import time
+import weakref
+from typing import Any
+from .enums import _CONSOLE, _FILE, _LEVEL_NAMES, LogFileSink
+
+# the latency buckets are powers of two nanoseconds, from about 1 us
+#   (2 ** 10 ns) to about 1 s (2 ** 30 ns), the bucket of a value is
+#   its bit length, no search is needed
+_FIRST_BIT = 10
+_LAST_BIT = 30
+# upper bounds of the latency buckets in seconds
+BUCKETS: tuple[float, ...] = tuple(
+    2**bit / 1e9 for bit in range(_FIRST_BIT, _LAST_BIT + 1)
+)
+_INF = _LAST_BIT - _FIRST_BIT + 1
+# the "sink" label of the file, Enum.name is slow on the hot path
+SINK_NAMES: dict[LogFileSink, str] = {
+    sink: sink.name.lower() for sink in LogFileSink
+}
+
+
+class Histogram:
+    """Latency histogram with the fixed BUCKETS"""
+
+    __slots__ = ("counts", "sum_ns")
+
+    def __init__(self) -> None:
+        # the last bucket is +Inf
+        self.counts = [0] * (_INF + 1)
+        self.sum_ns = 0
+
+    def observe(self, ns: int) -> None:
+        bucket = ns.bit_length() - _FIRST_BIT
+        if bucket < 0:
+            bucket = 0
+        elif bucket > _INF:
+            bucket = _INF
+        self.counts[bucket] += 1
+        self.sum_ns += ns
+
+    def snapshot(self) -> dict:
+        """Returns the cumulative buckets, the sum and the count"""
+        buckets: dict[str, int] = {}
+        total = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), self.counts):
+            total += count
+            buckets[str(bound)] = total
+        return {
+            "buckets": buckets,
+            "sum": self.sum_ns / 1e9,
+            "count": total,
+        }
+
+
+class LogMetrics:
+    """Counters and histograms of a Logger
+
+    The counters are plain ints updated without a lock, a few
+        increments may be lost when many threads log at once.
+        Only one of every TIME_EVERY records is timed, the histograms
+        are a sample of the records. format and caller get one
+        observation per timed record, io one per written batch
+        which holds a timed record
+    """
+
+    TIME_EVERY: int = 16
+
+    def __init__(self, owner: Any) -> None:
+        """Creates the metrics
+
+        Args:
+            owner (Any): Logger of the metrics, only weakly referenced
+        """
+        # level -> [console, file]
+        self.records: dict[int, list[int]] = {
+            level: [0, 0] for level in _LEVEL_NAMES
+        }
+        self.filtered: dict[int, int] = {level: 0 for level in _LEVEL_NAMES}
+        # sink -> bytes, "console" or the name of the LogFileSink
+        self.bytes: dict[str, int] = {}
+        self.format = Histogram()
+        self.caller = Histogram()
+        self.io = Histogram()
+        self._owner = weakref.ref(owner)
+        self.calls = 0
+        # set by count() for the records which are timed
+        self.timing = True
+        self.export_file: str | None = None
+        self.export_interval = 0.0
+        self.next_export = 0.0
+
+    def count(self, level: int, outputs: int) -> None:
+        calls = self.calls + 1
+        self.calls = calls
+        self.timing = (calls - 1) % self.TIME_EVERY == 0
+        counts = self.records[level]
+        if outputs & _CONSOLE:
+            counts[0] += 1
+        if outputs & _FILE:
+            counts[1] += 1
+
+    def add_bytes(self, sink: str, text: str) -> None:
+        # the text and the terminator
+        size = len(text) if text.isascii() else len(text.encode("utf-8"))
+        self.bytes[sink] = self.bytes.get(sink, 0) + size + 1
+
+    def snapshot(self, dropped: int) -> dict:
+        """Returns a copy of the metrics
+
+        Args:
+            dropped (int): Records dropped by the queue of the async mode
+
+        Returns:
+            dict: records, filtered, dropped, bytes and the
+                format, caller and io histograms
+        """
+        return {
+            "records": {
+                _LEVEL_NAMES[level]: {"console": c[0], "file": c[1]}
+                for level, c in self.records.items()
+            },
+            "filtered": {
+                _LEVEL_NAMES[level]: count
+                for level, count in self.filtered.items()
+            },
+            "dropped": dropped,
+            "bytes": dict(self.bytes),
+            "format_seconds": self.format.snapshot(),
+            "caller_seconds": self.caller.snapshot(),
+            "io_seconds": self.io.snapshot(),
+        }
+
+    def export_if_due(self, now: float) -> None:
+        owner = self._owner()
+        if owner is None or self.export_file is None:
+            return
+        if now >= self.next_export:
+            self.next_export = now + self.export_interval
+            owner.export_metrics()
+
+
+def to_prometheus(name: str, stats: dict) -> str:
+    """Renders a stats() snapshot in the Prometheus text format
+
+    Args:
+        name (str): Name of the Logger, the "logger" label
+        stats (dict): Snapshot of Logger.stats()
+
+    Returns:
+        str: The exposition text
+    """
+    logger = _label(name)
+    lines = [
+        "# HELP uglylogger_records_total Records written per level "
+        "and output",
+        "# TYPE uglylogger_records_total counter",
+    ]
+    for level, outputs in stats["records"].items():
+        for output, count in outputs.items():
+            lines.append(
+                f'uglylogger_records_total{{logger="{logger}",'
+                f'level="{level}",output="{output}"}} {count}'
+            )
+    lines += [
+        "# HELP uglylogger_filtered_total Records dropped by the level",
+        "# TYPE uglylogger_filtered_total counter",
+    ]
+    for level, count in stats["filtered"].items():
+        lines.append(
+            f'uglylogger_filtered_total{{logger="{logger}",'
+            f'level="{level}"}} {count}'
+        )
+    lines += [
+        "# HELP uglylogger_dropped_total Records dropped by the full "
+        "queue of the async mode",
+        "# TYPE uglylogger_dropped_total counter",
+        f'uglylogger_dropped_total{{logger="{logger}"}} {stats["dropped"]}',
+        "# HELP uglylogger_written_bytes_total Bytes written per sink",
+        "# TYPE uglylogger_written_bytes_total counter",
+    ]
+    for sink, count in stats["bytes"].items():
+        lines.append(
+            f'uglylogger_written_bytes_total{{logger="{logger}",'
+            f'sink="{sink}"}} {count}'
+        )
+    for key, help_text in (
+        ("format_seconds", "Time spent formatting a record"),
+        ("caller_seconds", "Time spent looking up the call site"),
+        ("io_seconds", "Time spent writing a batch of records"),
+    ):
+        metric = f"uglylogger_{key}"
+        histogram = stats[key]
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for bound, count in histogram["buckets"].items():
+            lines.append(
+                f'{metric}_bucket{{logger="{logger}",le="{bound}"}} {count}'
+            )
+        lines += [
+            f'{metric}_sum{{logger="{logger}"}} {histogram["sum"]}',
+            f'{metric}_count{{logger="{logger}"}} {histogram["count"]}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_atomic(file: str, text: str) -> None:
+    """Replaces the file, a reader never sees a partial file"""
+    temp = f"{file}.{os.getpid()}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp, file)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# metrics which are exported to a file, by a single daemon thread
+EXPORT_TICK: float = 1.0
+_exported: "weakref.WeakSet[LogMetrics]" = weakref.WeakSet()
+_exporter: threading.Thread | None = None
+_exporter_lock = threading.Lock()
+
+
+def _export_loop() -> None:
+    while True:
+        time.sleep(EXPORT_TICK)
+        now = time.monotonic()
+        for metrics in list(_exported):
+            try:
+                metrics.export_if_due(now)
+            except OSError:  # pragma: no cover
+                pass
+
+
+def register_export(metrics: LogMetrics, file: str, interval: float) -> None:
+    """Exports the metrics to the file every interval seconds
+
+    Raises:
+        ValueError: interval is not positive
+    """
+    global _exporter
+    if interval <= 0:
+        raise ValueError("interval must be positive")
+    metrics.export_file = file
+    metrics.export_interval = interval
+    metrics.next_export = time.monotonic() + interval
+    _exported.add(metrics)
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(
+                target=_export_loop, name="uglylogger-metrics", daemon=True
+            )
+            _exporter.start()
+
+
+def unregister_export(metrics: LogMetrics) -> None:
+    metrics.export_file = None
+    _exported.discard(metrics)
@@ -0,0 +1,96 @@
+import argparse
+import struct
+import sys
+
+# layout of the files of LogFileSink.MMAP
+#   header: magic, version, flags, length of the valid records, reserved
+#   records: rendered text, exactly like the other file sinks
+HEADER = struct.Struct("<8sIIQQ")
+MAGIC = b"UGLYMMAP"
+VERSION = 1
+
+# offsets of the fields which change while the file is written
+FLAGS_OFFSET = 12
+LENGTH_OFFSET = 16
+FLAGS = struct.Struct("<I")
+LENGTH = struct.Struct("<Q")
+
+# set when the file is closed and truncated to its valid tail
+FLAG_SEALED = 1
+
+
+def read_header(data: bytes) -> tuple[int, int]:
+    """Parses the header of an mmap log file
+
+    Args:
+        data (bytes): At least the first HEADER.size bytes of the file
+
+    Raises:
+        ValueError: If it is not an mmap log file
+
+    Returns:
+        tuple[int, int]: (flags, length of the valid records)
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("not an uglylogger mmap file, no header")
+    magic, version, flags, length, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not an uglylogger mmap file, bad magic")
+    return flags, length
+
+
+def read_records(path: str) -> bytes:
+    """Returns the valid records of an mmap log file
+
+    The preallocated space after the records of an unsealed file,
+        e.g. after a crash, is skipped
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        bytes: The records, encoded with the encoding of the Logger
+    """
+    with open(path, "rb") as f:
+        _, length = read_header(f.read(HEADER.size))
+        return f.read(length)
+
+
+def recover(path: str) -> bool:
+    """Seals an mmap log file which was not closed, e.g. after a crash
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        bool: False if the file is already sealed
+    """
+    with open(path, "r+b") as f:
+        flags, length = read_header(f.read(HEADER.size))
+        if flags & FLAG_SEALED:
+            return False
+        f.truncate(HEADER.size + length)
+        f.seek(FLAGS_OFFSET)
+        f.write(FLAGS.pack(flags | FLAG_SEALED))
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m uglylogger mmap",
+        description="Prints the records of uglylogger mmap log files",
+    )
+    parser.add_argument("files", nargs="+")
+    parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="seal files which were not closed, e.g. after a crash",
+    )
+    args = parser.parse_args(argv)
+    output = sys.stdout.buffer
+    for path in args.files:
+        if args.recover:
+            recover(path)
+        output.write(read_records(path))
+    output.flush()
+    return 0
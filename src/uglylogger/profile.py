@@ -0,0 +1,171 @@
+import atexit
+import sys
+import threading
+import weakref
+from types import CodeType
+from typing import Any
+from .caller import describe_code
+from .enums import LogProfileSort
+
+
+class _Site:
+    """Volume of a call site"""
+
+    __slots__ = ("code", "line", "records", "bytes", "format_ns")
+
+    def __init__(self, code: CodeType | None, line: int) -> None:
+        # holding the code object keeps its id unique
+        self.code = code
+        self.line = line
+        self.records = 0
+        self.bytes = 0
+        self.format_ns = 0
+
+    def describe(self) -> str:
+        if self.code is None:
+            return "unknown"
+        fil, fun = describe_code(self.code)
+        return f"{fil}:{self.line} {fun}"
+
+
+class LogProfiler:
+    """Records, bytes and formatting time of every call site
+
+    The sites are looked up by the id of the code object and the line,
+        a lookup is two int keyed dict gets. The counters are plain
+        ints updated without a lock
+    """
+
+    def __init__(self) -> None:
+        # id(code) -> line -> site
+        self._sites: dict[int, dict[int, _Site]] = {}
+        self._lock = threading.Lock()
+
+    def site(self, code: CodeType | None, line: int) -> _Site:
+        """Returns the counters of a call site, created on first use"""
+        lines = self._sites.get(id(code))
+        if lines is not None:
+            site = lines.get(line)
+            if site is not None:
+                return site
+        with self._lock:
+            lines = self._sites.setdefault(id(code), {})
+            site = lines.get(line)
+            if site is None:
+                site = _Site(code, line)
+                lines[line] = site
+            return site
+
+    def add_written(
+        self, code: CodeType | None, line: int, lines: list, ns: int
+    ) -> None:
+        """Counts a record rendered to lines in ns nanoseconds"""
+        site = self.site(code, line)
+        site.records += 1
+        site.format_ns += ns
+        for text in lines:
+            size = len(text) if text.isascii() else len(text.encode("utf-8"))
+            # the text and the terminator
+            site.bytes += size + 1
+
+    def top(
+        self,
+        sort: LogProfileSort = LogProfileSort.BYTES,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Returns the call sites, the biggest first
+
+        Args:
+            sort (LogProfileSort, optional): Defaults to
+                LogProfileSort.BYTES.
+            limit (int | None, optional): Number of the sites.
+                Defaults to None (every site).
+
+        Returns:
+            list[dict[str, Any]]: site ("file:line function"), records,
+                bytes and format_seconds of the call sites
+        """
+        with self._lock:
+            sites = [
+                site
+                for lines in self._sites.values()
+                for site in lines.values()
+                if site.records
+            ]
+        attribute = _SORT_ATTRIBUTES[sort]
+        sites.sort(key=lambda site: getattr(site, attribute), reverse=True)
+        return [
+            {
+                "site": site.describe(),
+                "records": site.records,
+                "bytes": site.bytes,
+                "format_seconds": site.format_ns / 1e9,
+            }
+            for site in sites[:limit]
+        ]
+
+    def report(
+        self,
+        name: str,
+        sort: LogProfileSort = LogProfileSort.BYTES,
+        limit: int | None = 20,
+    ) -> str:
+        """Renders top() as a table
+
+        Args:
+            name (str): Name of the Logger
+            sort (LogProfileSort, optional): Defaults to
+                LogProfileSort.BYTES.
+            limit (int | None, optional): Number of the sites.
+                Defaults to 20.
+
+        Returns:
+            str: The report
+        """
+        sites = self.top(sort)
+        records = sum(site["records"] for site in sites)
+        total = sum(site["bytes"] for site in sites)
+        lines = [
+            f"uglylogger profile of {name}: {records} records, "
+            f"{total} bytes, {len(sites)} call sites, by {sort.name.lower()}",
+            f"{'records':>10} {'bytes':>12} {'%bytes':>7} "
+            f"{'format ms':>10}  site",
+        ]
+        for site in sites[:limit]:
+            share = site["bytes"] * 100 / total if total else 0.0
+            lines.append(
+                f"{site['records']:>10} {site['bytes']:>12} {share:>6.1f}% "
+                f"{site['format_seconds'] * 1e3:>10.3f}  {site['site']}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+_SORT_ATTRIBUTES = {
+    LogProfileSort.RECORDS: "records",
+    LogProfileSort.BYTES: "bytes",
+    LogProfileSort.FORMAT: "format_ns",
+}
+
+# loggers which report their profile at exit
+_profiled: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def register_exit_report(logger: Any) -> None:
+    _profiled.add(logger)
+
+
+def unregister_exit_report(logger: Any) -> bool:
+    """Returns True if the report was still due"""
+    due = logger in _profiled
+    _profiled.discard(logger)
+    return due
+
+
+@atexit.register
+def _report_at_exit() -> None:
+    for logger in list(_profiled):
+        try:
+            logger.flush()
+            logger.dump_profile()
+        except Exception:  # pragma: no cover
+            sys.stderr.write("uglylogger: the profile was not written\n")
@@ -0,0 +1,196 @@
+import atexit
+import shutil
+import signal
+import sys
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any
+from .caller import register_internal
+from .enums import LogColor, LogLevel
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .logger import Logger
+
+# renderers which are not closed yet, their final state is rendered
+#   at interpreter exit
+_live_progress: "weakref.WeakSet[LogProgress]" = weakref.WeakSet()
+
+# set by the SIGWINCH handler, every renderer detects the width again
+_resize_generation = 0
+_previous_sigwinch: Any = None
+_sigwinch_installed = False
+
+
+def _on_sigwinch(signum: int, frame: Any) -> None:
+    global _resize_generation
+    _resize_generation += 1
+    if callable(_previous_sigwinch):
+        _previous_sigwinch(signum, frame)
+
+
+def _install_sigwinch() -> None:
+    global _previous_sigwinch, _sigwinch_installed
+    if _sigwinch_installed or not hasattr(signal, "SIGWINCH"):
+        return
+    if threading.current_thread() is not threading.main_thread():
+        return
+    _previous_sigwinch = signal.signal(signal.SIGWINCH, _on_sigwinch)
+    _sigwinch_installed = True
+
+
+def _clip(text: str, width: int) -> str:
+    # the text console_oneline() shows, without the padding
+    if len(text) > width:
+        return text[: width - 3] + "..."
+    return text
+
+
+class LogProgress:
+    """Throttled progress line on top of Logger.console_oneline
+
+    update() only stores the state, it is rendered at most refresh_rate
+        times per second and only if the visible text changed.
+        The final state is rendered by close(), at the end of a with
+        block or at interpreter exit
+
+    When stdout is not a terminal, the state is logged as a regular
+        console line every line_interval seconds instead, or never
+        if line_interval is None
+    """
+
+    DEFAULT_REFRESH_RATE: float = 10.0
+    DEFAULT_LINE_INTERVAL: float = 10.0
+
+    def __init__(
+        self,
+        logger: "Logger",
+        refresh_rate: float = DEFAULT_REFRESH_RATE,
+        console_width: int | None = None,
+        level: LogLevel = LogLevel.DEBUG,
+        line_interval: float | None = DEFAULT_LINE_INTERVAL,
+    ) -> None:
+        """Creates the renderer
+
+        Args:
+            logger (Logger): Logger which prints the line
+            refresh_rate (float, optional): Maximum number of renders
+                per second. Defaults to DEFAULT_REFRESH_RATE.
+            console_width (int | None, optional): Width of the line.
+                Defaults to None (width of the terminal, detected again
+                when it is resized).
+            level (LogLevel, optional): Level of the line, decides its
+                color. Defaults to LogLevel.DEBUG.
+            line_interval (float | None, optional): Seconds between two
+                lines when stdout is not a terminal, None to print
+                nothing. Defaults to DEFAULT_LINE_INTERVAL.
+
+        Raises:
+            ValueError: refresh_rate or line_interval is not positive
+        """
+        if refresh_rate <= 0:
+            raise ValueError("refresh_rate must be positive")
+        if line_interval is not None and line_interval <= 0:
+            raise ValueError("line_interval must be positive")
+        self._logger = logger
+        self._level = level
+        self._lock = threading.Lock()
+        self._msg: Any = None
+        self._args: tuple = ()
+        self._color: LogColor | None = None
+        self._dirty = False
+        self._shown: tuple | None = None
+        self._next = 0.0
+        self._closed = False
+        self._tty = sys.stdout.isatty()
+        if self._tty:
+            self._interval = 1.0 / refresh_rate
+        elif line_interval is not None:
+            self._interval = line_interval
+        else:
+            # nothing is ever printed
+            self._closed = True
+            return
+        self._fixed_width = console_width
+        self._width = 0
+        self._generation = -1
+        if console_width is None and self._tty:
+            _install_sigwinch()
+        _live_progress.add(self)
+
+    def update(
+        self, msg: Any, *args: Any, color: LogColor | None = None
+    ) -> None:
+        """Sets the state, renders it if the refresh interval is over
+
+        Args:
+            msg (Any): Message, or a callable returning it
+            *args (Any): Arguments of a %-style or {}-style message,
+                only formatted when the state is rendered
+            color (LogColor | None, optional): Color to overwrite,
+                otherwise uses color by the level. Defaults to None.
+        """
+        if self._closed:
+            return
+        self._msg = msg
+        self._args = args
+        self._color = color
+        self._dirty = True
+        now = time.monotonic()
+        if now >= self._next:
+            self._render(now)
+
+    def _current_width(self) -> int:
+        if self._fixed_width is not None:
+            return self._fixed_width
+        if self._generation != _resize_generation:
+            self._generation = _resize_generation
+            # the last column would wrap the line on some terminals
+            self._width = shutil.get_terminal_size().columns - 1
+        return self._width
+
+    def _render(self, now: float) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._next = now + self._interval
+            text = self._logger._msg_to_str(self._msg, self._args)
+            if self._tty:
+                width = self._current_width()
+                shown = (_clip(text, width), self._color, width)
+                if shown != self._shown:
+                    self._shown = shown
+                    self._logger.console_oneline(
+                        shown[0], self._color, width, self._level
+                    )
+            elif (text, self._color) != self._shown:
+                self._shown = (text, self._color)
+                self._logger.console(
+                    text, color=self._color, level=self._level
+                )
+
+    def close(self) -> None:
+        """Renders the final state and ends the line"""
+        if self._closed:
+            return
+        self._render(time.monotonic())
+        self._closed = True
+        _live_progress.discard(self)
+        if self._tty and self._shown is not None:
+            self._logger._console_end_line()
+
+    def __enter__(self) -> "LogProgress":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+@atexit.register
+def _close_live_progress() -> None:
+    for progress in list(_live_progress):
+        progress.close()
+
+
+register_internal(sys.modules[__name__])
@@ -0,0 +1,471 @@
+import argparse
+import io
+import re
+import sys
+from datetime import datetime
+from typing import BinaryIO, Iterator
+from .compression import open_archive
+from .enums import LogFormatBlock, LogLevel, _LEVEL_NAMES
+from .formatter import text_to_layout
+
+# layout and strftime format of DATETIME of a new Logger
+DEFAULT_LAYOUT = (
+    "[{NAME}] [{LEVEL}] [{DATETIME}] ({FILE}:{LINE}:{FUNCTION}) {MESSAGE}"
+)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# bytes read from the file at once
+CHUNK_SIZE = 1024 * 1024
+# characters of a record at most, a longer one is split
+MAX_RECORD_SIZE = 4 * 1024 * 1024
+
+_LEVELS_BY_NAME = {
+    name: LogLevel(level) for level, name in _LEVEL_NAMES.items()
+}
+
+# regular expressions of the strftime directives, ".+?" for the others
+_DIRECTIVES = {
+    "Y": r"\d{4}",
+    "y": r"\d{2}",
+    "m": r"\d{2}",
+    "d": r"\d{2}",
+    "H": r"\d{2}",
+    "I": r"\d{2}",
+    "M": r"\d{2}",
+    "S": r"\d{2}",
+    "f": r"\d{1,6}",
+    "j": r"\d{3}",
+    "a": r"[A-Za-z]+",
+    "A": r"[A-Za-z]+",
+    "b": r"[A-Za-z]+",
+    "B": r"[A-Za-z]+",
+    "p": r"[A-Za-z]+",
+    "z": r"[+-]\d{4}",
+    "%": "%",
+}
+
+# group names and patterns of the fields of a single line
+_FIELDS = {
+    LogFormatBlock.NAME: ("name", r"[^\n]*?"),
+    LogFormatBlock.LEVEL: ("level", "|".join(_LEVEL_NAMES.values())),
+    LogFormatBlock.FILE: ("file", r"[^\n]*?"),
+    LogFormatBlock.LINE: ("line", r"\d*"),
+    LogFormatBlock.FUNCTION: ("function", r"[^\n]*?"),
+}
+
+# the fields of a record, see LogParser.fields
+_Fields = tuple[
+    str | None,
+    LogLevel | None,
+    str | None,
+    str | None,
+    int | None,
+    str | None,
+    str,
+]
+
+
+def datetime_pattern(fmt: str) -> str:
+    """Returns a regular expression of the text of a strftime format"""
+    parts: list[str] = []
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char == "%" and index + 1 < len(fmt):
+            parts.append(_DIRECTIVES.get(fmt[index + 1], ".+?"))
+            index += 2
+            continue
+        parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+def parse_datetime(text: str | None, fmt: str) -> float | None:
+    """Returns the seconds since the epoch of a DATETIME, None if invalid"""
+    if not text or not fmt:
+        return None
+    try:
+        return datetime.strptime(text, fmt).timestamp()
+    except ValueError:
+        return None
+
+
+class TextRecord:
+    """A record of a text log file
+
+    Only the text is kept, the fields are parsed when one of them is
+        read for the first time. Fields which are not in the layout
+        are None, so are the fields of lines before the first record
+    """
+
+    __slots__ = ("text", "_parser", "_fields")
+
+    def __init__(self, text: str, parser: "LogParser") -> None:
+        # the record without the terminator
+        self.text = text
+        self._parser = parser
+        self._fields: _Fields | None = None
+
+    def _parse(self) -> _Fields:
+        fields = self._fields
+        if fields is None:
+            fields = self._parser.fields(self.text)
+            self._fields = fields
+        return fields
+
+    @property
+    def name(self) -> str | None:
+        return self._parse()[0]
+
+    @property
+    def level(self) -> LogLevel | None:
+        return self._parse()[1]
+
+    @property
+    def datetime(self) -> str | None:
+        """The text of DATETIME, see created"""
+        return self._parse()[2]
+
+    @property
+    def file(self) -> str | None:
+        return self._parse()[3]
+
+    @property
+    def line(self) -> int | None:
+        return self._parse()[4]
+
+    @property
+    def function(self) -> str | None:
+        return self._parse()[5]
+
+    @property
+    def msg(self) -> str:
+        return self._parse()[6]
+
+    @property
+    def created(self) -> float | None:
+        """Seconds since the epoch, None without a valid DATETIME"""
+        return parse_datetime(self.datetime, self._parser.datetime_format)
+
+    def __repr__(self) -> str:
+        return f"TextRecord({self.text!r})"
+
+
+class LogParser:
+    """Splits text log files into records with the layout of the Logger
+
+    A record starts with the layout up to its last LEVEL or DATETIME
+        and the literal after it, the layout up to MESSAGE if it has
+        neither. A line which does not start a record continues the
+        message of the previous one. The fields after MESSAGE are
+        matched at the end of the record
+
+    Files are read in chunks of chunk_size bytes, which are searched for
+        the starts of the records at once, only the unfinished last
+        record is kept between the chunks. A record, or a line, longer
+        than max_record_size is split, so that lines which never
+        start a record do not pile up in memory
+    """
+
+    def __init__(
+        self,
+        layout: list | str = DEFAULT_LAYOUT,
+        datetime_format: str = DATETIME_FORMAT,
+        max_record_size: int = MAX_RECORD_SIZE,
+    ) -> None:
+        """Compiles the layout
+
+        Args:
+            layout (list | str, optional): LogFormatBlock items and
+                literals as given to set_format(), or its text, e.g.
+                "[{LEVEL}] {MESSAGE}". Defaults to DEFAULT_LAYOUT.
+            datetime_format (str, optional): strftime format of DATETIME.
+                Defaults to DATETIME_FORMAT.
+            max_record_size (int, optional): Characters of a record at
+                most. Defaults to MAX_RECORD_SIZE.
+
+        Raises:
+            ValueError: If a field of the text is not a LogFormatBlock
+        """
+        if isinstance(layout, str):
+            layout = text_to_layout(layout)
+        self.datetime_format = datetime_format
+        self.max_record_size = max(1, max_record_size)
+        head: list[str] = []
+        tail: list[str] = []
+        parts = head
+        seen: set = set()
+        for item in layout:
+            if type(item) is not LogFormatBlock:
+                parts.append(re.escape(str(item)))
+            elif item == LogFormatBlock.MESSAGE:
+                if parts is head:
+                    parts = tail
+                else:
+                    parts.append(r"[\s\S]*?")
+            elif item in seen:
+                parts.append(r"[^\n]*?")
+            else:
+                parts.append(self._field(item))
+                seen.add(item)
+        # the fields before the message
+        self._head = re.compile("".join(head))
+        # the fields at the end, the message takes the rest
+        self._tail = None
+        if parts is tail and tail:
+            self._tail = re.compile(r"(?P<msg>[\s\S]*)" + "".join(tail))
+        start = self._start_pattern(layout)
+        # the start of a record in a line
+        self._start = re.compile(start)
+        # the start of the next record, from the new line before it
+        self._next = re.compile("\n" + start)
+
+    def _field(self, item: LogFormatBlock) -> str:
+        if item == LogFormatBlock.DATETIME:
+            return f"(?P<datetime>{datetime_pattern(self.datetime_format)})"
+        group, pattern = _FIELDS[item]
+        return f"(?P<{group}>{pattern})"
+
+    def _start_pattern(self, layout: list) -> str:
+        wanted = (LogFormatBlock.LEVEL, LogFormatBlock.DATETIME)
+        last = -1
+        for i, item in enumerate(layout):
+            if item in wanted:
+                last = i
+            elif item == LogFormatBlock.MESSAGE:
+                break
+        if last < 0:
+            return self._head.pattern
+        parts: list[str] = []
+        seen: set = set()
+        # the literal after the last field ends it
+        for item in layout[: last + 2]:
+            if type(item) is not LogFormatBlock:
+                parts.append(re.escape(str(item)))
+            elif item in wanted and item not in seen:
+                parts.append(self._field(item))
+                seen.add(item)
+            else:
+                parts.append(r"[^\n]*?")
+        return "".join(parts)
+
+    def start_fields(
+        self, line: str
+    ) -> tuple[float | None, LogLevel | None] | None:
+        """Returns (created, level) if a line starts a record, else None
+
+        Fields which are not in the layout are None
+        """
+        match = self._start.match(line)
+        if match is None:
+            return None
+        fields = match.groupdict()
+        level = fields.get("level")
+        return (
+            parse_datetime(fields.get("datetime"), self.datetime_format),
+            None if level is None else _LEVELS_BY_NAME[level],
+        )
+
+    def fields(self, text: str) -> _Fields:
+        """Parses a record
+
+        Args:
+            text (str): The record without the terminator
+
+        Returns:
+            tuple: name, level, datetime, file, line, function and msg,
+                the whole text is the msg if it does not match
+        """
+        match = self._head.match(text)
+        if match is None:
+            return None, None, None, None, None, None, text
+        fields = match.groupdict()
+        begin = match.end()
+        msg = text[begin:]
+        if self._tail is not None:
+            last = self._tail.fullmatch(msg)
+            if last is not None:
+                fields.update(last.groupdict())
+                msg = fields["msg"]
+        level = fields.get("level")
+        line = fields.get("line")
+        return (
+            fields.get("name"),
+            None if level is None else _LEVELS_BY_NAME[level],
+            fields.get("datetime"),
+            fields.get("file"),
+            int(line) if line else None,
+            fields.get("function"),
+            msg,
+        )
+
+    def parse(self, text: str) -> list[TextRecord]:
+        """Splits a text into records
+
+        Args:
+            text (str): Records, each followed by a new line
+
+        Returns:
+            list[TextRecord]: The records
+        """
+        data = text.encode("utf-8")
+        return list(self._records(io.BytesIO(data), len(data) + 1, False))
+
+    def read(
+        self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[TextRecord]:
+        """Reads the records of a stream lazily
+
+        Args:
+            stream (BinaryIO): Log file opened in binary mode
+            chunk_size (int, optional): Bytes read at once.
+                Defaults to CHUNK_SIZE.
+
+        Returns:
+            Iterator[TextRecord]: The records
+        """
+        return self._records(stream, chunk_size, False)
+
+    def read_file(
+        self, path: str, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[TextRecord]:
+        """Reads the records of a log file lazily
+
+        The file is closed when the iterator is exhausted or closed
+
+        Args:
+            path (str): Path to the file, ".gz" and ".zst" archives
+                are decompressed
+            chunk_size (int, optional): Bytes read at once.
+                Defaults to CHUNK_SIZE.
+
+        Returns:
+            Iterator[TextRecord]: The records
+        """
+        return self._records(open_archive(path), chunk_size, True)
+
+    def _records(
+        self, stream: BinaryIO, chunk_size: int, close: bool
+    ) -> Iterator[TextRecord]:
+        # the records are created one by one, so that they are
+        #   released while the chunk is read
+        find = self._next.finditer
+        limit = self.max_record_size
+        # the unfinished record and the bytes after the last new line
+        carry = ""
+        rest = b""
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    if not rest:
+                        break
+                    # the last line has no new line
+                    chunk = b"\n"
+                data = rest + chunk if rest else chunk
+                # cut at a new line, a utf-8 sequence is never split
+                cut = data.rfind(b"\n") + 1
+                if cut == 0:
+                    if len(data) <= limit:
+                        rest = data
+                        continue
+                    # a line longer than the limit ends at it
+                    cut = limit
+                    while cut > 1 and data[cut] & 0xC0 == 0x80:
+                        cut -= 1
+                    rest = data[cut:]
+                    text = data[:cut].decode("utf-8", "replace") + "\n"
+                else:
+                    rest = data[cut:]
+                    text = data[:cut].decode("utf-8", "replace")
+                # the new line at the end of the carry is searched again
+                position = 0
+                if carry:
+                    position = len(carry) - 1
+                    text = carry + text
+                start = 0
+                end = len(text) - 1
+                for match in find(text, position):
+                    stop = match.start()
+                    if stop == end:
+                        # an empty start after the last new line
+                        break
+                    yield TextRecord(text[start:stop], self)
+                    start = stop + 1
+                carry = text[start:]
+                while len(carry) > limit:
+                    # lines which never start a record, split at the last
+                    #   new line before the limit, at the limit without one
+                    cut = carry.rfind("\n", 0, limit + 1) + 1
+                    if cut > 1:
+                        yield TextRecord(carry[: cut - 1], self)
+                        carry = carry[cut:]
+                    else:
+                        yield TextRecord(carry[:limit], self)
+                        carry = carry[limit:]
+            if carry:
+                yield TextRecord(carry[:-1], self)
+        finally:
+            if close:
+                stream.close()
+
+
+def read_log(
+    path: str,
+    layout: list | str = DEFAULT_LAYOUT,
+    datetime_format: str = DATETIME_FORMAT,
+    chunk_size: int = CHUNK_SIZE,
+    max_record_size: int = MAX_RECORD_SIZE,
+) -> Iterator[TextRecord]:
+    """Reads the records of a text log file lazily
+
+    Args:
+        path (str): Path to the file, ".gz" and ".zst" archives are
+            decompressed
+        layout (list | str, optional): Layout of the records, see
+            LogParser. Defaults to DEFAULT_LAYOUT.
+        datetime_format (str, optional): strftime format of DATETIME.
+            Defaults to DATETIME_FORMAT.
+        chunk_size (int, optional): Bytes read at once.
+            Defaults to CHUNK_SIZE.
+        max_record_size (int, optional): Characters of a record at
+            most, a longer one is split. Defaults to MAX_RECORD_SIZE.
+
+    Returns:
+        Iterator[TextRecord]: The records
+    """
+    parser = LogParser(layout, datetime_format, max_record_size)
+    return parser.read_file(path, chunk_size)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m uglylogger read",
+        description="Prints the records of uglylogger text log files",
+    )
+    parser.add_argument("files", nargs="+")
+    parser.add_argument(
+        "--format",
+        default=DEFAULT_LAYOUT,
+        help='layout, e.g. "[{LEVEL}] {MESSAGE}", '
+        "defaults to the layout of a new Logger",
+    )
+    parser.add_argument(
+        "--datetime-format", default=DATETIME_FORMAT, help="strftime format"
+    )
+    parser.add_argument(
+        "--level",
+        action="append",
+        choices=list(_LEVEL_NAMES.values()),
+        help="level to print, can be repeated, defaults to every level",
+    )
+    args = parser.parse_args(argv)
+    levels = None
+    if args.level:
+        levels = {LogLevel[name] for name in args.level}
+    output = sys.stdout
+    for path in args.files:
+        for record in read_log(path, args.format, args.datetime_format):
+            if levels is None or record.level in levels:
+                output.write(record.text + "\n")
+    output.flush()
+    return 0
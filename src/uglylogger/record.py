@@ -0,0 +1,54 @@
+from types import CodeType
+from .enums import LogColor, LogLevel
+from .formatter import CompiledFormat
+
+
+class LogEntry:
+    """A single log call
+
+    Everything which depends on the moment of the call
+        (message, time, call site) is captured once here,
+        every output renders its own variant from the same entry
+    """
+
+    __slots__ = (
+        "level",
+        "msg",
+        "created",
+        "code",
+        "line",
+        "color",
+        "outputs",
+        "extra",
+        "compiled",
+        "format_ns",
+    )
+
+    def __init__(
+        self,
+        level: LogLevel,
+        msg: str,
+        created: float,
+        color: LogColor | None,
+        outputs: int,
+        code: CodeType | None = None,
+        line: int = 0,
+        extra: dict | None = None,
+        compiled: CompiledFormat | None = None,
+    ) -> None:
+        self.level = level
+        self.msg = msg
+        self.created = created
+        self.color = color
+        # LogOutput value as a plain int, for cheap bit tests
+        self.outputs = outputs
+        self.code = code
+        self.line = line
+        # structured fields of the call, see LogFileFormat.JSONL
+        self.extra = extra
+        # layout at the moment of the call, the entry is rendered with it
+        #   even if set_format() is called before it is written
+        self.compiled = compiled
+        # time spent on the message if the metrics time this call,
+        #   the render time is added to it when the entry is written
+        self.format_ns: int | None = None
@@ -0,0 +1,130 @@
+import threading
+from types import CodeType
+from typing import Any
+from .enums import LogColor
+from .formatter import CompiledFormat
+
+
+class _Slot:
+    """A recorded log call, the message is not evaluated yet"""
+
+    __slots__ = (
+        "level",
+        "msg",
+        "args",
+        "created",
+        "code",
+        "line",
+        "color",
+        "extra",
+        "compiled",
+    )
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        # drops the references of the call
+        self.level = 0
+        self.msg: Any = None
+        self.args: tuple = ()
+        self.created = 0.0
+        self.code: CodeType | None = None
+        self.line = 0
+        self.color: LogColor | None = None
+        self.extra: dict | None = None
+        self.compiled: CompiledFormat | None = None
+
+
+class FlightRecorder:
+    """Fixed size ring of the log calls below the level of the file
+
+    The slots are allocated once, a recorded call overwrites the oldest
+        one. The message and its arguments are kept as they are,
+        they are only evaluated when the ring is taken
+    """
+
+    def __init__(self, size: int) -> None:
+        """Creates the ring
+
+        Args:
+            size (int): Number of slots
+
+        Raises:
+            ValueError: size is not positive
+        """
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self._slots = [_Slot() for _ in range(size)]
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._slots)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(
+        self,
+        level: int,
+        msg: Any,
+        args: tuple,
+        created: float,
+        code: CodeType | None,
+        line: int,
+        color: LogColor | None,
+        extra: dict | None,
+        compiled: CompiledFormat | None,
+    ) -> None:
+        """Stores a log call in the oldest slot"""
+        with self._lock:
+            index = self._next
+            slot = self._slots[index]
+            slot.level = level
+            slot.msg = msg
+            slot.args = args
+            slot.created = created
+            slot.code = code
+            slot.line = line
+            slot.color = color
+            slot.extra = extra
+            slot.compiled = compiled
+            index += 1
+            self._next = 0 if index == len(self._slots) else index
+            if self._count < len(self._slots):
+                self._count += 1
+
+    def take(self) -> list[tuple]:
+        """Empties the ring
+
+        Returns:
+            list[tuple]: (level, msg, args, created, code, line, color,
+                extra, compiled) of the recorded calls, oldest first
+        """
+        with self._lock:
+            slots = self._slots
+            size = len(slots)
+            start = (self._next - self._count) % size
+            calls = []
+            for i in range(self._count):
+                slot = slots[(start + i) % size]
+                calls.append(
+                    (
+                        slot.level,
+                        slot.msg,
+                        slot.args,
+                        slot.created,
+                        slot.code,
+                        slot.line,
+                        slot.color,
+                        slot.extra,
+                        slot.compiled,
+                    )
+                )
+                slot.clear()
+            self._next = 0
+            self._count = 0
+        return calls
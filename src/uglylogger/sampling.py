@@ -0,0 +1,236 @@
+import sys
+import threading
+import time
+from typing import Any, Iterable
+from .caller import describe_code, find_call_site, register_internal
+from .enums import (
+    LogLevel,
+    LogSamplingKey,
+    LogSamplingPolicy,
+    _LEVEL_NAMES,
+)
+
+# first item of the MESSAGE key of a callable message, see check()
+_CALLABLE = object()
+
+
+class LogSampling:
+    """A sampling rule, which records of a key are kept
+
+    Only the attributes of the policy are used:
+        ONE_IN_N: n
+        TOKEN_BUCKET: rate and burst
+        FIRST_N: n and period
+    """
+
+    def __init__(
+        self,
+        policy: LogSamplingPolicy,
+        key: LogSamplingKey = LogSamplingKey.CALL_SITE,
+        levels: Iterable[LogLevel] | None = None,
+        n: int = 100,
+        rate: float = 10.0,
+        burst: int = 10,
+        period: float = 60.0,
+    ) -> None:
+        """Creates the rule
+
+        Args:
+            policy (LogSamplingPolicy): How the records are kept
+            key (LogSamplingKey, optional): Which records are similar.
+                Defaults to LogSamplingKey.CALL_SITE.
+            levels (Iterable[LogLevel] | None, optional): Levels the rule
+                applies to. Defaults to None (every level).
+            n (int, optional): Records of ONE_IN_N and FIRST_N.
+                Defaults to 100.
+            rate (float, optional): Records per second of TOKEN_BUCKET.
+                Defaults to 10.0.
+            burst (int, optional): Maximum burst of TOKEN_BUCKET.
+                Defaults to 10.
+            period (float, optional): Seconds of a FIRST_N period.
+                Defaults to 60.0.
+
+        Raises:
+            ValueError: n, rate, burst or period is not positive
+        """
+        if n <= 0 or rate <= 0 or burst <= 0 or period <= 0:
+            raise ValueError("n, rate, burst and period must be positive")
+        self.policy = policy
+        self.key = key
+        self.levels = None if levels is None else frozenset(levels)
+        self.n = n
+        self.rate = rate
+        self.burst = burst
+        self.period = period
+
+
+class _State:
+    """Sampling state of a key"""
+
+    __slots__ = ("count", "value", "since", "suppressed", "level", "outputs")
+
+    def __init__(self, value: float, since: float) -> None:
+        # ONE_IN_N: records seen
+        # TOKEN_BUCKET: tokens left, refilled since "since"
+        # FIRST_N: records of the period which started at "since"
+        self.count = 0
+        self.value = value
+        self.since = since
+        self.suppressed = 0
+        self.level = 0
+        self.outputs = 0
+
+
+class LogSampler:
+    """Applies the sampling rules of a Logger
+
+    check() runs before the record is captured, a suppressed record
+        costs a lookup and a counter. The counts of the suppressed
+        records are taken by take_summaries() every summary_interval
+        seconds
+    """
+
+    # keys beyond this many are not tracked, their records are kept
+    MAX_KEYS: int = 10000
+
+    def __init__(
+        self, rules: Iterable[LogSampling], summary_interval: float = 10.0
+    ) -> None:
+        """Creates the sampler
+
+        Args:
+            rules (Iterable[LogSampling]): The first rule of a level wins
+            summary_interval (float, optional): Seconds between two
+                summaries. Defaults to 10.0.
+
+        Raises:
+            ValueError: summary_interval is not positive
+        """
+        if summary_interval <= 0:
+            raise ValueError("summary_interval must be positive")
+        self._by_level: dict[int, LogSampling] = {}
+        for rule in rules:
+            for level in rule.levels or _LEVEL_NAMES:
+                self._by_level.setdefault(int(level), rule)
+        self._summary_interval = summary_interval
+        self._next_summary = time.monotonic() + summary_interval
+        self._states: dict[Any, _State] = {}
+        self._lock = threading.Lock()
+        self.summary_due = False
+
+    def check(self, level: int, msg: Any, outputs: int) -> bool:
+        """Decides if a record is kept
+
+        Args:
+            level (int): Level of the record
+            msg (Any): Message of the record, its arguments not applied
+            outputs (int): LogOutput value of the record
+
+        Returns:
+            bool: True if the record is kept
+        """
+        rule = self._by_level.get(level)
+        now = time.monotonic()
+        if now >= self._next_summary:
+            self.summary_due = True
+        if rule is None:
+            return True
+        if rule.key == LogSamplingKey.LEVEL:
+            key: Any = (rule, level)
+        elif rule.key == LogSamplingKey.CALL_SITE:
+            key = (rule, find_call_site())
+        elif callable(msg):
+            # a lambda is created by every call, it is similar by its
+            #   call site and is not kept alive by the key
+            key = (rule, (_CALLABLE, *find_call_site()))
+        else:
+            try:
+                key = (rule, msg)
+                hash(key)
+            except TypeError:
+                # dicts, lists... are similar by their type
+                key = (rule, type(msg))
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                if len(self._states) >= self.MAX_KEYS:
+                    return True
+                state = _State(float(rule.burst), now)
+                self._states[key] = state
+            if _keep(rule, state, now):
+                return True
+            state.suppressed += 1
+            state.level = level
+            state.outputs = outputs
+            return False
+
+    def take_summaries(self, force: bool = False) -> list[tuple]:
+        """Takes the counts of the suppressed records
+
+        Args:
+            force (bool, optional): Takes them even if the interval
+                is not over. Defaults to False.
+
+        Returns:
+            list[tuple]: (level, outputs, message) of every key
+                with suppressed records
+        """
+        now = time.monotonic()
+        summaries: list[tuple] = []
+        with self._lock:
+            if not force and now < self._next_summary:
+                return summaries
+            self._next_summary = now + self._summary_interval
+            self.summary_due = False
+            for key, state in self._states.items():
+                if state.suppressed:
+                    summaries.append(
+                        (
+                            state.level,
+                            state.outputs,
+                            f"suppressed {state.suppressed} similar "
+                            f"messages of {_describe(key, state.level)}",
+                        )
+                    )
+                    state.suppressed = 0
+        return summaries
+
+
+def _keep(rule: LogSampling, state: _State, now: float) -> bool:
+    policy = rule.policy
+    if policy == LogSamplingPolicy.ONE_IN_N:
+        state.count += 1
+        return state.count % rule.n == 1 or rule.n == 1
+    if policy == LogSamplingPolicy.TOKEN_BUCKET:
+        state.value = min(
+            float(rule.burst), state.value + (now - state.since) * rule.rate
+        )
+        state.since = now
+        if state.value >= 1.0:
+            state.value -= 1.0
+            return True
+        return False
+    if now - state.since >= rule.period:
+        state.since = now
+        state.count = 0
+    state.count += 1
+    return state.count <= rule.n
+
+
+def _describe(key: tuple, level: int) -> str:
+    rule, value = key
+    if rule.key == LogSamplingKey.LEVEL:
+        return _LEVEL_NAMES[level]
+    if rule.key == LogSamplingKey.CALL_SITE or (
+        type(value) is tuple and value and value[0] is _CALLABLE
+    ):
+        code, line = value[-2:]
+        if code is None:
+            return "an unknown call site"  # pragma: no cover
+        return f"{describe_code(code)[0]}:{line}"
+    if isinstance(value, type):
+        return f"{value.__name__} messages"
+    return repr(str(value)[:80])
+
+
+register_internal(sys.modules[__name__])
@@ -0,0 +1,112 @@
+import time
+from typing import Callable
+from .enums import LogClock
+
+# zero padded milliseconds, indexed instead of formatted per record
+_MILLIS: list[str] = ["%03d" % i for i in range(1000)]
+
+
+def _split_format(fmt: str) -> list[str]:
+    """Splits a strftime format at its %f directives
+
+    "%%f" is an escaped percent sign followed by "f", not a directive
+    """
+    parts: list[str] = []
+    start = 0
+    index = 0
+    length = len(fmt)
+    while index < length - 1:
+        if fmt[index] != "%":
+            index += 1
+            continue
+        if fmt[index + 1] == "f":
+            parts.append(fmt[start:index])
+            start = index + 2
+        index += 2
+    parts.append(fmt[start:])
+    return parts
+
+
+class TimestampRenderer:
+    """Renders timestamps with a strftime format
+
+    Everything but %f only changes once per second, so it is rendered
+        once per second and cached. %f is rendered as milliseconds,
+        "2024-01-01 12:00:00.123" for "%Y-%m-%d %H:%M:%S.%f"
+    """
+
+    __slots__ = ("fmt", "_parts", "_cache")
+
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+        self._parts = _split_format(fmt)
+        # (second, rendered parts), replaced as a whole
+        self._cache: tuple[int, list[str]] = (-1, [])
+
+    def render(self, created: float) -> str:
+        """Renders a timestamp
+
+        Args:
+            created (float): Seconds since the epoch
+
+        Returns:
+            str: Rendered timestamp
+        """
+        second = int(created)
+        # rounded to microseconds first, same as datetime.fromtimestamp
+        micros = round((created - second) * 1e6)
+        if micros >= 1000000:
+            second += 1
+            micros -= 1000000
+        cached_second, parts = self._cache
+        if cached_second != second:
+            local = time.localtime(second)
+            parts = [time.strftime(part, local) for part in self._parts]
+            self._cache = (second, parts)
+        if len(parts) == 1:
+            return parts[0]
+        millis = _MILLIS[micros // 1000]
+        if len(parts) == 2:
+            return f"{parts[0]}{millis}{parts[1]}"
+        return millis.join(parts)
+
+
+class _MonotonicClock:
+    """Wall clock time derived from the monotonic clock
+
+    Never goes backwards, even if the system clock is adjusted
+    """
+
+    def __init__(self) -> None:
+        self._offset = time.time() - time.monotonic()
+
+    def __call__(self) -> float:
+        return self._offset + time.monotonic()
+
+
+def _coarse_clock() -> Callable[[], float]:
+    clock_id = getattr(time, "CLOCK_REALTIME_COARSE", None)
+    if clock_id is None:
+        return time.time  # pragma: no cover
+    try:
+        time.clock_gettime(clock_id)
+    except OSError:  # pragma: no cover
+        return time.time
+    return lambda: time.clock_gettime(clock_id)
+
+
+def make_clock(clock: LogClock) -> Callable[[], float]:
+    """Returns the time source of a LogClock
+
+    Args:
+        clock (LogClock): Clock to use
+
+    Returns:
+        Callable[[], float]: Returns seconds since the epoch
+    """
+    match clock:
+        case LogClock.MONOTONIC:
+            return _MonotonicClock()
+        case LogClock.COARSE:
+            return _coarse_clock()
+    return time.time
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from uglylogger import (
+    AsyncLogBase,
+    AsyncLogger,
+    Logger,
+    LogFormatBlock,
+    LogMoveOption,
+    LogOverflowPolicy,
+    LogOutput,
+)
+
+
+class TestAsyncLogger(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._directory.name, "aio.log")
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def _read(self, file: str) -> list[str]:
+        with open(file, "r") as f:
+            return f.read().splitlines()
+
+    async def test_writes_off_the_loop(self) -> None:
+        logger = AsyncLogger("test_aio_off_the_loop", self.file)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        writer = logger._writer
+        assert writer is not None
+        self.assertEqual(writer._overflow, LogOverflowPolicy.DROP_OLDEST)
+        handler = logger._file_handler
+        assert handler is not None
+        threads: list[threading.Thread] = []
+        write = handler.write
+
+        def record_thread(text: str, level: int = 0) -> None:
+            threads.append(threading.current_thread())
+            write(text, level)
+
+        with unittest.mock.patch.object(handler, "write", record_thread):
+            for i in range(100):
+                logger.info(i, output=LogOutput.FILE)
+            self.assertTrue(await logger.aflush())
+        self.assertEqual(self._read(self.file), [str(i) for i in range(100)])
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+        await logger.arelease()
+        self.assertIsNone(logger._file_handler)
+
+    async def test_amove_and_arotate(self) -> None:
+        new_file = os.path.join(self._directory.name, "moved.log")
+        async with AsyncLogger("test_aio_amove", self.file) as logger:
+            logger.set_format([LogFormatBlock.MESSAGE])
+            logger.file("before")
+            await logger.amove(new_file, LogMoveOption.KEEP_AND_INIT)
+            logger.file("after")
+            await logger.arotate()
+            logger.file("rotated")
+        self.assertEqual(self._read(self.file), ["before"])
+        self.assertEqual(self._read(new_file + ".1"), ["after"])
+        self.assertEqual(self._read(new_file), ["rotated"])
+
+    async def test_console_oneline_off_the_loop(self) -> None:
+        logger = AsyncLogger("test_aio_oneline")
+        threads: list[threading.Thread] = []
+        with unittest.mock.patch(
+            "builtins.print",
+            lambda *args, **kwargs: threads.append(threading.current_thread()),
+        ):
+            logger.console_oneline("progress")
+            await logger.aflush()
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.current_thread())
+        await logger.arelease()
+
+
+class TestAsyncLogBase(unittest.IsolatedAsyncioTestCase):
+    async def test_async_log_base(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "aio_base.log")
+            new_file = os.path.join(directory, "aio_base_moved.log")
+            base = AsyncLogBase()
+            self.assertTrue(await base.aflush_logger())
+            base.init_logger("test_aio_base", file)
+            self.assertIsInstance(base._logger, AsyncLogger)
+            base.set_format([LogFormatBlock.MESSAGE])
+            base.file("first")
+            await base.amove_logger(new_file)
+            base.file("second")
+            self.assertTrue(await base.aflush_logger())
+            await base.arotate_logger()
+            await base.arelease_logger()
+            self.assertFalse(os.path.exists(file))
+            with open(new_file + ".1", "r") as f:
+                self.assertEqual(f.read().splitlines(), ["first", "second"])
+
+    async def test_plain_logger(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "aio_plain.log")
+            new_file = os.path.join(directory, "aio_plain_moved.log")
+            base = AsyncLogBase(Logger("test_aio_plain", file))
+            base.set_format([LogFormatBlock.MESSAGE])
+            base.file("record")
+            self.assertTrue(await base.aflush_logger())
+            await base.amove_logger(new_file)
+            await base.arotate_logger()
+            await base.arelease_logger()
+            with open(new_file + ".1", "r") as f:
+                self.assertEqual(f.read().splitlines(), ["record"])
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,164 @@
+import io
+import os
+import threading
+import unittest
+import unittest.mock
+from uglylogger import Logger, LogFormatBlock, LogMoveOption, LogOverflowPolicy
+from uglylogger.asyncwriter import AsyncWriter
+from uglylogger.record import LogEntry
+from uglylogger.enums import LogLevel
+
+
+def _entry(msg: str) -> LogEntry:
+    return LogEntry(LogLevel.DEBUG, msg, 0.0, None, 0)
+
+
+class _BlockedDispatch:
+    """Dispatch function which waits until it is released"""
+
+    def __init__(self) -> None:
+        self.received: list[str] = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, entries: list[LogEntry]) -> None:
+        self.started.set()
+        self.release.wait()
+        self.received.extend(e.msg for e in entries)
+
+
+class TestAsyncWriter(unittest.TestCase):
+    def _fill(self, overflow: LogOverflowPolicy) -> tuple:
+        dispatch = _BlockedDispatch()
+        writer = AsyncWriter(dispatch, queue_size=2, overflow=overflow)
+        # first entry is taken by the writer thread and blocks it
+        writer.put(_entry("0"))
+        dispatch.started.wait()
+        writer.put(_entry("1"))
+        writer.put(_entry("2"))
+        return writer, dispatch
+
+    def test_flush_and_batching(self) -> None:
+        received: list[list[str]] = []
+        writer = AsyncWriter(
+            lambda entries: received.append([e.msg for e in entries])
+        )
+        for i in range(100):
+            writer.put(_entry(str(i)))
+        self.assertTrue(writer.flush(5))
+        self.assertEqual(
+            [msg for batch in received for msg in batch],
+            [str(i) for i in range(100)],
+        )
+        writer.close()
+        self.assertFalse(writer.put(_entry("closed")))
+
+    def test_drop_new(self) -> None:
+        writer, dispatch = self._fill(LogOverflowPolicy.DROP_NEW)
+        self.assertFalse(writer.put(_entry("3")))
+        self.assertEqual(writer.dropped, 1)
+        dispatch.release.set()
+        writer.close()
+        self.assertEqual(dispatch.received, ["0", "1", "2"])
+
+    def test_drop_oldest(self) -> None:
+        writer, dispatch = self._fill(LogOverflowPolicy.DROP_OLDEST)
+        self.assertTrue(writer.put(_entry("3")))
+        self.assertEqual(writer.dropped, 1)
+        dispatch.release.set()
+        writer.close()
+        self.assertEqual(dispatch.received, ["0", "2", "3"])
+
+    def test_block(self) -> None:
+        writer, dispatch = self._fill(LogOverflowPolicy.BLOCK)
+        producer = threading.Thread(target=writer.put, args=(_entry("3"),))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        dispatch.release.set()
+        producer.join()
+        writer.close()
+        self.assertEqual(writer.dropped, 0)
+        self.assertEqual(dispatch.received, ["0", "1", "2", "3"])
+
+    def test_failing_dispatch(self) -> None:
+        received: list[str] = []
+
+        def dispatch(entries: list[LogEntry]) -> None:
+            if any(e.msg == "bad" for e in entries):
+                raise TypeError("bad entry")
+            received.extend(e.msg for e in entries)
+
+        writer = AsyncWriter(dispatch, queue_size=2, batch_size=1)
+        with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+            writer.put(_entry("bad"))
+            # more entries than the queue holds, BLOCK must not hang
+            for i in range(5):
+                writer.put(_entry(str(i)))
+            self.assertTrue(writer.flush(5))
+        writer.close()
+        self.assertEqual(received, [str(i) for i in range(5)])
+        self.assertEqual(writer.failed, 1)
+        self.assertIn("TypeError: bad entry", stderr.getvalue())
+
+    def test_invalid_queue_size(self) -> None:
+        with self.assertRaises(ValueError):
+            AsyncWriter(lambda entries: None, queue_size=0)
+
+
+class TestAsyncLogger(unittest.TestCase):
+    def _read(self, file: str) -> list[str]:
+        with open(file, "r") as f:
+            return [line.rstrip("\n") for line in f]
+
+    def test_async_file_output(self) -> None:
+        file = "test_async_file_output.log"
+        logger = Logger("test_async_file_output", file, async_mode=True)
+        logger.set_format(
+            [LogFormatBlock.FUNCTION, " ", LogFormatBlock.MESSAGE]
+        )
+        for i in range(50):
+            logger.file(i)
+        self.assertTrue(logger.flush())
+        lines = self._read(file)
+        self.assertEqual(
+            lines, [f"test_async_file_output {i}" for i in range(50)]
+        )
+        logger.release()
+        os.remove(file)
+
+    def test_async_release_drains(self) -> None:
+        file = "test_async_release_drains.log"
+        logger = Logger("test_async_release_drains", file, async_mode=True)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        for i in range(50):
+            logger.file(i)
+        logger.release()
+        self.assertEqual(len(self._read(file)), 50)
+        self.assertEqual(logger.dropped, 0)
+        os.remove(file)
+
+    def test_async_move_in_flight(self) -> None:
+        old_file = "test_async_move_old.log"
+        new_file = "test_async_move_new.log"
+        logger = Logger("test_async_move", old_file, async_mode=True)
+        logger.set_format([LogFormatBlock.MESSAGE])
+
+        def produce() -> None:
+            for i in range(200):
+                logger.file(i)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        logger.move(new_file, LogMoveOption.KEEP_AND_INIT)
+        producer.join()
+        logger.release()
+
+        lines = self._read(old_file) + self._read(new_file)
+        self.assertEqual(sorted(lines, key=int), [str(i) for i in range(200)])
+        os.remove(old_file)
+        os.remove(new_file)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,150 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from uglylogger import (
+    Logger,
+    LogFileSink,
+    LogFormatBlock,
+    LogLevel,
+    LogOutput,
+)
+from uglylogger import binary
+from uglylogger.handlers import BinaryFileHandler
+
+
+class TestBinary(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._file = os.path.join(self._dir.name, "binary.log")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _logger(self, name: str, **kwargs) -> Logger:
+        logger = Logger(
+            name, self._file, file_sink=LogFileSink.BINARY, **kwargs
+        )
+        logger.set_format(
+            [
+                LogFormatBlock.LEVEL,
+                " ",
+                LogFormatBlock.FUNCTION,
+                ":",
+                LogFormatBlock.LINE,
+                " ",
+                LogFormatBlock.MESSAGE,
+            ]
+        )
+        return logger
+
+    def test_roundtrip(self) -> None:
+        logger = self._logger("test_binary_roundtrip")
+        self.assertIsInstance(logger._file_handler, BinaryFileHandler)
+        with unittest.mock.patch.object(
+            logger, "_render", wraps=logger._render
+        ) as render_mock:
+            logger.file("first")
+            logger.error("ğüşöç", output=LogOutput.FILE)
+            render_mock.assert_not_called()
+        logger.release()
+
+        records = list(binary.read_records(self._file))
+        self.assertEqual([r.msg for r in records], ["first", "ğüşöç"])
+        self.assertEqual(records[0].name, "test_binary_roundtrip")
+        self.assertEqual(records[1].level, LogLevel.ERROR)
+        self.assertEqual(records[0].function, "test_roundtrip")
+        self.assertEqual(records[0].file, "test_binary.py")
+        self.assertEqual(records[1].line, records[0].line + 1)
+
+        lines = list(binary.render_records(self._file))
+        self.assertEqual(
+            lines,
+            [
+                f"DEBUG test_roundtrip:{records[0].line} first",
+                f"ERROR test_roundtrip:{records[1].line} ğüşöç",
+            ],
+        )
+        self.assertEqual(
+            list(
+                binary.render_records(
+                    self._file, [LogFormatBlock.NAME, LogFormatBlock.MESSAGE]
+                )
+            ),
+            ["test_binary_roundtripfirst", "test_binary_roundtripğüşöç"],
+        )
+
+    def test_append_and_truncated_tail(self) -> None:
+        logger = self._logger("test_binary_append")
+        logger.file("first")
+        logger.release()
+        logger = self._logger("test_binary_append")
+        logger.file("second")
+        logger.release()
+        with open(self._file, "ab") as f:
+            # a record header cut by a crash
+            f.write(bytes([binary.TAG_RECORD, 10, 0]))
+        self.assertEqual(
+            [r.msg for r in binary.read_records(self._file)],
+            ["first", "second"],
+        )
+
+    def test_rotation_defines_ids_again(self) -> None:
+        logger = self._logger("test_binary_rotation", max_bytes=64)
+        logger.file("first")
+        logger.file("second")
+        logger.release()
+        for path, msg in (
+            (self._file + ".1", "first"),
+            (self._file, "second"),
+        ):
+            records = list(binary.read_records(path))
+            self.assertEqual([r.msg for r in records], [msg])
+            self.assertEqual(records[0].name, "test_binary_rotation")
+            self.assertEqual(
+                records[0].function, "test_rotation_defines_ids_again"
+            )
+
+    def test_not_binary_file(self) -> None:
+        with open(self._file, "w") as f:
+            f.write("plain text log file\n")
+        with self.assertRaises(ValueError):
+            BinaryFileHandler(self._file)
+        with self.assertRaises(ValueError):
+            list(binary.read_records(self._file))
+
+    def test_main(self) -> None:
+        handler = BinaryFileHandler(self._file, flush_interval=0)
+        handler.write("plain", LogLevel.INFO)
+        handler.close()
+        output = io.StringIO()
+        with unittest.mock.patch("sys.stdout", output):
+            binary.main([self._file, "--format", "[{LEVEL}] {MESSAGE}"])
+        self.assertEqual(output.getvalue(), "[INFO] plain\n")
+
+    def test_command_line(self) -> None:
+        handler = BinaryFileHandler(self._file, flush_interval=0)
+        handler.write("plain", LogLevel.INFO)
+        handler.close()
+        environment = dict(os.environ)
+        environment["PYTHONPATH"] = os.path.dirname(
+            os.path.dirname(binary.__file__)
+        )
+        command = [sys.executable, "-m", "uglylogger", "binary", self._file]
+        result = subprocess.run(
+            command + ["--format", "[{LEVEL}] {MESSAGE}"],
+            capture_output=True,
+            text=True,
+            env=environment,
+        )
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "[INFO] plain\n")
+        # no RuntimeWarning of runpy
+        self.assertEqual(result.stderr, "")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
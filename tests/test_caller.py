@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+from uglylogger import Logger, LogBase, LogFormatBlock
+from uglylogger.caller import (
+    describe_code,
+    find_call_site,
+    get_file_line_func,
+    is_internal,
+    register_internal,
+)
+
+
+def _wrapper() -> tuple:
+    return get_file_line_func()
+
+
+class _Helper:
+    def call(self) -> tuple:
+        return get_file_line_func()
+
+
+class TestCaller(unittest.TestCase):
+    def test_find_call_site(self) -> None:
+        code, line = find_call_site(0)
+        self.assertIs(code, sys._getframe().f_code)
+        self.assertEqual(line, sys._getframe().f_lineno - 2)
+
+    def test_describe_code_is_cached(self) -> None:
+        code = sys._getframe().f_code
+        first = describe_code(code)
+        second = describe_code(code)
+        self.assertEqual(
+            first,
+            (os.path.basename(__file__), "test_describe_code_is_cached"),
+        )
+        self.assertIs(first[0], second[0])
+
+    def test_register_function(self) -> None:
+        fil, fun, _ = _wrapper()
+        self.assertEqual(fun, "_wrapper")
+
+        register_internal(_wrapper)
+        self.assertTrue(is_internal(_wrapper.__code__))
+        fil, fun, _ = _wrapper()
+        self.assertEqual(fil, os.path.basename(__file__))
+        self.assertEqual(fun, "test_register_function")
+
+    def test_register_class(self) -> None:
+        register_internal(_Helper)
+        fil, fun, _ = _Helper().call()
+        self.assertEqual(fun, "test_register_class")
+
+    def test_logger_and_logbase_are_internal(self) -> None:
+        self.assertTrue(is_internal(Logger.debug.__code__))
+        self.assertTrue(is_internal(Logger._format.__code__))
+        self.assertTrue(is_internal(LogBase.debug.__code__))
+
+    def test_logbase_call_site(self) -> None:
+        file = "test_logbase_call_site.log"
+        logger = Logger("test_logbase_call_site", file)
+        logger.set_format([LogFormatBlock.FILE, ":", LogFormatBlock.FUNCTION])
+        LogBase(logger).debug("via LogBase")
+        with open(file, "r") as f:
+            line = f.readline().rstrip("\n")
+        logger.release()
+        os.remove(file)
+        self.assertEqual(
+            line, os.path.basename(__file__) + ":test_logbase_call_site"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+import unittest.mock
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from uglylogger import Logger, LogFileSink, LogFormatBlock, LogMoveOption
+from uglylogger.collector import (
+    WRITE,
+    CollectorHandler,
+    _encode,
+    collector_address,
+    runtime_directory,
+)
+
+
+def _work(file: str, worker: int, records: int) -> None:
+    logger = Logger("test_collector_worker", file, multiprocess=True)
+    logger.set_format([LogFormatBlock.MESSAGE])
+    for i in range(records):
+        logger.file("%d %d %s", worker, i, "x" * 1000)
+    logger.release()
+
+
+class TestCollector(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._directory.name, "collector.log")
+
+    def tearDown(self) -> None:
+        self._directory.cleanup()
+
+    def _read(self, file: str) -> list[str]:
+        with open(file, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def _logger(self, name: str, file: str | None = None, **kwargs) -> Logger:
+        logger = Logger(name, file or self.file, multiprocess=True, **kwargs)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        return logger
+
+    def test_address(self) -> None:
+        self.assertEqual(
+            collector_address(self.file),
+            collector_address(os.path.relpath(self.file)),
+        )
+        self.assertNotEqual(
+            collector_address(self.file), collector_address(self.file + "2")
+        )
+
+    def test_private_directory(self) -> None:
+        runtime = os.path.join(self._directory.name, "runtime")
+        os.mkdir(runtime)
+        with unittest.mock.patch.dict(
+            os.environ, {"XDG_RUNTIME_DIR": runtime}
+        ):
+            directory = os.path.join(runtime, "uglylogger")
+            self.assertEqual(
+                os.path.dirname(collector_address(self.file)), directory
+            )
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            # a directory others can access is refused
+            os.chmod(directory, 0o755)
+            with self.assertRaises(PermissionError):
+                runtime_directory()
+            os.rmdir(directory)
+            # so is a link to a directory of the user
+            os.mkdir(os.path.join(runtime, "target"), 0o700)
+            os.symlink(os.path.join(runtime, "target"), directory)
+            with self.assertRaises(PermissionError):
+                collector_address(self.file)
+
+    def test_authentication(self) -> None:
+        logger = self._logger("test_collector_authentication")
+        handler = logger._file_handler
+        assert isinstance(handler, CollectorHandler)
+        with self.assertRaises(AuthenticationError):
+            Client(handler.address, authkey=b"guessed")
+        # a connection which does not answer the challenge is closed
+        with Client(handler.address) as intruder:
+            intruder.send_bytes(_encode((WRITE, "intruder", 10)))
+        logger.file("record")
+        logger.release()
+        self.assertEqual(self._read(self.file), ["record"])
+
+    def test_stop_drains_the_clients(self) -> None:
+        owner = self._logger("test_collector_drain_owner")
+        client = self._logger("test_collector_drain_client")
+        # not flushed, sent before the collector is stopped
+        for i in range(1000):
+            client.file(i)
+        owner.release()
+        client.release()
+        self.assertEqual(self._read(self.file), [str(i) for i in range(1000)])
+
+    def test_single_process(self) -> None:
+        logger = self._logger("test_collector_single")
+        handler = logger._file_handler
+        self.assertIsInstance(handler, CollectorHandler)
+        assert isinstance(handler, CollectorHandler)
+        self.assertTrue(handler.owner)
+        for i in range(10):
+            logger.file(i)
+        logger.flush()
+        self.assertEqual(self._read(self.file), [str(i) for i in range(10)])
+        logger.release()
+        self.assertFalse(os.path.exists(handler.address))
+
+    def test_clients_share_the_collector(self) -> None:
+        owner = self._logger("test_collector_owner")
+        client = self._logger("test_collector_client", append=False)
+        handler = client._file_handler
+        assert isinstance(handler, CollectorHandler)
+        self.assertFalse(handler.owner)
+        owner.file("owner")
+        client.file("client")
+        # the records of the owner are written before the move
+        owner.flush()
+        # a client moves the file of every process
+        new_file = os.path.join(self._directory.name, "moved.log")
+        client.move(new_file, LogMoveOption.KEEP_AND_INIT)
+        self.assertEqual(client._file, new_file)
+        owner.file("after move")
+        client.release()
+        owner.release()
+        # records of different clients are not ordered
+        self.assertEqual(sorted(self._read(self.file)), ["client", "owner"])
+        self.assertEqual(self._read(new_file), ["after move"])
+
+    def test_rotation(self) -> None:
+        logger = self._logger(
+            "test_collector_rotation", max_bytes=100, backup_count=10
+        )
+        for i in range(30):
+            logger.file("%02d%s", i, "-" * 17)
+        logger.rotate()
+        logger.release()
+        # 5 records per generation, the last one is rotated by rotate()
+        generations = [self._read(f"{self.file}.{i}") for i in range(6, 0, -1)]
+        self.assertEqual(self._read(self.file), [])
+        self.assertEqual(
+            [line[:2] for lines in generations for line in lines],
+            [f"{i:02d}" for i in range(30)],
+        )
+
+    def test_stale_socket(self) -> None:
+        address = collector_address(self.file)
+        with open(address, "w"):
+            pass
+        logger = self._logger("test_collector_stale")
+        logger.file("record")
+        logger.release()
+        self.assertEqual(self._read(self.file), ["record"])
+        self.assertFalse(os.path.exists(address))
+
+    def test_binary_sink(self) -> None:
+        with self.assertRaises(ValueError):
+            Logger(
+                "test_collector_binary",
+                self.file,
+                multiprocess=True,
+                file_sink=LogFileSink.BINARY,
+            )
+
+    def test_worker_processes(self) -> None:
+        owner = self._logger("test_collector_workers")
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=_work, args=(self.file, w, 200))
+            for w in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        owner.release()
+        lines = self._read(self.file)
+        self.assertEqual(len(lines), 800)
+        records = sorted(tuple(map(int, line.split()[:2])) for line in lines)
+        self.assertEqual(
+            records, [(w, i) for w in range(4) for i in range(200)]
+        )
+        self.assertTrue(all(line.endswith("x" * 1000) for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,104 @@
+import gzip
+import os
+import tempfile
+import unittest
+from uglylogger import (
+    Logger,
+    LogCompression,
+    LogFormatBlock,
+    LogMoveOption,
+    LogRotateOption,
+)
+from uglylogger.compression import compress_file, resolve, strip_suffix
+from uglylogger.handlers import FileHandler, wait_for_archives
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._file = os.path.join(self._dir.name, "compress.log")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _names(self) -> list[str]:
+        return sorted(os.listdir(self._dir.name))
+
+    def _gunzip(self, name: str) -> str:
+        with gzip.open(os.path.join(self._dir.name, name), "rt") as f:
+            return f.read()
+
+    def test_compress_file(self) -> None:
+        with open(self._file, "w") as f:
+            f.write("content\n")
+        archive = compress_file(self._file, LogCompression.GZIP)
+        self.assertEqual(archive, self._file + ".gz")
+        self.assertEqual(self._names(), ["compress.log.gz"])
+        self.assertEqual(self._gunzip("compress.log.gz"), "content\n")
+        self.assertEqual(strip_suffix(archive), self._file)
+
+    def test_compress_none(self) -> None:
+        with open(self._file, "w") as f:
+            f.write("content\n")
+        self.assertEqual(
+            compress_file(self._file, LogCompression.NONE), self._file
+        )
+        self.assertEqual(self._names(), ["compress.log"])
+
+    def test_resolve(self) -> None:
+        self.assertIn(
+            resolve(LogCompression.ZSTD),
+            (LogCompression.ZSTD, LogCompression.GZIP),
+        )
+        self.assertEqual(resolve(LogCompression.GZIP), LogCompression.GZIP)
+
+    def test_rotate_numbered(self) -> None:
+        handler = FileHandler(
+            self._file,
+            max_bytes=8,
+            backup_count=2,
+            compression=LogCompression.GZIP,
+        )
+        for i in range(4):
+            handler.write(f"line {i}")
+        handler.close()
+        self.assertTrue(wait_for_archives(5))
+        self.assertEqual(
+            self._names(),
+            ["compress.log", "compress.log.1.gz", "compress.log.2.gz"],
+        )
+        self.assertEqual(self._gunzip("compress.log.1.gz"), "line 2\n")
+        self.assertEqual(self._gunzip("compress.log.2.gz"), "line 1\n")
+
+    def test_rotate_timestamped_max_bytes(self) -> None:
+        handler = FileHandler(
+            self._file,
+            backup_count=10,
+            rotate_option=LogRotateOption.TIMESTAMPED,
+            max_archive_bytes=1,
+        )
+        for i in range(3):
+            handler.write(str(i))
+            handler.rotate()
+        handler.close()
+        # only the newest generation fits, it is always kept
+        names = self._names()
+        self.assertEqual(len(names), 2)
+        with open(os.path.join(self._dir.name, names[1])) as f:
+            self.assertEqual(f.read(), "2\n")
+
+    def test_move_keep(self) -> None:
+        new_file = os.path.join(self._dir.name, "moved.log")
+        logger = Logger("test_compression_move_keep", self._file)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        logger.file("old")
+        logger.move(new_file, LogMoveOption.KEEP_AND_INIT, LogCompression.GZIP)
+        logger.file("new")
+        logger.release()
+        self.assertTrue(wait_for_archives(5))
+        self.assertEqual(self._names(), ["compress.log.gz", "moved.log"])
+        self.assertEqual(self._gunzip("compress.log.gz"), "old\n")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,136 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from parameterized import parameterized  # type: ignore
+from uglylogger import Logger, LogColorMode, LogFormatBlock
+from uglylogger.dedup import LogDedup
+
+
+class TestDedup(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "dedup.log")
+        self.now = 1000.0
+
+    def _logger(self, **kwargs) -> Logger:
+        logger = Logger(
+            "test_dedup",
+            self.file,
+            color_mode=LogColorMode.MONO,
+            dedup_window=30,
+            **kwargs,
+        )
+        logger.set_format([LogFormatBlock.LEVEL, " ", LogFormatBlock.MESSAGE])
+        logger._clock = lambda: self.now
+        self.console = io.StringIO()
+        handler = logger._console_handler
+        assert handler is not None
+        handler.setStream(self.console)
+        return logger
+
+    def _read(self) -> list[str]:
+        with open(self.file, "r") as f:
+            return f.read().splitlines()
+
+    @parameterized.expand([(False,), (True,)])
+    def test_collapses_runs(self, async_mode: bool) -> None:
+        logger = self._logger(async_mode=async_mode)
+        for _ in range(5):
+            logger.error("connection refused")
+        logger.error("connection restored")
+        logger.warning("connection restored")
+        logger.release()
+        expected = [
+            "ERROR connection refused",
+            "ERROR last message repeated 4 times",
+            "ERROR connection restored",
+            "WARNING connection restored",
+        ]
+        self.assertEqual(self._read(), expected)
+        self.assertEqual(self.console.getvalue().splitlines(), expected)
+
+    def test_outputs_are_independent(self) -> None:
+        logger = self._logger()
+        logger.error("boom")
+        logger.file("file only")
+        logger.error("boom")
+        logger.error("boom")
+        logger.release()
+        self.assertEqual(
+            self._read(),
+            [
+                "ERROR boom",
+                "DEBUG file only",
+                "ERROR boom",
+                "ERROR last message repeated 1 times",
+            ],
+        )
+        self.assertEqual(
+            self.console.getvalue().splitlines(),
+            ["ERROR boom", "ERROR last message repeated 2 times"],
+        )
+
+    def test_window(self) -> None:
+        logger = self._logger()
+        for _ in range(3):
+            logger.file("flapping")
+            self.now += 10
+        # the run started 30 seconds ago
+        logger.file("flapping")
+        logger.release()
+        self.assertEqual(
+            self._read(),
+            [
+                "DEBUG flapping",
+                "DEBUG last message repeated 2 times",
+                "DEBUG flapping",
+            ],
+        )
+
+    @parameterized.expand([(False,), (True,)])
+    def test_window_expires_without_records(self, async_mode: bool) -> None:
+        logger = self._logger(async_mode=async_mode)
+        logger._clock = time.time
+        assert logger._dedup is not None
+        logger._dedup._window = 0.2
+        for _ in range(3):
+            logger.file("flapping")
+        # no further record, the count is written when the window is over
+        deadline = time.monotonic() + 5
+        expected = ["DEBUG flapping", "DEBUG last message repeated 2 times"]
+        while self._read() != expected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self._read(), expected)
+        logger.file("flapping")
+        logger.release()
+        self.assertEqual(self._read(), expected + ["DEBUG flapping"])
+
+    def test_flush_ends_expired_runs(self) -> None:
+        logger = self._logger()
+        for _ in range(3):
+            logger.file("flapping")
+        self.now += 30
+        logger.flush()
+        self.assertEqual(
+            self._read(),
+            ["DEBUG flapping", "DEBUG last message repeated 2 times"],
+        )
+        logger.release()
+
+    def test_levels_are_part_of_the_key(self) -> None:
+        logger = self._logger()
+        logger.info("same")
+        logger.warning("same")
+        logger.release()
+        self.assertEqual(self._read(), ["INFO same", "WARNING same"])
+
+    def test_invalid_window(self) -> None:
+        with self.assertRaises(ValueError):
+            LogDedup(0)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
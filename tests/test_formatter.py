@@ -0,0 +1,90 @@
+import unittest
+from uglylogger import Logger, LogFormatBlock, LogLevel
+from uglylogger.formatter import (
+    compile_format,
+    layout_to_text,
+    text_to_layout,
+)
+
+
+class TestFormatter(unittest.TestCase):
+    def _render(self, layout: list) -> str:
+        compiled = compile_format(layout)
+        return compiled.render(
+            "name", "DEBUG", "2024-01-01 00:00:00.000", "msg", "f.py", 7, "fn"
+        )
+
+    def test_default_layout(self) -> None:
+        layout = [
+            "[",
+            LogFormatBlock.NAME,
+            "] [",
+            LogFormatBlock.LEVEL,
+            "] [",
+            LogFormatBlock.DATETIME,
+            "] (",
+            LogFormatBlock.FILE,
+            ":",
+            LogFormatBlock.LINE,
+            ":",
+            LogFormatBlock.FUNCTION,
+            ") ",
+            LogFormatBlock.MESSAGE,
+        ]
+        self.assertEqual(
+            self._render(layout),
+            "[name] [DEBUG] [2024-01-01 00:00:00.000] (f.py:7:fn) msg",
+        )
+
+    def test_message_only(self) -> None:
+        compiled = compile_format([LogFormatBlock.MESSAGE])
+        self.assertFalse(compiled.uses_site)
+        self.assertFalse(compiled.uses_datetime)
+        self.assertEqual(self._render([LogFormatBlock.MESSAGE]), "msg")
+
+    def test_literals_are_not_interpreted(self) -> None:
+        layout = ['{name} "%s" \\n \'', 1, LogFormatBlock.LINE, "}"]
+        self.assertEqual(self._render(layout), '{name} "%s" \\n \'17}')
+
+    def test_empty_layout(self) -> None:
+        self.assertEqual(self._render([]), "")
+
+    def test_uses_flags(self) -> None:
+        compiled = compile_format([LogFormatBlock.LINE])
+        self.assertTrue(compiled.uses_site)
+        self.assertFalse(compiled.uses_datetime)
+        compiled = compile_format([LogFormatBlock.DATETIME])
+        self.assertFalse(compiled.uses_site)
+        self.assertTrue(compiled.uses_datetime)
+
+    def test_combined_flags_are_ignored(self) -> None:
+        layout = [LogFormatBlock.NAME | LogFormatBlock.LEVEL, "x"]
+        self.assertEqual(self._render(layout), "x")
+
+    def test_set_format_invalidates_cache(self) -> None:
+        logger = Logger("test_set_format_invalidates_cache")
+        logger.set_format([LogFormatBlock.MESSAGE])
+        self.assertEqual(logger._format("first", LogLevel.DEBUG), "first")
+        logger.set_format(["<", LogFormatBlock.MESSAGE, ">"])
+        self.assertEqual(logger._format("second", LogLevel.DEBUG), "<second>")
+        # direct assignment is detected as well
+        logger._format_arr = [LogFormatBlock.LEVEL]
+        self.assertEqual(logger._format("third", LogLevel.INFO), "INFO")
+        logger.release()
+
+    def test_layout_text(self) -> None:
+        layout = [
+            "[",
+            LogFormatBlock.NAME,
+            "] {literal} ",
+            LogFormatBlock.MESSAGE,
+        ]
+        text = layout_to_text(layout)
+        self.assertEqual(text, "[{NAME}] {{literal}} {MESSAGE}")
+        self.assertEqual(text_to_layout(text), layout)
+        with self.assertRaises(ValueError):
+            text_to_layout("{UNKNOWN}")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
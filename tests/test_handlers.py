@@ -0,0 +1,225 @@
+import os
+import tempfile
+import time
+import unittest
+from uglylogger import (
+    Logger,
+    LogFileSink,
+    LogFormatBlock,
+    LogLevel,
+    LogRotateOption,
+)
+from uglylogger.handlers import BufferedFileHandler, FileHandler
+
+
+class TestBufferedFileHandler(unittest.TestCase):
+    _file = "test_buffered_file_handler.log"
+
+    def tearDown(self) -> None:
+        if os.path.exists(self._file):
+            os.remove(self._file)
+
+    def _content(self) -> str:
+        with open(self._file, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_size_threshold(self) -> None:
+        handler = BufferedFileHandler(
+            self._file, buffer_size=16, flush_interval=0
+        )
+        handler.write("0123456")
+        self.assertEqual(handler.pending, 8)
+        self.assertEqual(self._content(), "")
+        handler.write("7890123")
+        self.assertEqual(self._content(), "")
+        # does not fit anymore, the first two are written
+        handler.write("x")
+        self.assertEqual(self._content(), "0123456\n7890123\n")
+        self.assertEqual(handler.pending, 2)
+        handler.close()
+        self.assertEqual(self._content(), "0123456\n7890123\nx\n")
+
+    def test_larger_than_buffer(self) -> None:
+        handler = BufferedFileHandler(
+            self._file, buffer_size=4, flush_interval=0
+        )
+        handler.write("a")
+        handler.write("0123456789")
+        self.assertEqual(self._content(), "a\n0123456789\n")
+        handler.close()
+
+    def test_level_threshold(self) -> None:
+        handler = BufferedFileHandler(
+            self._file, flush_interval=0, flush_level=LogLevel.ERROR
+        )
+        handler.write("warning", LogLevel.WARNING)
+        self.assertEqual(self._content(), "")
+        handler.write("error", LogLevel.ERROR)
+        self.assertEqual(self._content(), "warning\nerror\n")
+        handler.close()
+
+    def test_time_threshold(self) -> None:
+        handler = BufferedFileHandler(self._file, flush_interval=0.05)
+        handler.write("later")
+        self.assertEqual(self._content(), "")
+        deadline = time.monotonic() + 5
+        while handler.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._content(), "later\n")
+        handler.close()
+
+    def test_utf8(self) -> None:
+        handler = BufferedFileHandler(self._file, flush_interval=0)
+        handler.write("ğüşöç")
+        handler.flush()
+        self.assertEqual(self._content(), "ğüşöç\n")
+        handler.close()
+
+    def test_invalid_buffer_size(self) -> None:
+        with self.assertRaises(ValueError):
+            BufferedFileHandler(self._file, buffer_size=0)
+
+
+class TestBufferedLogger(unittest.TestCase):
+    def test_logger_buffered_sink(self) -> None:
+        file = "test_logger_buffered_sink.log"
+        logger = Logger(
+            "test_logger_buffered_sink",
+            file,
+            file_sink=LogFileSink.BUFFERED,
+            flush_interval=0,
+        )
+        self.assertIsInstance(logger._file_handler, BufferedFileHandler)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        logger.file("buffered")
+        self.assertEqual(os.path.getsize(file), 0)
+        logger.flush()
+        self.assertEqual(os.path.getsize(file), len("buffered\n"))
+
+        # move keeps the sink and flushes the old file
+        logger.file("before move")
+        logger.move("test_logger_buffered_sink_moved.log")
+        self.assertIsInstance(logger._file_handler, BufferedFileHandler)
+        logger.release()
+        with open("test_logger_buffered_sink_moved.log", "r") as f:
+            self.assertEqual(f.read(), "buffered\nbefore move\n")
+        os.remove("test_logger_buffered_sink_moved.log")
+
+    def test_logger_default_sink(self) -> None:
+        logger = Logger("test_logger_default_sink", "default_sink.log")
+        self.assertIs(type(logger._file_handler), FileHandler)
+        logger.release()
+        os.remove("default_sink.log")
+
+
+class TestRotation(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._file = os.path.join(self._dir.name, "rotate.log")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _content(self, suffix: str = "") -> str:
+        with open(self._file + suffix, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_max_bytes_numbered(self) -> None:
+        handler = FileHandler(self._file, max_bytes=20, backup_count=2)
+        for i in range(7):
+            handler.write(f"line {i}.")
+        handler.close()
+        self.assertEqual(self._content(), "line 6.\n")
+        self.assertEqual(self._content(".1"), "line 4.\nline 5.\n")
+        self.assertEqual(self._content(".2"), "line 2.\nline 3.\n")
+        self.assertFalse(os.path.exists(self._file + ".3"))
+
+    def test_max_bytes_counts_existing_file(self) -> None:
+        with open(self._file, "w") as f:
+            f.write("0123456789012345\n")
+        handler = FileHandler(self._file, max_bytes=20)
+        handler.write("new")
+        handler.close()
+        self.assertEqual(self._content(), "new\n")
+        self.assertEqual(self._content(".1"), "0123456789012345\n")
+
+    def test_larger_than_max_bytes(self) -> None:
+        handler = FileHandler(self._file, max_bytes=4)
+        handler.write("0123456789")
+        handler.write("a")
+        handler.close()
+        self.assertEqual(self._content(), "a\n")
+        self.assertEqual(self._content(".1"), "0123456789\n")
+
+    def test_interval(self) -> None:
+        handler = FileHandler(self._file, rotate_interval=0.05)
+        handler.write("first")
+        time.sleep(0.06)
+        handler.write("second")
+        handler.close()
+        self.assertEqual(self._content(), "second\n")
+        self.assertEqual(self._content(".1"), "first\n")
+
+    def test_timestamped(self) -> None:
+        handler = FileHandler(
+            self._file,
+            backup_count=2,
+            rotate_option=LogRotateOption.TIMESTAMPED,
+        )
+        for i in range(4):
+            handler.write(str(i))
+            handler.rotate()
+        handler.close()
+        generations = sorted(
+            name for name in os.listdir(self._dir.name) if name != "rotate.log"
+        )
+        self.assertEqual(len(generations), 2)
+        self.assertRegex(generations[0], r"^rotate\.log\.\d{8}-\d{6}")
+        self.assertEqual(self._content(), "")
+        with open(os.path.join(self._dir.name, generations[1])) as f:
+            self.assertEqual(f.read(), "3\n")
+
+    def test_truncate(self) -> None:
+        handler = FileHandler(
+            self._file, max_bytes=4, rotate_option=LogRotateOption.TRUNCATE
+        )
+        handler.write("old")
+        handler.write("new")
+        handler.close()
+        self.assertEqual(os.listdir(self._dir.name), ["rotate.log"])
+        self.assertEqual(self._content(), "new\n")
+
+    def test_buffered(self) -> None:
+        handler = BufferedFileHandler(
+            self._file, flush_interval=0, max_bytes=8
+        )
+        handler.write("old")
+        handler.write("old")
+        handler.write("new")
+        self.assertEqual(self._content(".1"), "old\nold\n")
+        self.assertEqual(self._content(), "")
+        handler.close()
+        self.assertEqual(self._content(), "new\n")
+
+    def test_logger_rotation(self) -> None:
+        logger = Logger(
+            "test_logger_rotation", self._file, max_bytes=8, backup_count=1
+        )
+        logger.set_format([LogFormatBlock.MESSAGE])
+        console_handler = logger._console_handler
+        file_handler = logger._file_handler
+        logger.file("first")
+        logger.file("second")
+        logger.rotate()
+        logger.file("third")
+        # rotation happens in place, nothing is rebuilt
+        self.assertIs(logger._console_handler, console_handler)
+        self.assertIs(logger._file_handler, file_handler)
+        logger.release()
+        self.assertEqual(self._content(), "third\n")
+        self.assertEqual(self._content(".1"), "second\n")
+        self.assertFalse(os.path.exists(self._file + ".2"))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
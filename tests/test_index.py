@@ -0,0 +1,267 @@
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+from parameterized import parameterized  # type: ignore
+from uglylogger import (
+    Logger,
+    LogColorMode,
+    LogFileFormat,
+    LogFileSink,
+    LogFormatBlock,
+    LogCompression,
+    LogLevel,
+    LogMoveOption,
+    LogOutput,
+    LogRotateOption,
+)
+from uglylogger import index
+from uglylogger.__main__ import main
+from uglylogger.compression import open_archive
+from uglylogger.handlers import wait_for_archives
+from uglylogger.index import TAG_BLOCK, index_path, query, rebuild_index
+
+LAYOUT = "{LEVEL} {DATETIME} {MESSAGE}"
+# seconds since the epoch of the first record
+START = 1_700_000_000.0
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "index.log")
+        self.now = START
+
+    def _logger(self, **kwargs) -> Logger:
+        kwargs.setdefault("index_block_size", 256)
+        logger = Logger(
+            "test_index",
+            self.file,
+            color_mode=LogColorMode.MONO,
+            **kwargs,
+        )
+        self.addCleanup(logger.release)
+        logger.set_format(
+            [
+                LogFormatBlock.LEVEL,
+                " ",
+                LogFormatBlock.DATETIME,
+                " ",
+                LogFormatBlock.MESSAGE,
+            ]
+        )
+        logger.set_log_level(LogLevel.DEBUG)
+        handler = logger._console_handler
+        assert handler is not None
+        handler.setStream(io.StringIO())
+        logger._clock = lambda: self.now
+        return logger
+
+    def _fill(self, logger: Logger, count: int = 60) -> None:
+        # a record per second, every tenth one is a multi line warning
+        for i in range(count):
+            self.now = START + i
+            if i % 10 == 5:
+                logger.warning(
+                    "warning %d\n  details", i, output=LogOutput.FILE
+                )
+            else:
+                logger.file("record %d", i)
+
+    def _blocks(self) -> int:
+        return sum(
+            tag == TAG_BLOCK
+            for _, tag, _ in index._read_entries(index_path(self.file))
+        )
+
+    @parameterized.expand([(False,), (True,)])
+    def test_query(self, async_mode: bool) -> None:
+        logger = self._logger(async_mode=async_mode)
+        self._fill(logger)
+        warnings = logger.query(levels=[LogLevel.WARNING])
+        self.assertEqual(
+            [record.split("\n")[0].split(" ", 3)[3] for record in warnings],
+            [f"warning {i}" for i in (5, 15, 25, 35, 45, 55)],
+        )
+        self.assertTrue(warnings[0].endswith("\n  details"))
+        records = logger.query(since=START + 20, until=START + 23)
+        self.assertEqual(
+            [record[-9:] for record in records],
+            ["record 20", "record 21", "record 22"],
+        )
+        logger.release()
+        if not async_mode:
+            # a batch of the async mode is a single write
+            self.assertGreater(self._blocks(), 3)
+        self.assertEqual(
+            list(query(self.file, START + 20, START + 23)), records
+        )
+
+    def test_jsonl(self) -> None:
+        logger = self._logger(
+            file_sink=LogFileSink.BUFFERED, file_format=LogFileFormat.JSONL
+        )
+        self._fill(logger)
+        records = logger.query(START + 30, START + 40, [LogLevel.WARNING])
+        self.assertEqual(len(records), 1)
+        self.assertIn('"message":"warning 35\\n  details"', records[0])
+
+    def test_binary(self) -> None:
+        logger = self._logger(file_sink=LogFileSink.BINARY)
+        self._fill(logger)
+        logger.release()
+        records = list(query(self.file, START + 50, None, [LogLevel.WARNING]))
+        self.assertEqual(len(records), 1)
+        self.assertTrue(records[0].startswith("WARNING "))
+        self.assertTrue(records[0].endswith(" warning 55\n  details"))
+        # the definitions of the ids are kept in the index
+        self.assertGreater(self._blocks(), 3)
+
+    def test_unindexed_tail(self) -> None:
+        logger = self._logger()
+        self._fill(logger, 20)
+        logger.release()
+        # records of a process which crashed before the index was written
+        with open(self.file, "a", encoding="utf-8") as f:
+            f.write("ERROR 2023-11-14 22:13:40.000 lost\n")
+        with open(index_path(self.file), "r+b") as f:
+            f.truncate(os.path.getsize(index_path(self.file)) - 3)
+        records = list(query(self.file, levels=[LogLevel.ERROR]))
+        self.assertEqual(records, ["ERROR 2023-11-14 22:13:40.000 lost"])
+        self.assertEqual(len(list(query(self.file))), 21)
+        # reopening indexes the tail
+        logger = self._logger()
+        self.assertEqual(logger.query(levels=[LogLevel.ERROR]), records)
+
+    def test_rebuild(self) -> None:
+        logger = self._logger()
+        self._fill(logger)
+        logger.release()
+        expected = list(query(self.file, levels=[LogLevel.WARNING]))
+        os.remove(index_path(self.file))
+        with self.assertRaises(FileNotFoundError):
+            list(query(self.file))
+        with self.assertRaises(ValueError):
+            rebuild_index(self.file)
+        rebuild_index(self.file, LAYOUT, Logger.DATETIME_FORMAT)
+        self.assertEqual(
+            list(query(self.file, levels=[LogLevel.WARNING])), expected
+        )
+        # the layout of the old index is reused
+        rebuild_index(self.file, block_size=64)
+        self.assertEqual(
+            list(query(self.file, levels=[LogLevel.WARNING])), expected
+        )
+
+    def test_move(self) -> None:
+        logger = self._logger()
+        self._fill(logger, 30)
+        new_file = os.path.join(self._directory.name, "moved.log")
+        logger.move(new_file, LogMoveOption.MOVE_AND_APPEND)
+        self.assertFalse(os.path.exists(index_path(self.file)))
+        self._fill(logger, 10)
+        self.assertEqual(len(logger.query(levels=[LogLevel.WARNING])), 4)
+        logger.move(self.file, LogMoveOption.KEEP_AND_INIT)
+        self.assertEqual(logger.query(), [])
+
+    @parameterized.expand(
+        [
+            (LogRotateOption.NUMBERED, LogCompression.NONE),
+            (LogRotateOption.NUMBERED, LogCompression.GZIP),
+            (LogRotateOption.TIMESTAMPED, LogCompression.ZSTD),
+        ]
+    )
+    def test_rotation(
+        self, option: LogRotateOption, compression: LogCompression
+    ) -> None:
+        logger = self._logger(
+            max_bytes=1000,
+            backup_count=100,
+            rotate_option=option,
+            compression=compression,
+        )
+        self._fill(logger)
+        logger.release()
+        wait_for_archives()
+        current = list(query(self.file))
+        with open(self.file, "r", encoding="utf-8") as f:
+            self.assertEqual("\n".join(current) + "\n", f.read())
+        # every generation keeps its index, archives included
+        generations = sorted(
+            os.path.join(self._directory.name, name)
+            for name in os.listdir(self._directory.name)
+            if name.startswith("index.log.") and not name.endswith(".idx")
+        )
+        self.assertGreater(len(generations), 1)
+        warnings = list(query(self.file, levels=[LogLevel.WARNING]))
+        for generation in generations:
+            self.assertTrue(os.path.exists(index_path(generation)))
+            with open_archive(generation) as f:
+                records = f.read().decode("utf-8")
+            found = list(query(generation, levels=[LogLevel.WARNING]))
+            self.assertEqual(len(found), records.count("WARNING "))
+            warnings += found
+        self.assertEqual(
+            sorted(int(w.split()[4]) for w in warnings),
+            [5, 15, 25, 35, 45, 55],
+        )
+        self.assertFalse(
+            any(
+                ".retired-" in name
+                for name in os.listdir(self._directory.name)
+            )
+        )
+
+    def test_not_indexed(self) -> None:
+        logger = self._logger(index_block_size=0)
+        with self.assertRaises(ValueError):
+            logger.query()
+        self.assertFalse(os.path.exists(index_path(self.file)))
+        with self.assertRaises(ValueError):
+            Logger(
+                "test_index_mmap",
+                self.file,
+                file_sink=LogFileSink.MMAP,
+                index_block_size=256,
+            )
+
+    def test_main(self) -> None:
+        logger = self._logger()
+        self._fill(logger, 20)
+        logger.release()
+        output = io.StringIO()
+        with unittest.mock.patch("sys.stdout", output):
+            main(
+                [
+                    "index",
+                    "query",
+                    self.file,
+                    "--since",
+                    str(START + 10),
+                    "--level",
+                    "WARNING",
+                    "--level",
+                    "ERROR",
+                ]
+            )
+        self.assertTrue(output.getvalue().endswith(" warning 15\n  details\n"))
+        self.assertEqual(output.getvalue().count("\n"), 2)
+        os.remove(index_path(self.file))
+        main(
+            [
+                "index",
+                "rebuild",
+                self.file,
+                "--format",
+                LAYOUT,
+                "--datetime-format",
+                Logger.DATETIME_FORMAT,
+            ]
+        )
+        self.assertEqual(len(list(query(self.file))), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
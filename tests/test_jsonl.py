@@ -0,0 +1,176 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+from parameterized import parameterized  # type: ignore
+from uglylogger import (
+    LogBase,
+    Logger,
+    LogFileFormat,
+    LogFormatBlock,
+    LogLevel,
+)
+from uglylogger import jsonl
+from uglylogger.jsonl import compile_json_format
+
+
+class TestJsonFormat(unittest.TestCase):
+    def test_keys_from_layout(self) -> None:
+        compiled = compile_json_format(
+            [
+                "[",
+                LogFormatBlock.LEVEL,
+                "] (",
+                LogFormatBlock.LINE,
+                ") ",
+                LogFormatBlock.MESSAGE,
+            ]
+        )
+        record = compiled.render(
+            "name", "INFO", "", 'quote " and\nnew line', "f.py", 7, "fn"
+        )
+        self.assertEqual(
+            json.loads(record),
+            {"level": "INFO", "line": 7, "message": 'quote " and\nnew line'},
+        )
+        self.assertEqual(
+            json.loads(compiled.render("", "INFO", "", "", "", "", "")),
+            {"level": "INFO", "line": None, "message": ""},
+        )
+
+    def test_extra(self) -> None:
+        compiled = compile_json_format([LogFormatBlock.MESSAGE])
+        record = compiled.render("", "", "", "msg", "", "", "")
+        self.assertEqual(
+            json.loads(
+                compiled.render_extra(
+                    record, {"user": "ğü", "count": 3, "message": "ignored"}
+                )
+            ),
+            {"message": "msg", "user": "ğü", "count": 3},
+        )
+        # values which are not JSON types are converted with str()
+        self.assertEqual(
+            json.loads(compiled.render_extra(record, {"path": os.sep})),
+            {"message": "msg", "path": os.sep},
+        )
+        empty = compile_json_format([])
+        self.assertEqual(
+            empty.render_extra(empty.render("", "", "", "", "", "", ""), {}),
+            "{}",
+        )
+
+    @parameterized.expand([("orjson", True), ("json", False)])
+    def test_non_str_keys(self, _: str, use_orjson: bool) -> None:
+        backend = jsonl.orjson if use_orjson else None
+        with unittest.mock.patch.object(jsonl, "orjson", backend):
+            fields = jsonl.dumps(
+                {1: "int", None: "none", (1, 2): "tuple", "n": {2.5: []}}
+            )
+        self.assertEqual(
+            json.loads(fields),
+            {"1": "int", "null": "none", "(1, 2)": "tuple", "n": {"2.5": []}},
+        )
+
+
+class TestJsonLogger(unittest.TestCase):
+    def test_logger_jsonl(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "jsonl.log")
+            logger = Logger(
+                "test_logger_jsonl", file, file_format=LogFileFormat.JSONL
+            )
+            logger.set_format(
+                [
+                    "[",
+                    LogFormatBlock.NAME,
+                    "] [",
+                    LogFormatBlock.LEVEL,
+                    "] (",
+                    LogFormatBlock.FUNCTION,
+                    ") ",
+                    LogFormatBlock.MESSAGE,
+                ]
+            )
+            logger.info("user %s logged in", "sevket", extra={"id": 42})
+            logger.file("plain", level=LogLevel.ERROR)
+            base = LogBase(logger)
+            base.warning("from base", extra={"base": True})
+            logger.release()
+            with open(file, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(
+            records,
+            [
+                {
+                    "name": "test_logger_jsonl",
+                    "level": "INFO",
+                    "function": "test_logger_jsonl",
+                    "message": "user sevket logged in",
+                    "id": 42,
+                },
+                {
+                    "name": "test_logger_jsonl",
+                    "level": "ERROR",
+                    "function": "test_logger_jsonl",
+                    "message": "plain",
+                },
+                {
+                    "name": "test_logger_jsonl",
+                    "level": "WARNING",
+                    "function": "test_logger_jsonl",
+                    "message": "from base",
+                    "base": True,
+                },
+            ],
+        )
+
+    @parameterized.expand([("orjson", True), ("json", False)])
+    def test_logger_non_str_keys(self, _: str, use_orjson: bool) -> None:
+        backend = jsonl.orjson if use_orjson else None
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "jsonl.log")
+            logger = Logger(
+                "test_logger_non_str_keys",
+                file,
+                file_format=LogFileFormat.JSONL,
+            )
+            logger.set_format([LogFormatBlock.MESSAGE])
+            with unittest.mock.patch.object(jsonl, "orjson", backend):
+                logger.file("one", extra={1: "x"})
+                logger.file("two")
+            logger.release()
+            with open(file, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(
+            records, [{"message": "one", "1": "x"}, {"message": "two"}]
+        )
+
+    def test_unrenderable_record(self) -> None:
+        class Unprintable:
+            def __str__(self) -> str:
+                raise RuntimeError("no text")
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "jsonl.log")
+            logger = Logger(
+                "test_unrenderable_record",
+                file,
+                file_format=LogFileFormat.JSONL,
+            )
+            logger.set_format([LogFormatBlock.MESSAGE])
+            with unittest.mock.patch("sys.stderr", io.StringIO()) as stderr:
+                logger.file("one", extra={"value": Unprintable()})
+                logger.file("two")
+            logger.release()
+            with open(file, "r", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        # the record is reported and skipped, the batch is written
+        self.assertEqual(records, [{"message": "two"}])
+        self.assertIn("RuntimeError: no text", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -80,6 +80,9 @@ class TestLogBase(unittest.TestCase):
         # not crash counts as pass :)
         logbase.move_logger("no_file_will_be_created_hopefully.log")
 
+        # not crash counts as pass :)
+        logbase.dump_logger()
+
     @unittest.mock.patch("sys.stdout", new_callable=io.StringIO)
     def test_constructor_with_logger(self, mock) -> None:
         logger = Logger("set_logger")
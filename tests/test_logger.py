@@ -1,8 +1,13 @@
 import io
+import re
+import tempfile
+import threading
 import unittest
 import unittest.mock
 import os
+from functools import partial
 from inspect import currentframe, getframeinfo, Traceback
+import uglylogger.logger
 from uglylogger import (
     Logger,
     LogFormatBlock,
@@ -10,6 +15,7 @@ from uglylogger import (
     LogMoveOption,
     LogLevel,
     LogColor,
+    LogOutput,
 )
 from parameterized import parameterized  # type: ignore
 from types import FrameType
@@ -363,6 +369,217 @@ class TestMain(unittest.TestCase):
 
         self._delete_logger(logger, True)
 
+    def test_level_gate_skips_formatting(self) -> None:
+        file = "test_level_gate_skips_formatting.log"
+        logger = self._create_logger("test_level_gate_skips_formatting", file)
+        logger.set_log_level(LogLevel.INFO)
+
+        with unittest.mock.patch.object(
+            logger, "_render", wraps=logger._render
+        ) as format_mock:
+            logger.debug("DEBUG")
+            logger.log("DEBUG")
+            logger.console("DEBUG")
+            logger.file("DEBUG")
+            format_mock.assert_not_called()
+
+            logger.info("INFO")
+            format_mock.assert_called()
+
+        self._delete_logger(logger, True)
+
+    def test_level_gate_refresh(self) -> None:
+        logger = self._create_logger("test_level_gate_refresh")
+        self.assertTrue(logger.is_enabled_for(LogLevel.DEBUG))
+        # there is no file output
+        self.assertFalse(
+            logger.is_enabled_for(LogLevel.CRITICAL, LogOutput.FILE)
+        )
+
+        logger.set_log_level(LogLevel.ERROR)
+        self.assertFalse(logger.is_enabled_for(LogLevel.WARNING))
+        self.assertTrue(logger.is_enabled_for(LogLevel.ERROR))
+
+        # shared state reload uses the level of the new instance
+        logger_second = self._create_logger("test_level_gate_refresh")
+        self.assertTrue(logger_second.is_enabled_for(LogLevel.DEBUG))
+
+        logger.release()
+        self.assertFalse(logger.is_enabled_for(LogLevel.CRITICAL))
+
+        self._delete_logger(logger)
+        self._delete_logger(logger_second)
+
+    def test_level_of_same_name_instances(self) -> None:
+        file = "test_level_of_same_name_instances.log"
+        first = self._create_logger("test_level_of_same_name", file)
+        first.set_format([LogFormatBlock.MESSAGE])
+        second = self._create_logger("test_level_of_same_name")
+        # the handlers are shared, the last level wins for both
+        first.set_log_level(LogLevel.WARNING)
+        second.set_log_level(LogLevel.DEBUG)
+        first.file("emitted")
+        self.assertEqual(self._read_line_of_log_file(file), "emitted")
+        self.assertTrue(first.is_enabled_for(LogLevel.DEBUG))
+        second.set_log_level(LogLevel.ERROR)
+        self.assertFalse(first.is_enabled_for(LogLevel.WARNING))
+        first.file("dropped", level=LogLevel.WARNING)
+        self.assertEqual(self._read_line_of_log_file(file), "emitted")
+
+        self._delete_logger(second, False)
+        self._delete_logger(first)
+
+    def test_log_all_formats_once(self) -> None:
+        file = "test_log_all_formats_once.log"
+        logger = self._create_logger(
+            "test_log_all_formats_once", file, color_mode=LogColorMode.MONO
+        )
+        logger.set_format(
+            [
+                LogFormatBlock.DATETIME,
+                " ",
+                LogFormatBlock.LINE,
+                " ",
+                LogFormatBlock.MESSAGE,
+            ]
+        )
+        console = io.StringIO()
+        if logger._console_handler is not None:
+            logger._console_handler.setStream(console)
+
+        with unittest.mock.patch(
+            "uglylogger.logger.find_call_site",
+            wraps=uglylogger.logger.find_call_site,
+        ) as site_mock:
+            logger.info("ALL")
+            self.assertEqual(site_mock.call_count, 1)
+
+        # both outputs carry exactly the same record
+        line = self._read_line_of_log_file(file)
+        self.assertEqual(console.getvalue().rstrip("\n"), line)
+
+        self._delete_logger(logger, True)
+
+    def test_log_all_colored_console_wraps_body(self) -> None:
+        file = "test_log_all_colored_console_wraps_body.log"
+        logger = self._create_logger(
+            "test_log_all_colored_console_wraps_body", file
+        )
+        logger.set_format([LogFormatBlock.DATETIME, LogFormatBlock.MESSAGE])
+        console = io.StringIO()
+        if logger._console_handler is not None:
+            logger._console_handler.setStream(console)
+
+        logger.warning("colored", LogColor.GREEN)
+        line = self._read_line_of_log_file(file)
+        self.assertEqual(console.getvalue(), f"\x1b[1;32m{line}\x1b[0m\n")
+
+        self._delete_logger(logger, True)
+
+    def test_deferred_args(self) -> None:
+        file = "test_deferred_args.log"
+        logger = self._create_logger("test_deferred_args", file)
+        logger.set_format([LogFormatBlock.MESSAGE])
+
+        logger.info("percent %s %d", "a", 1)
+        self.assertEqual(self._read_line_of_log_file(file), "percent a 1")
+        logger.info("mapping %(key)s", {"key": "value"})
+        self.assertEqual(self._read_line_of_log_file(file), "mapping value")
+        logger.info("braces {} {}", "b", 2)
+        self.assertEqual(self._read_line_of_log_file(file), "braces b 2")
+        logger.file("level {}", 3, level=LogLevel.ERROR)
+        self.assertEqual(self._read_line_of_log_file(file), "level 3")
+        # arguments which don't fit the message are appended
+        logger.info("plain", "x", None)
+        self.assertEqual(self._read_line_of_log_file(file), "plain x None")
+
+        self._delete_logger(logger, True)
+
+    def test_deferred_args_filtered(self) -> None:
+        file = "test_deferred_args_filtered.log"
+        logger = self._create_logger("test_deferred_args_filtered", file)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        logger.set_log_level(LogLevel.INFO)
+
+        expensive = unittest.mock.Mock(return_value="expensive")
+        argument = unittest.mock.MagicMock()
+        logger.debug(lambda: expensive())
+        logger.debug("%s", argument)
+        expensive.assert_not_called()
+        argument.__str__.assert_not_called()  # type: ignore
+
+        logger.info(lambda: expensive())
+        expensive.assert_called_once()
+        self.assertEqual(self._read_line_of_log_file(file), "expensive")
+
+        self._delete_logger(logger, True)
+
+    def test_other_callables_are_not_called(self) -> None:
+        file = "test_other_callables_are_not_called.log"
+        logger = self._create_logger("test_other_callables", file)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        calls: list[str] = []
+
+        class Handler:
+            def __call__(self, event: str) -> None:
+                calls.append(event)  # pragma: no cover
+
+            def __str__(self) -> str:
+                return "handler"
+
+        def record(event: str = "default") -> str:
+            calls.append(event)
+            return event
+
+        logger.info(len)
+        self.assertEqual(
+            self._read_line_of_log_file(file), "<built-in function len>"
+        )
+        handler = Handler()
+        logger.info(handler)
+        self.assertEqual(self._read_line_of_log_file(file), "handler")
+        deferred = partial(record, "partial")
+        logger.info(deferred)
+        self.assertEqual(self._read_line_of_log_file(file), str(deferred))
+        self.assertEqual(calls, [])
+        # optional parameters are not required
+        logger.info(record)
+        self.assertEqual(self._read_line_of_log_file(file), "default")
+        self.assertEqual(calls, ["default"])
+
+        self._delete_logger(logger, True)
+
+    def test_legacy_positional_parameters(self) -> None:
+        file = "test_legacy_positional_parameters.log"
+        logger = self._create_logger(
+            "test_legacy_positional_parameters",
+            file,
+            color_mode=LogColorMode.MONO,
+        )
+        logger.set_format([LogFormatBlock.LEVEL, " ", LogFormatBlock.MESSAGE])
+        console = io.StringIO()
+        if logger._console_handler is not None:
+            logger._console_handler.setStream(console)
+
+        logger.debug("file only", LogColor.RED, LogOutput.FILE)
+        logger.debug("file only", None, LogOutput.FILE)
+        logger.log("warning", None, LogLevel.WARNING, LogOutput.FILE)
+        logger.file("error", LogLevel.ERROR)
+        self.assertEqual(console.getvalue(), "")
+        with open(file, "r") as f:
+            lines = [line.rstrip("\n") for line in f]
+        self.assertEqual(
+            lines,
+            [
+                "DEBUG file only",
+                "DEBUG file only",
+                "WARNING warning",
+                "ERROR error",
+            ],
+        )
+
+        self._delete_logger(logger, True)
+
     def test_log_level_color(self) -> None:
         color: LogColor = Logger.LogLevelToColor(LogLevel.DEBUG)
         self.assertEqual(color, Logger.DEFAULT_DEBUG_COLOR)
@@ -674,5 +891,64 @@ class TestMain(unittest.TestCase):
         self.assertFalse(os.path.exists("new_log_file.log"))
 
 
+class TestConcurrency(unittest.TestCase):
+    THREADS = 32
+    RECORDS = 200
+
+    @parameterized.expand([(False,), (True,)])
+    def test_stress(self, async_mode: bool) -> None:
+        # logging threads race with move() and set_format(),
+        #   every record must end up in exactly one file, whole
+        directory = tempfile.TemporaryDirectory()
+        files = [os.path.join(directory.name, f"{i}.log") for i in range(4)]
+        logger = Logger(
+            f"test_stress_{async_mode}", files[0], async_mode=async_mode
+        )
+        layouts: list[list] = [
+            [LogFormatBlock.MESSAGE],
+            ["<", LogFormatBlock.MESSAGE, ">"],
+        ]
+        logger.set_format(layouts[0])
+        start = threading.Barrier(self.THREADS + 1)
+
+        def produce(thread: int) -> None:
+            start.wait()
+            for i in range(self.RECORDS):
+                logger.file("%02d-%04d-%s", thread, i, "y" * 100)
+
+        threads = [
+            threading.Thread(target=produce, args=(t,))
+            for t in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        for index, file in enumerate(files[1:], 1):
+            logger.set_format(layouts[index % 2])
+            logger.move(file, LogMoveOption.KEEP_AND_INIT)
+        for thread in threads:
+            thread.join()
+        logger.release()
+
+        record = re.compile(r"(<)?(\d{2}-\d{4})-y{100}(?(1)>)")
+        found: list[str] = []
+        for file in files:
+            with open(file, "r") as f:
+                for line in f.read().splitlines():
+                    match = record.fullmatch(line)
+                    self.assertIsNotNone(match, line)
+                    if match is not None:
+                        found.append(match.group(2))
+        directory.cleanup()
+        self.assertEqual(
+            sorted(found),
+            [
+                f"{t:02d}-{i:04d}"
+                for t in range(self.THREADS)
+                for i in range(self.RECORDS)
+            ],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
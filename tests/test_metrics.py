@@ -0,0 +1,173 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from uglylogger import (
+    Logger,
+    LogColorMode,
+    LogFileSink,
+    LogFormatBlock,
+    LogLevel,
+    LogOutput,
+)
+from uglylogger.metrics import Histogram
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "metrics.log")
+
+    def _logger(self, **kwargs) -> Logger:
+        logger = Logger(
+            "test_metrics", self.file, color_mode=LogColorMode.MONO, **kwargs
+        )
+        self.addCleanup(logger.release)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        handler = logger._console_handler
+        assert handler is not None
+        handler.setStream(io.StringIO())
+        return logger
+
+    def _time_every(self, logger: Logger, every: int) -> None:
+        metrics = logger._metrics
+        assert metrics is not None
+        metrics.TIME_EVERY = every
+
+    def test_counters(self) -> None:
+        logger = self._logger()
+        logger.set_log_level(LogLevel.INFO)
+        logger.set_metrics()
+        self._time_every(logger, 1)
+        for i in range(2):
+            logger.debug("filtered %d", i)
+        for i in range(3):
+            logger.info("both %d", i)
+        logger.warning("file only", output=LogOutput.FILE)
+        logger.error("console only", output=LogOutput.CONSOLE)
+        logger.release()
+        stats = logger.stats()
+        self.assertEqual(stats["filtered"]["DEBUG"], 2)
+        self.assertEqual(stats["filtered"]["INFO"], 0)
+        self.assertEqual(stats["records"]["INFO"], {"console": 3, "file": 3})
+        self.assertEqual(
+            stats["records"]["WARNING"], {"console": 0, "file": 1}
+        )
+        self.assertEqual(stats["records"]["ERROR"], {"console": 1, "file": 0})
+        self.assertEqual(stats["bytes"]["stream"], os.path.getsize(self.file))
+        self.assertEqual(stats["bytes"]["console"], 3 * 7 + 13)
+        self.assertEqual(stats["dropped"], 0)
+        # one observation per record, the file and the console share it
+        self.assertEqual(stats["format_seconds"]["count"], 5)
+        self.assertEqual(stats["io_seconds"]["count"], 5)
+        # the message only layout does not need the call site
+        self.assertEqual(stats["caller_seconds"]["count"], 0)
+
+    def test_timing_is_sampled(self) -> None:
+        logger = self._logger()
+        logger.set_metrics()
+        self._time_every(logger, 4)
+        for i in range(10):
+            logger.file("record %d", i)
+        stats = logger.stats()
+        self.assertEqual(stats["records"]["DEBUG"]["file"], 10)
+        # the 1st, 5th and 9th records
+        self.assertEqual(stats["io_seconds"]["count"], 3)
+
+    def test_async_units(self) -> None:
+        logger = self._logger(async_mode=True)
+        logger.set_metrics()
+        self._time_every(logger, 1)
+        writer = logger._writer
+        assert writer is not None
+        # the records pile up while the writer is busy
+        release = threading.Event()
+        dispatch = writer._dispatch
+
+        def blocked(entries: list) -> None:
+            release.wait()
+            dispatch(entries)
+
+        writer._dispatch = blocked
+        for i in range(10):
+            logger.file("record %d", i)
+        release.set()
+        self.assertTrue(logger.flush())
+        stats = logger.stats()
+        self.assertEqual(stats["format_seconds"]["count"], 10)
+        self.assertLess(stats["io_seconds"]["count"], 10)
+
+    def test_binary_sink(self) -> None:
+        logger = self._logger(file_sink=LogFileSink.BINARY)
+        logger.set_metrics()
+        logger.file("record")
+        stats = logger.stats()
+        self.assertGreater(stats["bytes"]["binary"], 0)
+        self.assertEqual(stats["caller_seconds"]["count"], 1)
+
+    def test_off(self) -> None:
+        logger = self._logger()
+        logger.set_log_level(LogLevel.INFO)
+        self.assertEqual(logger.stats(), {})
+        logger.set_metrics()
+        # the level gate is left as it is
+        self.assertEqual(logger._min_level, int(LogLevel.INFO))
+        logger.info("counted")
+        logger.set_metrics(False)
+        self.assertIsNone(logger._metrics)
+        self.assertEqual(logger.stats(), {})
+        # turning them on again starts from zero
+        logger.set_metrics()
+        self.assertEqual(logger.stats()["records"]["INFO"]["file"], 0)
+
+    def test_prometheus_export(self) -> None:
+        logger = self._logger()
+        export = os.path.join(self._directory.name, "metrics.prom")
+        logger.set_metrics(file=export, interval=60)
+        logger.info("exported")
+        self.assertFalse(os.path.exists(export))
+        metrics = logger._metrics
+        assert metrics is not None
+        metrics.export_if_due(time.monotonic() + 60)
+        with open(export, "r", encoding="utf-8") as f:
+            text = f.read()
+        self.assertIn(
+            'uglylogger_records_total{logger="test_metrics",'
+            'level="INFO",output="file"} 1',
+            text,
+        )
+        self.assertIn("# TYPE uglylogger_io_seconds histogram", text)
+        self.assertIn(
+            'uglylogger_io_seconds_bucket{logger="test_metrics",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn(
+            'uglylogger_io_seconds_count{logger="test_metrics"} 1', text
+        )
+        # no temporary file is left
+        self.assertEqual(
+            sorted(os.listdir(self._directory.name)),
+            ["metrics.log", "metrics.prom"],
+        )
+        with self.assertRaises(ValueError):
+            logger.set_metrics(file=export, interval=0)
+
+    def test_histogram(self) -> None:
+        histogram = Histogram()
+        for ns in (500, 1023, 1024, 3000, 2 * 10**9):
+            histogram.observe(ns)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(snapshot["buckets"]["1.024e-06"], 2)
+        self.assertEqual(snapshot["buckets"]["2.048e-06"], 3)
+        self.assertEqual(snapshot["buckets"]["4.096e-06"], 4)
+        self.assertEqual(snapshot["buckets"]["1.073741824"], 4)
+        self.assertEqual(snapshot["buckets"]["+Inf"], 5)
+        self.assertAlmostEqual(snapshot["sum"], 2.0000055470)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,132 @@
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+from uglylogger import Logger, LogFileSink, LogFormatBlock, LogMoveOption
+from uglylogger import mmapfile
+from uglylogger.__main__ import main
+from uglylogger.handlers import MmapFileHandler
+
+
+class TestMmapFileHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self._file = os.path.join(self._dir.name, "mmap.log")
+
+    def tearDown(self) -> None:
+        self._dir.cleanup()
+
+    def _flags(self) -> int:
+        with open(self._file, "rb") as f:
+            flags, _ = mmapfile.read_header(f.read(mmapfile.HEADER.size))
+        return flags
+
+    def test_write_and_seal(self) -> None:
+        handler = MmapFileHandler(self._file, segment_size=1024)
+        self.assertEqual(
+            os.path.getsize(self._file), mmapfile.HEADER.size + 1024
+        )
+        handler.write("first")
+        self.assertEqual(mmapfile.read_records(self._file), b"first\n")
+        handler.write("ğüşöç")
+        # readable while the file is still mapped
+        self.assertEqual(
+            mmapfile.read_records(self._file).decode(),
+            "first\nğüşöç\n",
+        )
+        self.assertEqual(self._flags(), 0)
+        handler.close()
+        self.assertEqual(self._flags(), mmapfile.FLAG_SEALED)
+        self.assertEqual(
+            os.path.getsize(self._file),
+            mmapfile.HEADER.size + len("first\nğüşöç\n".encode()),
+        )
+
+    def test_grow(self) -> None:
+        handler = MmapFileHandler(self._file, segment_size=16)
+        lines = [f"line {i}" for i in range(10)]
+        for line in lines:
+            handler.write(line)
+        handler.write("x" * 100)
+        handler.close()
+        self.assertEqual(
+            mmapfile.read_records(self._file).decode(),
+            "\n".join(lines + ["x" * 100]) + "\n",
+        )
+
+    def test_append(self) -> None:
+        handler = MmapFileHandler(self._file, segment_size=16)
+        handler.write("first")
+        handler.close()
+        handler = MmapFileHandler(self._file, segment_size=16)
+        handler.write("second")
+        self.assertEqual(self._flags(), 0)
+        handler.close()
+        self.assertEqual(mmapfile.read_records(self._file), b"first\nsecond\n")
+        handler = MmapFileHandler(self._file, "w", segment_size=16)
+        handler.close()
+        self.assertEqual(mmapfile.read_records(self._file), b"")
+
+    def test_not_mmap_file(self) -> None:
+        with open(self._file, "w") as f:
+            f.write("plain text log file\n")
+        with self.assertRaises(ValueError):
+            MmapFileHandler(self._file)
+
+    def test_recover(self) -> None:
+        handler = MmapFileHandler(self._file, segment_size=1024)
+        handler.write("before crash")
+        handler.flush()
+        # a crashed process leaves the preallocated space behind
+        self.assertTrue(mmapfile.recover(self._file))
+        self.assertFalse(mmapfile.recover(self._file))
+        self.assertEqual(self._flags(), mmapfile.FLAG_SEALED)
+        self.assertEqual(mmapfile.read_records(self._file), b"before crash\n")
+        handler.close()
+
+    def test_rotation(self) -> None:
+        handler = MmapFileHandler(self._file, segment_size=64, max_bytes=8)
+        handler.write("first")
+        handler.write("second")
+        handler.close()
+        self.assertEqual(mmapfile.read_records(self._file), b"second\n")
+        self.assertEqual(mmapfile.read_records(self._file + ".1"), b"first\n")
+
+    def test_main(self) -> None:
+        handler = MmapFileHandler(self._file)
+        handler.write("printed")
+        handler.close()
+        output = io.TextIOWrapper(io.BytesIO())
+        with unittest.mock.patch("sys.stdout", output):
+            self.assertEqual(main(["mmap", self._file]), 0)
+            self.assertEqual(output.buffer.getvalue(), b"printed\n")
+
+
+class TestMmapLogger(unittest.TestCase):
+    def test_logger_mmap_sink(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "mmap.log")
+            moved = os.path.join(directory, "moved.log")
+            logger = Logger(
+                "test_logger_mmap_sink",
+                file,
+                file_sink=LogFileSink.MMAP,
+                segment_size=1024,
+            )
+            self.assertIsInstance(logger._file_handler, MmapFileHandler)
+            logger.set_format([LogFormatBlock.MESSAGE])
+            logger.file("old")
+            # move seals the old file and maps a new one
+            logger.move(moved, LogMoveOption.KEEP_AND_INIT)
+            self.assertEqual(mmapfile.read_records(file), b"old\n")
+            self.assertEqual(
+                os.path.getsize(file), mmapfile.HEADER.size + len("old\n")
+            )
+            logger.file("new")
+            logger.release()
+            self.assertEqual(mmapfile.read_records(moved), b"new\n")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,120 @@
+import io
+import os
+import tempfile
+import unittest
+from parameterized import parameterized  # type: ignore
+from uglylogger import (
+    Logger,
+    LogColorMode,
+    LogFileSink,
+    LogFormatBlock,
+    LogOutput,
+    LogProfileSort,
+)
+from uglylogger.binary import MAGIC
+
+
+def _chatty(logger: Logger) -> None:
+    for i in range(10):
+        logger.file("a rather long message of the chatty call site %d", i)
+
+
+def _busy(logger: Logger) -> None:
+    for i in range(30):
+        logger.file("%d", i)
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "profile.log")
+        self.report = os.path.join(self._directory.name, "profile.txt")
+
+    def _logger(self, **kwargs) -> Logger:
+        logger = Logger(
+            "test_profile", self.file, color_mode=LogColorMode.MONO, **kwargs
+        )
+        self.addCleanup(logger.release)
+        logger.set_format([LogFormatBlock.MESSAGE])
+        handler = logger._console_handler
+        assert handler is not None
+        handler.setStream(io.StringIO())
+        logger.set_profiling(file=self.report)
+        return logger
+
+    @parameterized.expand([(False,), (True,)])
+    def test_top_talkers(self, async_mode: bool) -> None:
+        logger = self._logger(async_mode=async_mode)
+        _chatty(logger)
+        _busy(logger)
+        logger.info("both outputs", output=LogOutput.ALL)
+        logger.flush()
+        by_bytes = logger.profile()
+        self.assertEqual(len(by_bytes), 3)
+        self.assertRegex(
+            by_bytes[0]["site"], r"^test_profile\.py:\d+ _chatty$"
+        )
+        self.assertEqual(by_bytes[0]["records"], 10)
+        self.assertEqual(by_bytes[0]["bytes"], 10 * 48)
+        self.assertGreater(by_bytes[0]["format_seconds"], 0)
+        by_records = logger.profile(LogProfileSort.RECORDS, limit=1)
+        self.assertEqual(len(by_records), 1)
+        self.assertRegex(by_records[0]["site"], r" _busy$")
+        self.assertEqual(by_records[0]["records"], 30)
+        # one record written to both outputs
+        self.assertEqual(by_bytes[-1]["records"], 1)
+        self.assertEqual(by_bytes[-1]["bytes"], 2 * len("both outputs\n"))
+        logger.release()
+        self.assertEqual(
+            sum(site["bytes"] for site in by_bytes[:2]),
+            os.path.getsize(self.file) - len("both outputs\n"),
+        )
+
+    def test_report(self) -> None:
+        logger = self._logger()
+        _chatty(logger)
+        _busy(logger)
+        logger.dump_profile(sort=LogProfileSort.RECORDS, limit=1)
+        with open(self.report, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(
+            "40 records, 560 bytes, 2 call sites, by records", lines[0]
+        )
+        self.assertTrue(lines[2].endswith(" _busy"))
+        self.assertIn(" 30 ", lines[2])
+
+    def test_release_writes_the_report_once(self) -> None:
+        logger = self._logger()
+        _busy(logger)
+        logger.release()
+        self.assertTrue(os.path.exists(self.report))
+        os.remove(self.report)
+        logger.release()
+        self.assertFalse(os.path.exists(self.report))
+
+    def test_binary_sink(self) -> None:
+        logger = self._logger(file_sink=LogFileSink.BINARY)
+        _chatty(logger)
+        _busy(logger)
+        logger.release()
+        sites = logger.profile(LogProfileSort.RECORDS)
+        self.assertEqual([site["records"] for site in sites], [30, 10])
+        self.assertEqual(
+            sum(site["bytes"] for site in sites),
+            os.path.getsize(self.file) - len(MAGIC),
+        )
+
+    def test_off(self) -> None:
+        logger = self._logger()
+        logger.set_profiling(False)
+        _busy(logger)
+        self.assertIsNone(logger._profiler)
+        self.assertEqual(logger.profile(), [])
+        logger.release()
+        self.assertFalse(os.path.exists(self.report))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,123 @@
+import io
+import os
+import unittest
+import unittest.mock
+import uglylogger.progress
+from uglylogger import Logger, LogColorMode, LogProgress
+
+
+class _Terminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+class TestLogProgress(unittest.TestCase):
+    def setUp(self) -> None:
+        self.logger = Logger("test_progress", color_mode=LogColorMode.MONO)
+        self.now = 100.0
+        patcher = unittest.mock.patch(
+            "uglylogger.progress.time.monotonic", lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.logger.release)
+
+    def _terminal(self) -> _Terminal:
+        patcher = unittest.mock.patch("sys.stdout", new_callable=_Terminal)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_coalesces_updates(self) -> None:
+        stdout = self._terminal()
+        progress = self.logger.progress(refresh_rate=10, console_width=20)
+        for i in range(1000):
+            progress.update("%d of %d", i, 1000)
+        self.assertEqual(stdout.getvalue(), "\r" + "0 of 1000".ljust(20))
+        self.now += 0.1
+        progress.update("%d of %d", 1000, 1000)
+        self.assertEqual(
+            stdout.getvalue().split("\r")[1:],
+            ["0 of 1000".ljust(20), "1000 of 1000".ljust(20)],
+        )
+        progress.close()
+        self.assertTrue(stdout.getvalue().endswith("\n"))
+        # closed, nothing is rendered anymore
+        progress.update("after close")
+        self.assertNotIn("after close", stdout.getvalue())
+
+    def test_only_changes_are_written(self) -> None:
+        stdout = self._terminal()
+        progress = self.logger.progress(console_width=8)
+        progress.update("working")
+        for _ in range(5):
+            self.now += 1
+            progress.update("working")
+        # the visible text of a long message does not change either
+        progress.update("a long message 1")
+        self.now += 1
+        progress.update("a long message 2")
+        self.assertEqual(
+            stdout.getvalue().split("\r")[1:], ["working ", "a lon..."]
+        )
+        progress.close()
+
+    def test_final_state(self) -> None:
+        stdout = self._terminal()
+        with self.logger.progress(console_width=10) as progress:
+            progress.update("first")
+            progress.update("last")
+        self.assertEqual(
+            stdout.getvalue(),
+            "\r" + "first".ljust(10) + "\r" + "last".ljust(10) + "\n",
+        )
+        self.assertNotIn(progress, uglylogger.progress._live_progress)
+
+    def test_terminal_resize(self) -> None:
+        stdout = self._terminal()
+        size = os.terminal_size((20, 24))
+        with unittest.mock.patch(
+            "uglylogger.progress.shutil.get_terminal_size",
+            side_effect=lambda: size,
+        ) as get_size:
+            progress = self.logger.progress()
+            progress.update("step 1")
+            self.now += 1
+            progress.update("step 2")
+            self.assertEqual(get_size.call_count, 1)
+            size = os.terminal_size((10, 24))
+            uglylogger.progress._on_sigwinch(0, None)
+            self.now += 1
+            progress.update("step 2")
+            self.assertEqual(get_size.call_count, 2)
+            progress.close()
+        self.assertEqual(
+            stdout.getvalue().split("\r")[1:],
+            ["step 1".ljust(19), "step 2".ljust(19), "step 2".ljust(9) + "\n"],
+        )
+
+    def test_not_a_terminal(self) -> None:
+        with unittest.mock.patch.object(self.logger, "console") as console:
+            progress = self.logger.progress(line_interval=5)
+            for i in range(10):
+                progress.update("%d done", i)
+                self.now += 1
+            progress.close()
+        self.assertEqual(
+            [c.args[0] for c in console.call_args_list],
+            ["0 done", "5 done", "9 done"],
+        )
+        with unittest.mock.patch.object(self.logger, "console") as console:
+            progress = self.logger.progress(line_interval=None)
+            progress.update("nothing")
+            progress.close()
+        console.assert_not_called()
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            LogProgress(self.logger, refresh_rate=0)
+        with self.assertRaises(ValueError):
+            LogProgress(self.logger, line_interval=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,165 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+from parameterized import parameterized  # type: ignore
+from uglylogger import (
+    Logger,
+    LogColorMode,
+    LogCompression,
+    LogFormatBlock,
+    LogLevel,
+)
+from uglylogger.__main__ import main
+from uglylogger.compression import compress_file
+from uglylogger.formatter import text_to_layout
+from uglylogger.reader import DEFAULT_LAYOUT, LogParser, read_log
+
+
+class TestReader(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "reader.log")
+
+    def _write(self, layout: str | list = DEFAULT_LAYOUT) -> Logger:
+        logger = Logger("test_reader", self.file, color_mode=LogColorMode.MONO)
+        self.addCleanup(logger.release)
+        if isinstance(layout, str):
+            layout = text_to_layout(layout)
+        logger.set_format(layout)
+        handler = logger._console_handler
+        assert handler is not None
+        handler.setStream(io.StringIO())
+        logger.file("first")
+        logger.warning("two\nlines [WARNING] not a record")
+        logger.error("ünïcode")
+        logger.release()
+        return logger
+
+    def test_default_layout(self) -> None:
+        self._write()
+        records = list(read_log(self.file))
+        self.assertEqual(len(records), 3)
+        record = records[1]
+        self.assertEqual(record.name, "test_reader")
+        self.assertEqual(record.level, LogLevel.WARNING)
+        self.assertEqual(record.file, "test_reader.py")
+        self.assertIsInstance(record.line, int)
+        self.assertEqual(record.function, "_write")
+        self.assertEqual(record.msg, "two\nlines [WARNING] not a record")
+        created = record.created
+        assert created is not None
+        self.assertAlmostEqual(created, time.time(), delta=60)
+        self.assertEqual(records[2].msg, "ünïcode")
+
+    def test_fields_after_the_message(self) -> None:
+        layout = [
+            LogFormatBlock.LEVEL,
+            ": ",
+            LogFormatBlock.MESSAGE,
+            " (",
+            LogFormatBlock.FUNCTION,
+            ":",
+            LogFormatBlock.LINE,
+            ")",
+        ]
+        self._write(layout)
+        records = list(read_log(self.file, layout))
+        self.assertEqual(
+            [(r.level, r.msg, r.function) for r in records],
+            [
+                (LogLevel.DEBUG, "first", "_write"),
+                (
+                    LogLevel.WARNING,
+                    "two\nlines [WARNING] not a record",
+                    "_write",
+                ),
+                (LogLevel.ERROR, "ünïcode", "_write"),
+            ],
+        )
+        self.assertIsNone(records[0].name)
+        self.assertIsNone(records[0].created)
+
+    @parameterized.expand([(1,), (7,), (64,), (4096,)])
+    def test_chunks(self, chunk_size: int) -> None:
+        self._write()
+        with open(self.file, "rb") as f:
+            expected = [r.text for r in LogParser().parse(f.read().decode())]
+        self.assertEqual(len(expected), 3)
+        records = read_log(self.file, chunk_size=chunk_size)
+        self.assertEqual([r.text for r in records], expected)
+
+    def test_archive(self) -> None:
+        self._write()
+        expected = [r.msg for r in read_log(self.file)]
+        archive = compress_file(self.file, LogCompression.GZIP)
+        self.assertEqual([r.msg for r in read_log(archive)], expected)
+
+    @parameterized.expand([(1,), (7,), (4096,)])
+    def test_record_size_limit(self, chunk_size: int) -> None:
+        with open(self.file, "w", encoding="utf-8") as f:
+            f.write("not a record\n" * 100)
+            f.write("ü" * 50 + "\n")
+        records = list(
+            read_log(
+                self.file,
+                "[{LEVEL}] {MESSAGE}",
+                chunk_size=chunk_size,
+                max_record_size=40,
+            )
+        )
+        self.assertGreater(len(records), 1)
+        for record in records:
+            self.assertLessEqual(len(record.text), 40)
+        # only the new lines of the cuts are added or removed
+        text = "".join(r.text for r in records).replace("\n", "")
+        self.assertEqual(text, "not a record" * 100 + "ü" * 50)
+
+    def test_main(self) -> None:
+        self._write("[{LEVEL}] {MESSAGE}")
+        output = io.StringIO()
+        with unittest.mock.patch("sys.stdout", output):
+            main(
+                [
+                    "read",
+                    self.file,
+                    "--format",
+                    "[{LEVEL}] {MESSAGE}",
+                    "--level",
+                    "ERROR",
+                    "--level",
+                    "WARNING",
+                ]
+            )
+        self.assertEqual(
+            output.getvalue(),
+            "[WARNING] two\nlines [WARNING] not a record\n[ERROR] ünïcode\n",
+        )
+
+    def test_text(self) -> None:
+        parser = LogParser("[{LEVEL}] {MESSAGE}")
+        records = parser.parse("before\n[INFO] a\n\n[DEBUG] b\n[NOTE] c")
+        self.assertEqual(
+            [(r.level, r.msg) for r in records],
+            [
+                (None, "before"),
+                (LogLevel.INFO, "a\n"),
+                (LogLevel.DEBUG, "b\n[NOTE] c"),
+            ],
+        )
+        self.assertEqual(records[2].text, "[DEBUG] b\n[NOTE] c")
+        self.assertEqual(parser.parse(""), [])
+        # a layout without LEVEL and DATETIME starts a record per line
+        self.assertEqual(
+            [r.msg for r in LogParser("{MESSAGE}").parse("a\n\nb\n")],
+            ["a", "", "b"],
+        )
+        with self.assertRaises(ValueError):
+            LogParser("{UNKNOWN}")
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from parameterized import parameterized  # type: ignore
+from uglylogger import Logger, LogFormatBlock, LogLevel
+from uglylogger.recorder import FlightRecorder
+
+
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "recorder.log")
+
+    def _logger(self, **kwargs) -> Logger:
+        logger = Logger(
+            "test_recorder", self.file, flight_recorder=4, **kwargs
+        )
+        logger.set_format([LogFormatBlock.LEVEL, " ", LogFormatBlock.MESSAGE])
+        logger.set_log_level(LogLevel.WARNING)
+        self.addCleanup(logger.release)
+        return logger
+
+    def _read(self) -> list[str]:
+        with open(self.file, "r") as f:
+            return f.read().splitlines()
+
+    @parameterized.expand([(False,), (True,)])
+    def test_dump_on_error(self, async_mode: bool) -> None:
+        logger = self._logger(async_mode=async_mode)
+        for i in range(6):
+            logger.debug("step %d", i)
+        logger.info("almost there")
+        logger.warning("slow")
+        logger.error("failed")
+        logger.debug("after")
+        logger.release()
+        self.assertEqual(
+            self._read(),
+            [
+                "WARNING slow",
+                "DEBUG step 3",
+                "DEBUG step 4",
+                "DEBUG step 5",
+                "INFO almost there",
+                "ERROR failed",
+            ],
+        )
+
+    def test_dump(self) -> None:
+        logger = self._logger()
+        calls = []
+
+        def message() -> str:
+            calls.append(1)
+            return "deferred"
+
+        logger.debug(message)
+        # the message is evaluated by dump()
+        self.assertEqual(calls, [])
+        logger.dump()
+        self.assertEqual(calls, [1])
+        logger.dump()
+        logger.flush()
+        self.assertEqual(self._read(), ["DEBUG deferred"])
+
+    def test_file_calls_are_recorded(self) -> None:
+        logger = self._logger()
+        logger.file("below the file level")
+        logger.file("also below", level=LogLevel.INFO)
+        logger.dump()
+        logger.release()
+        self.assertEqual(
+            self._read(), ["DEBUG below the file level", "INFO also below"]
+        )
+
+    def test_console_only_calls_are_not_recorded(self) -> None:
+        logger = self._logger()
+        logger.console("console only")
+        logger.critical("failed")
+        logger.release()
+        self.assertEqual(self._read(), ["CRITICAL failed"])
+
+    def test_ring(self) -> None:
+        recorder = FlightRecorder(3)
+        for i in range(5):
+            recorder.record(10, i, (), 0.0, None, 0, None, None, None)
+        self.assertEqual(len(recorder), 3)
+        self.assertEqual([call[1] for call in recorder.take()], [2, 3, 4])
+        self.assertEqual(recorder.take(), [])
+        recorder.record(10, "x", (), 0.0, None, 0, None, None, None)
+        self.assertEqual([call[1] for call in recorder.take()], ["x"])
+        with self.assertRaises(ValueError):
+            FlightRecorder(0)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
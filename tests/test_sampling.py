@@ -0,0 +1,178 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+from uglylogger import (
+    Logger,
+    LogFormatBlock,
+    LogLevel,
+    LogSampling,
+    LogSamplingKey,
+    LogSamplingPolicy,
+)
+
+
+class TestSampling(unittest.TestCase):
+    def setUp(self) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.file = os.path.join(self._directory.name, "sampling.log")
+        self.now = 100.0
+        patcher = unittest.mock.patch(
+            "uglylogger.sampling.time.monotonic", lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.logger = Logger("test_sampling", self.file)
+        self.logger.set_format([LogFormatBlock.MESSAGE])
+        self.addCleanup(self.logger.release)
+
+    def _read(self) -> list[str]:
+        self.logger.release()
+        with open(self.file, "r") as f:
+            return f.read().splitlines()
+
+    def test_one_in_n(self) -> None:
+        self.logger.set_sampling(
+            LogSampling(LogSamplingPolicy.ONE_IN_N, n=3),
+            summary_interval=1000,
+        )
+        for i in range(7):
+            self.logger.file("%d", i)
+        lines = self._read()
+        self.assertEqual(lines[:3], ["0", "3", "6"])
+        self.assertEqual(len(lines), 4)
+        self.assertRegex(
+            lines[3], r"suppressed 4 similar messages of test_sampling.py:\d+"
+        )
+
+    def test_call_sites_are_separate(self) -> None:
+        self.logger.set_sampling(
+            LogSampling(LogSamplingPolicy.FIRST_N, n=1),
+            summary_interval=1000,
+        )
+        for i in range(3):
+            self.logger.file("a%d", i)
+            self.logger.file("b%d", i)
+        lines = self._read()
+        self.assertEqual(lines[:2], ["a0", "b0"])
+        self.assertEqual(
+            [line[:24] for line in lines[2:]],
+            ["suppressed 2 similar mes"] * 2,
+        )
+
+    def test_token_bucket(self) -> None:
+        self.logger.set_sampling(
+            LogSampling(
+                LogSamplingPolicy.TOKEN_BUCKET,
+                key=LogSamplingKey.LEVEL,
+                rate=2,
+                burst=2,
+            ),
+            summary_interval=1000,
+        )
+        for i in range(5):
+            self.logger.file("first %d", i)
+        self.now += 1
+        for i in range(5):
+            self.logger.file("second %d", i)
+        lines = self._read()
+        self.assertEqual(
+            lines,
+            [
+                "first 0",
+                "first 1",
+                "second 0",
+                "second 1",
+                "suppressed 6 similar messages of DEBUG",
+            ],
+        )
+
+    def test_first_n_and_periodic_summary(self) -> None:
+        self.logger.set_sampling(
+            LogSampling(
+                LogSamplingPolicy.FIRST_N,
+                key=LogSamplingKey.MESSAGE,
+                levels=[LogLevel.WARNING],
+                n=2,
+                period=60,
+            ),
+            summary_interval=10,
+        )
+        for i in range(5):
+            self.logger.warning("disk %d%% full", 90 + i)
+            self.logger.file("not sampled %d", i)
+        self.now += 10
+        # the summary is logged by the next call, before its record
+        self.logger.file("next")
+        self.now += 60
+        self.logger.warning("disk %d%% full", 99)
+        lines = self._read()
+        self.assertEqual(
+            [line for line in lines if line.startswith("disk")],
+            ["disk 90% full", "disk 91% full", "disk 99% full"],
+        )
+        self.assertEqual(
+            lines[-3:],
+            [
+                "suppressed 3 similar messages of 'disk %d%% full'",
+                "next",
+                "disk 99% full",
+            ],
+        )
+        self.assertEqual(
+            len([line for line in lines if line.startswith("not sampled")]), 5
+        )
+
+    def test_callable_messages(self) -> None:
+        self.logger.set_sampling(
+            LogSampling(
+                LogSamplingPolicy.FIRST_N, key=LogSamplingKey.MESSAGE, n=1
+            ),
+            summary_interval=1000,
+        )
+        for i in range(5):
+            self.logger.file(lambda: f"lazy {i}")
+        sampler = self.logger._sampler
+        assert sampler is not None
+        # one key for the call site, no lambda is kept
+        self.assertEqual(len(sampler._states), 1)
+        self.assertFalse(
+            any(callable(item) for key in sampler._states for item in key[1])
+        )
+        lines = self._read()
+        self.assertEqual(lines[0], "lazy 0")
+        self.assertRegex(
+            lines[1], r"suppressed 4 similar messages of test_sampling.py:\d+"
+        )
+
+    def test_suppressed_records_are_not_formatted(self) -> None:
+        self.logger.set_sampling(LogSampling(LogSamplingPolicy.ONE_IN_N, n=10))
+        with unittest.mock.patch.object(
+            self.logger, "_capture", wraps=self.logger._capture
+        ) as capture:
+            for i in range(100):
+                self.logger.file("%d", i)
+        self.assertEqual(capture.call_count, 10)
+
+    def test_disable(self) -> None:
+        self.logger.set_sampling(LogSampling(LogSamplingPolicy.ONE_IN_N, n=10))
+        for i in range(5):
+            self.logger.file("%d", i)
+        # disabling logs the summary of the old rules
+        self.logger.set_sampling()
+        for i in range(5, 8):
+            self.logger.file("%d", i)
+        self.assertEqual(len(self._read()), 5)
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(ValueError):
+            LogSampling(LogSamplingPolicy.ONE_IN_N, n=0)
+        with self.assertRaises(ValueError):
+            self.logger.set_sampling(
+                LogSampling(LogSamplingPolicy.ONE_IN_N), summary_interval=0
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,69 @@
+import os
+import time
+import unittest
+from datetime import datetime
+from uglylogger import Logger, LogClock, LogFormatBlock
+from uglylogger.timestamp import TimestampRenderer, make_clock
+
+
+class TestTimestamp(unittest.TestCase):
+    def test_default_format(self) -> None:
+        renderer = TimestampRenderer(Logger.DATETIME_FORMAT)
+        for created in (0.0, 1700000000.0, 1700000000.5, 1700000000.9996):
+            expected = datetime.fromtimestamp(created).strftime(
+                "%Y-%m-%d %H:%M:%S.%f"
+            )[:-3]
+            self.assertEqual(renderer.render(created), expected)
+
+    def test_cached_second(self) -> None:
+        renderer = TimestampRenderer("%H:%M:%S.%f")
+        first = renderer.render(1700000000.001)
+        cache = renderer._cache
+        second = renderer.render(1700000000.999)
+        self.assertIs(renderer._cache, cache)
+        self.assertEqual(first[:-3], second[:-3])
+        self.assertEqual(first[-3:], "001")
+        self.assertEqual(second[-3:], "999")
+        renderer.render(1700000001.0)
+        self.assertIsNot(renderer._cache, cache)
+
+    def test_custom_formats(self) -> None:
+        created = 1700000000.042
+        local = time.localtime(1700000000)
+        self.assertEqual(
+            TimestampRenderer("%H:%M").render(created),
+            time.strftime("%H:%M", local),
+        )
+        self.assertEqual(
+            TimestampRenderer("%f|%S|%f").render(created),
+            "042|" + time.strftime("%S", local) + "|042",
+        )
+        self.assertEqual(TimestampRenderer("%%f").render(created), "%f")
+
+    def test_clocks(self) -> None:
+        for clock in LogClock:
+            now = make_clock(clock)()
+            self.assertAlmostEqual(now, time.time(), delta=1.0)
+        monotonic = make_clock(LogClock.MONOTONIC)
+        first = monotonic()
+        self.assertLessEqual(first, monotonic())
+
+    def test_logger_honors_datetime_format(self) -> None:
+        file = "test_logger_honors_datetime_format.log"
+        logger = Logger("test_logger_honors_datetime_format", file)
+        logger.set_clock(LogClock.COARSE)
+        logger.set_format([LogFormatBlock.DATETIME])
+        default_format = Logger.DATETIME_FORMAT
+        try:
+            Logger.DATETIME_FORMAT = "%Y"
+            logger.file("custom")
+        finally:
+            Logger.DATETIME_FORMAT = default_format
+        logger.release()
+        with open(file, "r") as f:
+            self.assertEqual(f.read(), time.strftime("%Y") + "\n")
+        os.remove(file)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover